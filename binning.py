@@ -0,0 +1,155 @@
+import numpy as np
+
+# Supported ways of splitting a value range into color bins
+BIN_STRATEGIES = ("auto", "linear", "log", "quantile")
+
+# "auto" switches to logarithmic bins when the values span more than this ratio
+AUTO_LOG_RATIO = 100
+
+# Smallest lower edge used for logarithmic bins so non-positive minimums stay finite
+MIN_LOG_VALUE = 1e-15
+
+def resolve_strategy(strategy, use_log_scale, min_val, max_val):
+    """Turn the 'auto' strategy into 'log' or 'linear' for the given value range."""
+    if strategy not in BIN_STRATEGIES:
+        raise ValueError(f"Unknown binning strategy: {strategy}")
+    if strategy == "auto":
+        return "log" if use_log_scale or max_val / (min_val + 1e-10) > AUTO_LOG_RATIO else "linear"
+    return strategy
+
+def compute_bin_edges(values, num_bins=5, strategy="auto", use_log_scale=False, min_val=None, max_val=None,
+                      sketch=None):
+    """Compute bin edges for a value array.
+
+    Args:
+        values: 1-D array of values, or None when binning from a sketch
+        num_bins: Number of bins (fewer are returned if quantile edges coincide)
+        strategy: 'auto', 'linear', 'log' or 'quantile'. 'auto' uses
+            logarithmic bins when use_log_scale is set or the values span more
+            than ``AUTO_LOG_RATIO``, and equal-width bins otherwise.
+        use_log_scale: Force logarithmic bins for the 'auto' strategy
+        min_val: Precomputed minimum of values, if available
+        max_val: Precomputed maximum of values, if available
+        sketch: ``QuantileSketch`` of the dataset, used when values is None;
+            quantile edges are then read from the sketch
+
+    Returns:
+        Strictly increasing array of bin edges.
+    """
+    min_val = np.min(values) if min_val is None else min_val
+    max_val = np.max(values) if max_val is None else max_val
+    strategy = resolve_strategy(strategy, use_log_scale, min_val, max_val)
+
+    if strategy == "quantile":
+        # Equal-population bins; repeated values can make neighbouring edges coincide
+        fractions = np.linspace(0, 1, num_bins + 1)
+        if values is None:
+            edges = np.unique(sketch.quantiles(fractions))
+        else:
+            edges = np.unique(np.quantile(values, fractions))
+        if len(edges) >= 2:
+            return edges
+        strategy = "linear"
+
+    if strategy == "log":
+        return np.logspace(np.log10(max(min_val, MIN_LOG_VALUE)), np.log10(max_val), num_bins + 1)
+
+    return np.linspace(min_val, max_val, num_bins + 1)
+
+def analyze_distribution(values, num_bins=5, strategy="auto", use_log_scale=False, sketch=None):
+    """Compute summary statistics, bin edges and color ranges for a value array.
+
+    Statistics of the values passed in are exact. For a dataset sketched
+    while it was read (see ``quantile_sketch.read_csv_with_sketch``), pass
+    values=None and the ``QuantileSketch``: the minimum, maximum and mean
+    then come from the sketch's exact running totals, and the median,
+    quantile edges and bin counts are estimated from the sketch without
+    another pass over the values.
+
+    Returns:
+        Dictionary with 'min', 'max', 'mean', 'median', 'bin_edges', 'hist',
+        'strategy' (with 'auto' resolved to 'log' or 'linear') and
+        'color_ranges' (one dict per bin with 'min', 'max', 'label', 'count'
+        and 'percentage').
+    """
+    if values is None:
+        min_val, max_val = sketch.min, sketch.max
+        mean_val, median_val = sketch.mean, sketch.median
+        count = sketch.count
+    else:
+        values = np.asarray(values)
+        min_val = np.min(values)
+        max_val = np.max(values)
+        mean_val, median_val = np.mean(values), np.median(values)
+        count = len(values)
+    strategy = resolve_strategy(strategy, use_log_scale, min_val, max_val)
+
+    bin_edges = compute_bin_edges(values, num_bins, strategy, use_log_scale, min_val, max_val, sketch)
+    if values is not None:
+        hist, bin_edges = np.histogram(values, bins=bin_edges)
+    else:
+        # Estimated counts: rank differences between consecutive edges
+        ranks = sketch.ranks(bin_edges)
+        ranks[0] = 0.0
+        hist = np.round(np.diff(ranks) * count).astype(int)
+
+    color_ranges = []
+    for i in range(len(hist)):
+        color_ranges.append({
+            'min': bin_edges[i],
+            'max': bin_edges[i+1],
+            'label': f"{bin_edges[i]:.3e} - {bin_edges[i+1]:.3e}",
+            'count': hist[i],
+            'percentage': hist[i]/count*100
+        })
+
+    return {
+        'min': min_val,
+        'max': max_val,
+        'mean': mean_val,
+        'median': median_val,
+        'bin_edges': bin_edges,
+        'hist': hist,
+        'strategy': strategy,
+        'color_ranges': color_ranges
+    }
+
+class BinningCache:
+    """Memoizes ``analyze_distribution`` results per dataset and binning settings.
+
+    Entries are keyed by (dataset id, strategy, number of bins, log scale flag)
+    and keep a reference to the DataFrame, so a new dataset that happens to
+    reuse an old object id is never served stale bins.
+    """
+
+    def __init__(self):
+        """Initialize an empty cache."""
+        self._results = {}
+
+    def clear(self):
+        """Drop all cached results."""
+        self._results.clear()
+
+    def lookup(self, df, num_bins=5, strategy="auto", use_log_scale=False):
+        """Return the cached binning of df['Value'], or None if it has not been computed."""
+        entry = self._results.get((id(df), strategy, num_bins, use_log_scale))
+        if entry is None or entry[0] is not df:
+            return None
+        return entry[1]
+
+    def store(self, df, num_bins, strategy, use_log_scale, result):
+        """Cache an ``analyze_distribution`` result computed elsewhere (e.g. on a worker thread)."""
+        self._results[(id(df), strategy, num_bins, use_log_scale)] = (df, result)
+
+    def get(self, df, num_bins=5, strategy="auto", use_log_scale=False, sketch=None):
+        """Return the binning of df['Value'], computing it only on the first request.
+
+        sketch, if given, is a ``QuantileSketch`` of df['Value'] that is
+        binned instead of the values.
+        """
+        result = self.lookup(df, num_bins, strategy, use_log_scale)
+        if result is None:
+            values = df['Value'].values if sketch is None else None
+            result = analyze_distribution(values, num_bins, strategy, use_log_scale, sketch)
+            self.store(df, num_bins, strategy, use_log_scale, result)
+        return result
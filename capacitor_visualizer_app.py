@@ -10,13 +10,90 @@ from mpl_toolkits.mplot3d import Axes3D
 import matplotlib.colors as mcolors
 import matplotlib.patches as mpatches
 import random
-from matplotlib.widgets import Button
-import threading
+from matplotlib.widgets import Button, RectangleSelector, LassoSelector
+import multiprocessing
 from matplotlib.cm import ScalarMappable
-from matplotlib.colors import Normalize, LinearSegmentedColormap, BoundaryNorm
+from matplotlib.colors import Normalize, LinearSegmentedColormap, BoundaryNorm, LogNorm
 import re
 import json
 import platform
+from proximity import ProximityCache, DEFAULT_THRESHOLD, edge_endpoints
+from spatial_index import SpatialIndex
+from rc_network import NodeGraph, ResistanceNetwork
+from outliers import find_outliers, edge_lengths
+from binning import BinningCache, analyze_distribution
+from quantile_sketch import read_csv_with_sketch
+from picking import ScreenPicker
+from projection import ProjectionCache, ValueLabels
+from name_index import NameIndex
+from filter_expr import FilterExpression, load_presets, save_presets
+from layers import layer_bounds, layer_key_range, plan_polylines, LayerIndex
+from jobs import JobRunner
+from dataset_cache import dataset_cache
+from dataset_diff import diff_datasets, name_column
+from density import grid_shape, midpoint_density, segment_density
+from rasterizer import RasterLayer
+from exporter import DEFAULT_EXPORT_DPI, DEFAULT_TILED_DPI, export_snapshot, export_tiled, snapshot_figure
+from mpl_toolkits.mplot3d.art3d import Line3DCollection
+from matplotlib.collections import LineCollection
+
+# Drawing reports progress (and checks for Cancel) every this many edges
+RENDER_PROGRESS_ROWS = 2000
+
+# Plan-view polylines hold at most this many edges; Agg rasterizes a few mid-sized paths fastest
+PLAN_POLYLINE_EDGES = 10000
+
+# Plan-view datasets with more edges than this are drawn without antialiasing, which is much faster in Agg
+PLAN_ANTIALIAS_MAX_EDGES = 200000
+
+# Relative value changes are colored up to this percentile of their magnitude
+DIFF_COLOR_PERCENTILE = 99
+
+# Attributes set by reset_layout_data, saved and restored when switching layout tabs
+LAYOUT_ATTRIBUTES = [
+    'data_df', 'resistor_df', 'proximity_threshold', 'proximity_caches', 'spatial_indexes',
+    'node_graph', 'resistance_network', 'elmore_cache', 'binning_caches', 'value_sketches',
+    'outlier_results', 'name_indexes', 'filter_expression', 'filter_masks', 'layers', 'layer_indexes',
+    'capacitance_min', 'capacitance_max', 'resistance_min', 'resistance_max'
+]
+
+# Attributes that refer to the drawn view, kept with a layout tab's figure contents while it is in the background
+VIEW_ATTRIBUTES = [
+    'ax', 'picker', 'line_objects', 'resistor_line_objects', 'layer_groups', 'density_image', 'raster_layer',
+    'projection', 'density_sources', 'legend_elements', 'color_ranges', 'resistance_color_ranges', 'bin_edges',
+    'resistance_bin_edges', 'legend_ax', 'plane_objects', 'search_overlay', 'proximity_overlay'
+]
+
+# Figure-level artist lists (besides the axes) moved along with a layout tab's view
+FIGURE_ARTIST_LISTS = ['texts', 'artists', 'lines', 'patches', 'images', 'legends']
+
+# Control variables that belong to a layout tab rather than to the whole app
+LAYOUT_VARIABLES = [
+    'file_path_var', 'resistor_file_path_var', 'show_capacitors_var', 'show_resistors_var',
+    'viz_type_var', 'color_scheme_var', 'num_bins_var', 'bin_strategy_var', 'line_width_var',
+    'marker_size_var', 'proximity_log_var', 'proximity_entry_var', 'proximity_overlay_var', 'raster_edges_var', 'raster_additive_var', 'plan_color_by_layer_var', 'density_weight_var', 'density_sampling_var', 'min_cap_var', 'max_cap_var', 'min_cap_entry_var', 'max_cap_entry_var',
+    'min_res_var', 'max_res_var', 'min_res_entry_var', 'max_res_entry_var', 'filter_expr_var',
+    'search_var', 'compare_file_path_var', 'layer_mode_var', 'layer_first_var', 'layer_last_var', 'show_nodes_var', 'show_values_var', 'show_z_planes_var',
+    'highlight_outliers_var', 'use_log_scale_var', 'node_color_mode_var', 'driver_node_var'
+]
+
+# Density view options
+DENSITY_WEIGHTS = ["Edge Count", "Capacitance"]
+DENSITY_SAMPLINGS = ["Midpoints", "Full Segments"]
+
+# Layer slicer modes
+LAYER_MODES = ["All Layers", "Single Layer", "Layer Range", "Via Level"]
+
+# log10 range of the proximity threshold slider; smaller thresholds can be typed in, larger ones are capped
+PROXIMITY_LOG_RANGE = (-5.0, 0.0)
+
+# Bin strategy labels shown in the UI and the binning engine strategy they select
+BIN_STRATEGY_OPTIONS = {
+    "Auto": "auto",
+    "Linear": "linear",
+    "Logarithmic": "log",
+    "Quantile": "quantile",
+}
 
 # Import visualization functionality
 try:
@@ -26,6 +103,11 @@ try:
 except ImportError:
     IMPORTED_MODULES = False
 
+def plan_segments(segments):
+    """X/Y part of (N, 2, 3) segments, for drawing on the plan view."""
+    segments = np.asarray(segments, dtype=float)
+    return segments[:, :, :2] if len(segments) > 0 else []
+
 class CapacitorVisualizerApp:
     def __init__(self, root, capacitor_file=None, resistor_file=None, highlight_outliers=False):
         """Initialize the application."""
@@ -76,6 +158,22 @@ class CapacitorVisualizerApp:
         
         # Create the visualization frame (on the right)
         self.viz_container = ttk.Frame(self.paned_window)
+        
+        # Layout tabs above the visualization, each with its own data and settings
+        layout_bar = ttk.Frame(self.viz_container)
+        layout_bar.pack(fill=tk.X, padx=5)
+        
+        close_layout_button = ttk.Button(layout_bar, text="Close Layout", command=self.close_layout)
+        close_layout_button.pack(side=tk.RIGHT)
+        
+        new_layout_button = ttk.Button(layout_bar, text="New Layout", command=self.add_layout)
+        new_layout_button.pack(side=tk.RIGHT, padx=5)
+        
+        self.layout_tabs = ttk.Notebook(layout_bar)
+        self.layout_tabs.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        self.layout_tabs.add(ttk.Frame(self.layout_tabs), text="Layout 1")
+        self.layout_tabs.bind("<<NotebookTabChanged>>", self.switch_layout)
+        
         self.viz_frame = ttk.LabelFrame(self.viz_container, text="Visualization")
         self.viz_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         
@@ -156,7 +254,15 @@ class CapacitorVisualizerApp:
         
         viz_advanced_radio = ttk.Radiobutton(viz_frame, text="Advanced", 
                                            variable=self.viz_type_var, value="Advanced")
-        viz_advanced_radio.pack(side=tk.LEFT)
+        viz_advanced_radio.pack(side=tk.LEFT, padx=(0, 10))
+        
+        viz_plan_radio = ttk.Radiobutton(viz_frame, text="Plan View", 
+                                       variable=self.viz_type_var, value="Plan View")
+        viz_plan_radio.pack(side=tk.LEFT, padx=(0, 10))
+        
+        viz_density_radio = ttk.Radiobutton(viz_frame, text="Density", 
+                                          variable=self.viz_type_var, value="Density")
+        viz_density_radio.pack(side=tk.LEFT)
         
         # Options frame
         options_frame = ttk.LabelFrame(self.control_frame, text="Visualization Options")
@@ -184,6 +290,18 @@ class CapacitorVisualizerApp:
                                  textvariable=self.num_bins_var)
         bins_spinbox.pack(side=tk.LEFT)
         
+        # Bin strategy for the color ranges
+        bin_strategy_frame = ttk.Frame(options_frame)
+        bin_strategy_frame.pack(fill=tk.X, padx=5, pady=5)
+        
+        bin_strategy_label = ttk.Label(bin_strategy_frame, text="Range Binning:")
+        bin_strategy_label.pack(side=tk.LEFT, padx=(0, 10))
+        
+        self.bin_strategy_var = tk.StringVar(value="Auto")
+        bin_strategy_combobox = ttk.Combobox(bin_strategy_frame, textvariable=self.bin_strategy_var, 
+                                           values=list(BIN_STRATEGY_OPTIONS), width=15, state="readonly")
+        bin_strategy_combobox.pack(side=tk.LEFT)
+        
         # Line width option
         line_width_frame = ttk.Frame(options_frame)
         line_width_frame.pack(fill=tk.X, padx=5, pady=5)
@@ -306,6 +424,249 @@ class CapacitorVisualizerApp:
                                            command=self.reset_resistance_filters)
         reset_res_filters_button.pack(pady=5)
         
+        # Filter expression over all component fields
+        expr_frame = ttk.LabelFrame(self.control_frame, text="Filter Expression")
+        expr_frame.pack(fill=tk.X, padx=5, pady=5)
+        
+        expr_hint = ttk.Label(expr_frame, text="e.g. value > 1e-3 and z in layer(2) and name ~ 'GateLine*'", 
+                            font=("Arial", 8))
+        expr_hint.pack(anchor=tk.W, padx=5)
+        
+        self.filter_expr_var = tk.StringVar()
+        expr_entry = ttk.Entry(expr_frame, textvariable=self.filter_expr_var)
+        expr_entry.pack(fill=tk.X, padx=5, pady=5)
+        expr_entry.bind("<Return>", self.apply_filter_expression)
+        
+        expr_button_frame = ttk.Frame(expr_frame)
+        expr_button_frame.pack(fill=tk.X, padx=5, pady=5)
+        
+        apply_expr_button = ttk.Button(expr_button_frame, text="Apply", command=self.apply_filter_expression)
+        apply_expr_button.pack(side=tk.LEFT)
+        
+        clear_expr_button = ttk.Button(expr_button_frame, text="Clear", command=self.clear_filter_expression)
+        clear_expr_button.pack(side=tk.LEFT, padx=(10, 0))
+        
+        # Saved expressions
+        preset_frame = ttk.Frame(expr_frame)
+        preset_frame.pack(fill=tk.X, padx=5, pady=5)
+        
+        preset_label = ttk.Label(preset_frame, text="Preset:")
+        preset_label.pack(side=tk.LEFT, padx=(0, 10))
+        
+        self.filter_presets = load_presets()
+        self.filter_preset_var = tk.StringVar()
+        self.filter_preset_combobox = ttk.Combobox(preset_frame, textvariable=self.filter_preset_var, 
+                                                   values=sorted(self.filter_presets), width=15)
+        self.filter_preset_combobox.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        self.filter_preset_combobox.bind("<<ComboboxSelected>>", self.load_filter_preset)
+        
+        save_preset_button = ttk.Button(preset_frame, text="Save", command=self.save_filter_preset)
+        save_preset_button.pack(side=tk.LEFT, padx=(5, 0))
+        
+        delete_preset_button = ttk.Button(preset_frame, text="Delete", command=self.delete_filter_preset)
+        delete_preset_button.pack(side=tk.LEFT, padx=(5, 0))
+        
+        # Effective resistance between two nodes
+        eff_res_frame = ttk.LabelFrame(self.control_frame, text="Effective Resistance")
+        eff_res_frame.pack(fill=tk.X, padx=5, pady=5)
+        
+        eff_res_hint = ttk.Label(eff_res_frame, text="Node: component name[:end] or x, y, z", 
+                               font=("Arial", 8))
+        eff_res_hint.pack(anchor=tk.W, padx=5)
+        
+        node_a_frame = ttk.Frame(eff_res_frame)
+        node_a_frame.pack(fill=tk.X, padx=5, pady=5)
+        
+        node_a_label = ttk.Label(node_a_frame, text="Node A:")
+        node_a_label.pack(side=tk.LEFT, padx=(0, 10))
+        
+        self.node_a_var = tk.StringVar()
+        node_a_entry = ttk.Entry(node_a_frame, textvariable=self.node_a_var, width=25)
+        node_a_entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        
+        node_b_frame = ttk.Frame(eff_res_frame)
+        node_b_frame.pack(fill=tk.X, padx=5, pady=5)
+        
+        node_b_label = ttk.Label(node_b_frame, text="Node B:")
+        node_b_label.pack(side=tk.LEFT, padx=(0, 10))
+        
+        self.node_b_var = tk.StringVar()
+        node_b_entry = ttk.Entry(node_b_frame, textvariable=self.node_b_var, width=25)
+        node_b_entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        
+        eff_res_button_frame = ttk.Frame(eff_res_frame)
+        eff_res_button_frame.pack(fill=tk.X, padx=5, pady=5)
+        
+        compute_eff_res_button = ttk.Button(eff_res_button_frame, text="Compute", 
+                                          command=self.compute_effective_resistance)
+        compute_eff_res_button.pack(side=tk.LEFT)
+        
+        self.eff_res_result_var = tk.StringVar(value="")
+        eff_res_result_label = ttk.Label(eff_res_button_frame, textvariable=self.eff_res_result_var)
+        eff_res_result_label.pack(side=tk.LEFT, padx=(10, 0))
+        
+        # Box and lasso selection of edges in the 3D view
+        selection_frame = ttk.LabelFrame(self.control_frame, text="Selection")
+        selection_frame.pack(fill=tk.X, padx=5, pady=5)
+        
+        selection_mode_frame = ttk.Frame(selection_frame)
+        selection_mode_frame.pack(fill=tk.X, padx=5, pady=5)
+        
+        selection_mode_label = ttk.Label(selection_mode_frame, text="Mouse Drag:")
+        selection_mode_label.pack(side=tk.LEFT, padx=(0, 10))
+        
+        self.selection_mode_var = tk.StringVar(value="Rotate")
+        selection_mode_combobox = ttk.Combobox(selection_mode_frame, textvariable=self.selection_mode_var, 
+                                             values=["Rotate", "Box Select", "Lasso Select"], 
+                                             width=15, state="readonly")
+        selection_mode_combobox.pack(side=tk.LEFT)
+        selection_mode_combobox.bind("<<ComboboxSelected>>", self.update_selection_tool)
+        
+        self.selection_summary_var = tk.StringVar(value="No selection")
+        selection_summary_label = ttk.Label(selection_frame, textvariable=self.selection_summary_var, 
+                                          justify=tk.LEFT, font=("Arial", 8))
+        selection_summary_label.pack(anchor=tk.W, padx=5)
+        
+        selection_button_frame = ttk.Frame(selection_frame)
+        selection_button_frame.pack(fill=tk.X, padx=5, pady=5)
+        
+        export_selection_button = ttk.Button(selection_button_frame, text="Export Selection", 
+                                           command=self.export_selection)
+        export_selection_button.pack(side=tk.LEFT)
+        
+        clear_selection_button = ttk.Button(selection_button_frame, text="Clear", 
+                                          command=self.clear_selection)
+        clear_selection_button.pack(side=tk.LEFT, padx=(10, 0))
+        
+        # Layer slicer showing one Z layer, a range of layers or one via level
+        layer_frame = ttk.LabelFrame(self.control_frame, text="Layer Slicer")
+        layer_frame.pack(fill=tk.X, padx=5, pady=5)
+        
+        layer_mode_frame = ttk.Frame(layer_frame)
+        layer_mode_frame.pack(fill=tk.X, padx=5, pady=5)
+        
+        layer_mode_label = ttk.Label(layer_mode_frame, text="Show:")
+        layer_mode_label.pack(side=tk.LEFT, padx=(0, 10))
+        
+        self.layer_mode_var = tk.StringVar(value=LAYER_MODES[0])
+        layer_mode_combobox = ttk.Combobox(layer_mode_frame, textvariable=self.layer_mode_var, 
+                                         values=LAYER_MODES, width=15, state="readonly")
+        layer_mode_combobox.pack(side=tk.LEFT)
+        layer_mode_combobox.bind("<<ComboboxSelected>>", self.apply_layer_slice)
+        
+        layer_number_frame = ttk.Frame(layer_frame)
+        layer_number_frame.pack(fill=tk.X, padx=5, pady=5)
+        
+        layer_first_label = ttk.Label(layer_number_frame, text="Layer:")
+        layer_first_label.pack(side=tk.LEFT, padx=(0, 10))
+        
+        self.layer_first_var = tk.IntVar(value=0)
+        self.layer_first_spinbox = ttk.Spinbox(layer_number_frame, from_=0, to=0, width=5, 
+                                             textvariable=self.layer_first_var, command=self.apply_layer_slice)
+        self.layer_first_spinbox.pack(side=tk.LEFT)
+        self.layer_first_spinbox.bind("<Return>", self.apply_layer_slice)
+        
+        layer_last_label = ttk.Label(layer_number_frame, text="to:")
+        layer_last_label.pack(side=tk.LEFT, padx=(10, 10))
+        
+        self.layer_last_var = tk.IntVar(value=0)
+        self.layer_last_spinbox = ttk.Spinbox(layer_number_frame, from_=0, to=0, width=5, 
+                                            textvariable=self.layer_last_var, command=self.apply_layer_slice)
+        self.layer_last_spinbox.pack(side=tk.LEFT)
+        self.layer_last_spinbox.bind("<Return>", self.apply_layer_slice)
+        
+        self.layer_info_var = tk.StringVar(value="")
+        layer_info_label = ttk.Label(layer_frame, textvariable=self.layer_info_var, 
+                                   justify=tk.LEFT, font=("Arial", 8))
+        layer_info_label.pack(anchor=tk.W, padx=5)
+        
+        # Proximity threshold of the close pair search, applied live in the advanced view
+        proximity_frame = ttk.LabelFrame(self.control_frame, text="Close Pairs (Advanced View)")
+        proximity_frame.pack(fill=tk.X, padx=5, pady=5)
+        
+        proximity_threshold_frame = ttk.Frame(proximity_frame)
+        proximity_threshold_frame.pack(fill=tk.X, padx=5, pady=5)
+        
+        proximity_threshold_label = ttk.Label(proximity_threshold_frame, text="Threshold:")
+        proximity_threshold_label.pack(side=tk.LEFT, padx=(0, 10))
+        
+        # The slider moves log10 of the threshold, so small and large distances are both reachable
+        self.proximity_log_var = tk.DoubleVar(value=np.log10(DEFAULT_THRESHOLD))
+        proximity_scale = ttk.Scale(proximity_threshold_frame, from_=PROXIMITY_LOG_RANGE[0], 
+                                  to=PROXIMITY_LOG_RANGE[1], orient=tk.HORIZONTAL, 
+                                  variable=self.proximity_log_var, length=150, 
+                                  command=self.on_proximity_slider_changed)
+        proximity_scale.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        
+        self.proximity_entry_var = tk.StringVar(value=f"{DEFAULT_THRESHOLD:.3g}")
+        proximity_entry = ttk.Entry(proximity_threshold_frame, textvariable=self.proximity_entry_var, width=9)
+        proximity_entry.pack(side=tk.LEFT, padx=(10, 0))
+        proximity_entry.bind("<Return>", self.on_proximity_entry_changed)
+        
+        self.proximity_overlay_var = tk.BooleanVar(value=False)
+        proximity_overlay_check = ttk.Checkbutton(proximity_frame, text="Highlight Close Pairs", 
+                                                variable=self.proximity_overlay_var, 
+                                                command=self.schedule_proximity_update)
+        proximity_overlay_check.pack(anchor=tk.W, padx=5)
+        
+        self.proximity_result_var = tk.StringVar(value="")
+        proximity_result_label = ttk.Label(proximity_frame, textvariable=self.proximity_result_var, 
+                                         justify=tk.LEFT, font=("Arial", 8))
+        proximity_result_label.pack(anchor=tk.W, padx=5)
+        
+        # Diff of the loaded data against another extraction of the same design
+        compare_frame = ttk.LabelFrame(self.control_frame, text="Compare Extractions")
+        compare_frame.pack(fill=tk.X, padx=5, pady=5)
+        
+        compare_hint = ttk.Label(compare_frame, text="Capacitor or resistor file to compare with the loaded one", 
+                               font=("Arial", 8))
+        compare_hint.pack(anchor=tk.W, padx=5)
+        
+        compare_file_frame = ttk.Frame(compare_frame)
+        compare_file_frame.pack(fill=tk.X, padx=5, pady=5)
+        
+        self.compare_file_path_var = tk.StringVar()
+        compare_file_entry = ttk.Entry(compare_file_frame, textvariable=self.compare_file_path_var, width=25)
+        compare_file_entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        
+        compare_browse_button = ttk.Button(compare_file_frame, text="Browse", command=self.browse_compare_file)
+        compare_browse_button.pack(side=tk.LEFT, padx=(10, 0))
+        
+        compare_button = ttk.Button(compare_frame, text="Show Diff", command=self.compare_extractions)
+        compare_button.pack(anchor=tk.W, padx=5, pady=(0, 5))
+        
+        self.diff_result_var = tk.StringVar(value="")
+        diff_result_label = ttk.Label(compare_frame, textvariable=self.diff_result_var, 
+                                    justify=tk.LEFT, font=("Arial", 8))
+        diff_result_label.pack(anchor=tk.W, padx=5)
+        
+        # Name search with highlighted matches
+        search_frame = ttk.LabelFrame(self.control_frame, text="Find Components")
+        search_frame.pack(fill=tk.X, padx=5, pady=5)
+        
+        search_hint = ttk.Label(search_frame, text="Name prefix or wildcard pattern (*, ?, [...])", 
+                              font=("Arial", 8))
+        search_hint.pack(anchor=tk.W, padx=5)
+        
+        search_entry_frame = ttk.Frame(search_frame)
+        search_entry_frame.pack(fill=tk.X, padx=5, pady=5)
+        
+        self.search_var = tk.StringVar()
+        search_entry = ttk.Entry(search_entry_frame, textvariable=self.search_var, width=25)
+        search_entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        search_entry.bind("<Return>", self.search_names)
+        
+        search_button = ttk.Button(search_entry_frame, text="Find", command=self.search_names)
+        search_button.pack(side=tk.LEFT, padx=(10, 0))
+        
+        clear_search_button = ttk.Button(search_entry_frame, text="Clear", command=self.clear_search)
+        clear_search_button.pack(side=tk.LEFT, padx=(5, 0))
+        
+        self.search_result_var = tk.StringVar(value="")
+        search_result_label = ttk.Label(search_frame, textvariable=self.search_result_var, 
+                                      justify=tk.LEFT, font=("Arial", 8))
+        search_result_label.pack(anchor=tk.W, padx=5)
+        
         # Display options
         display_frame = ttk.Frame(options_frame)
         display_frame.pack(fill=tk.X, padx=5, pady=5)
@@ -328,6 +689,55 @@ class CapacitorVisualizerApp:
                                             variable=self.show_z_planes_var)
         show_z_planes_check.pack(side=tk.LEFT, padx=(10, 0))
         
+        # Rasterized edges for very large files in the 3D views
+        raster_frame = ttk.Frame(options_frame)
+        raster_frame.pack(fill=tk.X, padx=5, pady=5)
+        
+        self.raster_edges_var = tk.BooleanVar(value=False)
+        raster_edges_check = ttk.Checkbutton(raster_frame, text="Rasterize Edges (millions)", 
+                                           variable=self.raster_edges_var)
+        raster_edges_check.pack(side=tk.LEFT, padx=(0, 10))
+        
+        self.raster_additive_var = tk.BooleanVar(value=False)
+        raster_additive_check = ttk.Checkbutton(raster_frame, text="Additive Blending", 
+                                              variable=self.raster_additive_var)
+        raster_additive_check.pack(side=tk.LEFT)
+        
+        # Plan view coloring option
+        plan_frame = ttk.Frame(options_frame)
+        plan_frame.pack(fill=tk.X, padx=5, pady=5)
+        
+        self.plan_color_by_layer_var = tk.BooleanVar(value=False)
+        plan_color_check = ttk.Checkbutton(plan_frame, text="Color Plan View by Layer", 
+                                         variable=self.plan_color_by_layer_var)
+        plan_color_check.pack(side=tk.LEFT)
+        
+        # Density view options
+        density_frame = ttk.Frame(options_frame)
+        density_frame.pack(fill=tk.X, padx=5, pady=5)
+        
+        density_label = ttk.Label(density_frame, text="Density:")
+        density_label.pack(side=tk.LEFT, padx=(0, 10))
+        
+        self.density_weight_var = tk.StringVar(value=DENSITY_WEIGHTS[0])
+        density_weight_combobox = ttk.Combobox(density_frame, textvariable=self.density_weight_var, 
+                                             values=DENSITY_WEIGHTS, width=12, state="readonly")
+        density_weight_combobox.pack(side=tk.LEFT, padx=(0, 10))
+        
+        self.density_sampling_var = tk.StringVar(value=DENSITY_SAMPLINGS[0])
+        density_sampling_combobox = ttk.Combobox(density_frame, textvariable=self.density_sampling_var, 
+                                               values=DENSITY_SAMPLINGS, width=12, state="readonly")
+        density_sampling_combobox.pack(side=tk.LEFT)
+        
+        # Highlight outliers option
+        outlier_frame = ttk.Frame(options_frame)
+        outlier_frame.pack(fill=tk.X, padx=5, pady=5)
+        
+        self.highlight_outliers_var = tk.BooleanVar(value=highlight_outliers)
+        highlight_outliers_check = ttk.Checkbutton(outlier_frame, text="Highlight Outliers (value/length)", 
+                                                 variable=self.highlight_outliers_var)
+        highlight_outliers_check.pack(side=tk.LEFT)
+        
         # Logarithmic scale option
         scale_frame = ttk.Frame(options_frame)
         scale_frame.pack(fill=tk.X, padx=5, pady=5)
@@ -337,6 +747,56 @@ class CapacitorVisualizerApp:
                                         variable=self.use_log_scale_var)
         log_scale_check.pack(side=tk.LEFT)
         
+        # Node coloring option
+        node_color_frame = ttk.Frame(options_frame)
+        node_color_frame.pack(fill=tk.X, padx=5, pady=5)
+        
+        node_color_label = ttk.Label(node_color_frame, text="Node Coloring:")
+        node_color_label.pack(side=tk.LEFT, padx=(0, 10))
+        
+        self.node_color_mode_var = tk.StringVar(value="None")
+        node_color_modes = ["None", "Total Capacitance", "Elmore Delay"]
+        node_color_combobox = ttk.Combobox(node_color_frame, textvariable=self.node_color_mode_var, 
+                                         values=node_color_modes, width=18, state="readonly")
+        node_color_combobox.pack(side=tk.LEFT)
+        
+        # Driver node for the Elmore delay map
+        driver_frame = ttk.Frame(options_frame)
+        driver_frame.pack(fill=tk.X, padx=5, pady=5)
+        
+        driver_label = ttk.Label(driver_frame, text="Delay Driver Node:")
+        driver_label.pack(side=tk.LEFT, padx=(0, 10))
+        
+        self.driver_node_var = tk.StringVar()
+        driver_entry = ttk.Entry(driver_frame, textvariable=self.driver_node_var, width=25)
+        driver_entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        
+        # Very large renders drawn tile by tile, for wall plots
+        large_render_frame = ttk.LabelFrame(self.control_frame, text="Large Render")
+        large_render_frame.pack(fill=tk.X, padx=5, pady=5)
+        
+        large_render_dpi_frame = ttk.Frame(large_render_frame)
+        large_render_dpi_frame.pack(fill=tk.X, padx=5, pady=5)
+        
+        large_render_dpi_label = ttk.Label(large_render_dpi_frame, text="DPI:")
+        large_render_dpi_label.pack(side=tk.LEFT, padx=(0, 10))
+        
+        self.large_render_dpi_var = tk.IntVar(value=DEFAULT_TILED_DPI)
+        large_render_dpi_spinbox = ttk.Spinbox(large_render_dpi_frame, from_=300, to=9600, increment=300, 
+                                             width=6, textvariable=self.large_render_dpi_var, 
+                                             command=self.update_large_render_info)
+        large_render_dpi_spinbox.pack(side=tk.LEFT)
+        large_render_dpi_spinbox.bind("<Return>", self.update_large_render_info)
+        
+        large_render_button = ttk.Button(large_render_dpi_frame, text="Save Large Render...", 
+                                       command=self.save_large_render)
+        large_render_button.pack(side=tk.LEFT, padx=(10, 0))
+        
+        self.large_render_info_var = tk.StringVar(value="")
+        large_render_info_label = ttk.Label(large_render_frame, textvariable=self.large_render_info_var, 
+                                          justify=tk.LEFT, font=("Arial", 8))
+        large_render_info_label.pack(anchor=tk.W, padx=5)
+        
         # Button frame
         button_frame = ttk.Frame(self.control_frame)
         button_frame.pack(fill=tk.X, padx=5, pady=10)
@@ -351,11 +811,25 @@ class CapacitorVisualizerApp:
                                command=self.save_visualization)
         save_button.pack(side=tk.LEFT, padx=5, fill=tk.X, expand=True)
         
-        # Status bar
+        # Status bar with job progress and a Cancel button
+        status_frame = ttk.Frame(self.root)
+        status_frame.pack(side=tk.BOTTOM, fill=tk.X)
+        
+        self.cancel_button = ttk.Button(status_frame, text="Cancel", command=self.cancel_job, 
+                                      state=tk.DISABLED)
+        self.cancel_button.pack(side=tk.RIGHT)
+        
+        self.progress_var = tk.DoubleVar(value=0.0)
+        progress_bar = ttk.Progressbar(status_frame, variable=self.progress_var, maximum=100, length=150)
+        progress_bar.pack(side=tk.RIGHT, padx=5)
+        
         self.status_var = tk.StringVar(value="Ready")
-        status_bar = ttk.Label(self.root, textvariable=self.status_var, 
+        status_bar = ttk.Label(status_frame, textvariable=self.status_var, 
                              relief=tk.SUNKEN, anchor=tk.W)
-        status_bar.pack(side=tk.BOTTOM, fill=tk.X)
+        status_bar.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        
+        # Long-running work (loading, analysis, drawing) runs as one cancelable job at a time
+        self.jobs = JobRunner(self.root, self.show_job_progress, self.job_finished)
         
         # Matplotlib figure and canvas
         self.fig = plt.figure(figsize=(10, 8))
@@ -367,12 +841,32 @@ class CapacitorVisualizerApp:
         self.toolbar = NavigationToolbar2Tk(self.canvas, self.viz_frame)
         self.toolbar.update()
         
+        # Hover tooltip and click picking of individual edges
+        self.picker = None
+        self.pick_press_xy = None
+        self.selector = None
+        self.selection = []  # (kind, selected rows) pairs
+        self.pick_tooltip = tk.Label(self.canvas.get_tk_widget(), bg='lightyellow', relief=tk.SOLID,
+                                     borderwidth=1, justify=tk.LEFT, font=('TkDefaultFont', 8))
+        self.canvas.mpl_connect('motion_notify_event', self.on_canvas_hover)
+        self.canvas.mpl_connect('button_press_event', self.on_canvas_press)
+        self.canvas.mpl_connect('button_release_event', self.on_canvas_release)
+        self.canvas.mpl_connect('figure_leave_event', lambda event: self.hide_pick_tooltip())
+        
+        # The size of a large render follows the size of the figure in the window
+        self.canvas.mpl_connect('resize_event', self.update_large_render_info)
+        self.update_large_render_info()
+        
         # Initialize variables
-        self.data_df = None
-        self.resistor_df = None
         self.ax = None
         self.line_objects = []
         self.resistor_line_objects = []
+        self.layer_groups = []  # (layer keys, {key: artists}) of each drawn dataset
+        self.density_image = None  # Heatmap of the density view, recomputed on zoom
+        self.raster_layer = None  # Image layer of rasterized edges in the 3D views
+        self.projection = None  # Screen coordinates of the current axes' points, per view
+        self.density_sources = []  # (spatial index, filter mask, layer keys, weights) of each dataset in the density view
+        self.density_update_pending = False
         self.colors = {}
         self.legend_elements = []
         self.color_ranges = []
@@ -381,16 +875,67 @@ class CapacitorVisualizerApp:
         self.resistance_bin_edges = []
         self.legend_ax = None
         self.plane_objects = []
+        self.search_overlay = None  # Collection name search matches are drawn in
+        self.proximity_overlay = None  # Collection close pairs are drawn in (advanced view)
+        self.proximity_update_pending = False
+        
+        # Data and analysis state of the active layout tab
+        self.reset_layout_data()
+        
+        # Layout tabs; the active layout's state lives in the attributes above
+        self.layouts = [None]
+        self.current_layout = 0
+        self.layouts_opened = 1  # Running count for naming new tabs
+        self.default_layout_variables = {name: getattr(self, name).get() for name in LAYOUT_VARIABLES}
+        
+        # Check if we have standalone mode
+        if not IMPORTED_MODULES:
+            self.include_visualization_functions()
+
+    def reset_layout_data(self):
+        """Set the data and analysis attributes of a layout to their empty state."""
+        self.data_df = None
+        self.resistor_df = None
+        
+        # Proximity results are cached per dataset so filter changes only mask them
+        self.proximity_threshold = DEFAULT_THRESHOLD
+        self.proximity_caches = {'capacitor': ProximityCache(), 'resistor': ProximityCache()}
+        
+        # Spatial indexes are built on first use and dropped when the data changes
+        self.spatial_indexes = {'capacitor': None, 'resistor': None}
+        
+        # Merged electrical nodes of both datasets, rebuilt when either one changes
+        self.node_graph = None
+        self.resistance_network = None
+        self.elmore_cache = None  # (driver node text, driver node, delays)
+        
+        # Binning results per dataset, keyed by the binning settings
+        self.binning_caches = {'capacitor': BinningCache(), 'resistor': BinningCache()}
+        
+        # Quantile sketches of the Value columns of large files, filled chunk by chunk while loading
+        self.value_sketches = {'capacitor': None, 'resistor': None}
+        
+        # Outlier flags per dataset, computed on first use
+        self.outlier_results = {'capacitor': None, 'resistor': None}
+        
+        # Sorted name indexes per dataset
+        self.name_indexes = {'capacitor': None, 'resistor': None}
+        
+        # Compiled filter expression (None when empty) and the Z layers it refers to
+        self.filter_expression = None
+        self.layers = None
+        
+        # Last filter mask per dataset with the data, layers and settings it was computed for
+        self.filter_masks = {'capacitor': None, 'resistor': None}
+        
+        # Edges of each dataset sorted by layer, built at load time for the layer slicer
+        self.layer_indexes = {'capacitor': None, 'resistor': None}
         
         # Store capacitance and resistance range
         self.capacitance_min = 0.0
         self.capacitance_max = 1.0
         self.resistance_min = 0.0
         self.resistance_max = 1.0
-        
-        # Check if we have standalone mode
-        if not IMPORTED_MODULES:
-            self.include_visualization_functions()
 
     def include_visualization_functions(self):
         """Include the necessary functions when running as standalone app."""
@@ -455,8 +1000,12 @@ class CapacitorVisualizerApp:
         
         if file_path:
             self.file_path_var.set(file_path)
-            self.load_data(file_path, "capacitor")
-            
+            self.load_data_async(file_path, "capacitor", self.load_matching_resistor_file)
+    
+    def load_matching_resistor_file(self):
+        """Load the resistor file next to the capacitor file, if there is one and none is loaded yet."""
+        file_path = self.file_path_var.get()
+        if file_path:
             # Try to find matching resistor file if not already loaded
             if not self.resistor_file_path_var.get():
                 # Parse path to look for resistor file in same directory
@@ -468,7 +1017,7 @@ class CapacitorVisualizerApp:
                 
                 if os.path.exists(resistor_filepath):
                     self.resistor_file_path_var.set(resistor_filepath)
-                    self.load_data(resistor_filepath, "resistor")
+                    self.load_data_async(resistor_filepath, "resistor")
     
     def browse_resistor_file(self):
         """Open a file dialog to select the resistor data file."""
@@ -479,8 +1028,12 @@ class CapacitorVisualizerApp:
         
         if file_path:
             self.resistor_file_path_var.set(file_path)
-            self.load_data(file_path, "resistor")
-            
+            self.load_data_async(file_path, "resistor", self.load_matching_capacitor_file)
+    
+    def load_matching_capacitor_file(self):
+        """Load the capacitor file next to the resistor file, if there is one and none is loaded yet."""
+        file_path = self.resistor_file_path_var.get()
+        if file_path:
             # Try to find matching capacitor file if not already loaded
             if not self.file_path_var.get():
                 # Parse path to look for capacitor file in same directory
@@ -492,7 +1045,7 @@ class CapacitorVisualizerApp:
                 
                 if os.path.exists(capacitor_filepath):
                     self.file_path_var.set(capacitor_filepath)
-                    self.load_data(capacitor_filepath, "capacitor")
+                    self.load_data_async(capacitor_filepath, "capacitor")
 
     def create_example_data(self):
         """Create example data files for testing."""
@@ -551,10 +1104,50 @@ Res10,0.15,0.15,0.0,0.25,0.25,0.02,63.2,Ohm
         self.load_data(cap_file_path, "capacitor")
         self.load_data(res_file_path, "resistor")
 
-    def load_data(self, file_path, data_type="capacitor"):
-        """Load and validate the data file for capacitors or resistors."""
+    def load_data_async(self, file_path, data_type="capacitor", on_loaded=None):
+        """Read a data file as a cancelable job, then validate and install it like ``load_data``.
+        
+        on_loaded is called after a successful load.
+        """
+        def read(job):
+            job.report(0.0, f"Loading {data_type} data...")
+            # Files already parsed (e.g. by another layout tab) come straight from the shared cache
+            return dataset_cache.get(file_path, lambda path: read_csv_with_sketch(
+                path, progress=lambda fraction: job.report(fraction, f"Loading {data_type} data...")))
+        
+        def loaded(data):
+            self.load_data(file_path, data_type, data)
+            df = self.data_df if data_type == "capacitor" else self.resistor_df
+            if df is not None and on_loaded is not None:
+                # Runs once this job has released the runner, so on_loaded may start another job
+                self.root.after(0, on_loaded)
+        
+        def failed(error):
+            self.status_var.set(f"Error loading {data_type} data: {str(error)}")
+            messagebox.showerror(f"{data_type.title()} Data Loading Error", str(error))
+        
+        self.start_job(f"Loading {os.path.basename(file_path)}", read, loaded, failed)
+
+    def load_data(self, file_path, data_type="capacitor", data=None):
+        """Load and validate the data file for capacitors or resistors.
+        
+        data, if given, is the (DataFrame, sketch) pair already read from file_path.
+        """
         try:
-            df = pd.read_csv(file_path)
+            df, sketch = data if data is not None else dataset_cache.get(file_path, read_csv_with_sketch)
+            self.value_sketches[data_type] = sketch if sketch is not None and sketch.count == len(df) else None
+            
+            # Cached results belong to the previous dataset
+            self.proximity_caches[data_type].clear()
+            self.spatial_indexes[data_type] = None
+            self.node_graph = None
+            self.resistance_network = None
+            self.elmore_cache = None
+            self.outlier_results[data_type] = None
+            self.name_indexes[data_type] = None
+            self.layers = None
+            self.layer_indexes = {'capacitor': None, 'resistor': None}
+            self.binning_caches[data_type].clear()
             
             if data_type == "capacitor":
                 self.data_df = df
@@ -612,6 +1205,9 @@ Res10,0.15,0.15,0.0,0.25,0.25,0.02,63.2,Ohm
                     self.min_res_entry_var.set(f"{self.resistance_min:.2e}")
                     self.max_res_entry_var.set(f"{self.resistance_max:.2e}")
             
+            self.index_layers()
+            self.update_layout_title()
+            
         except Exception as e:
             self.status_var.set(f"Error loading {data_type} data: {str(e)}")
             messagebox.showerror(f"{data_type.title()} Data Loading Error", str(e))
@@ -620,6 +1216,514 @@ Res10,0.15,0.15,0.0,0.25,0.25,0.02,63.2,Ohm
             else:
                 self.resistor_df = None
 
+    def capture_layout(self):
+        """Snapshot the data, settings and drawn view of the active layout tab.
+        
+        The view keeps the figure's axes and artists themselves, so switching
+        back to the tab re-attaches them instead of drawing the layout again.
+        """
+        figure = None
+        if self.ax is not None:
+            figure = (list(self.fig.axes), {name: list(getattr(self.fig, name)) for name in FIGURE_ARTIST_LISTS})
+        return {
+            'attributes': {name: getattr(self, name) for name in LAYOUT_ATTRIBUTES},
+            'variables': {name: getattr(self, name).get() for name in LAYOUT_VARIABLES},
+            'view': {name: getattr(self, name) for name in VIEW_ATTRIBUTES},
+            'figure': figure
+        }
+
+    def detach_figure(self):
+        """Empty the figure without clearing its axes, which a background layout tab may still hold."""
+        for ax in list(self.fig.axes):
+            self.fig.delaxes(ax)
+        self.fig.clear()
+
+    def restore_layout(self, layout):
+        """Make a captured layout (or a new empty one for None) the active one and show its view."""
+        self.detach_figure()
+        if layout is None:
+            self.reset_layout_data()
+            variables = self.default_layout_variables
+            figure = None
+        else:
+            for name, value in layout['attributes'].items():
+                setattr(self, name, value)
+            variables = layout['variables']
+            figure = layout['figure']
+        
+        if figure is not None:
+            for name, value in layout['view'].items():
+                setattr(self, name, value)
+        else:
+            self.ax = None
+            self.picker = None
+            self.search_overlay = None
+            self.proximity_overlay = None
+            self.layer_groups = []
+            self.density_image = None
+            self.raster_layer = None
+            self.projection = None
+        
+        # Slider ranges first, so restoring the values does not clip them
+        self.min_cap_scale.configure(from_=self.capacitance_min, to=self.capacitance_max)
+        self.max_cap_scale.configure(from_=self.capacitance_min, to=self.capacitance_max)
+        self.min_res_scale.configure(from_=self.resistance_min, to=self.resistance_max)
+        self.max_res_scale.configure(from_=self.resistance_min, to=self.resistance_max)
+        for name, value in variables.items():
+            getattr(self, name).set(value)
+        
+        self.clear_selection()
+        self.search_result_var.set("")
+        self.diff_result_var.set("")
+        self.eff_res_result_var.set("")
+        if self.data_df is not None or self.resistor_df is not None:
+            self.index_layers()
+        else:
+            self.layer_info_var.set("")
+        
+        # Put the tab's own axes and artists back, camera and all
+        if figure is not None:
+            axes, artists = figure
+            for ax in axes:
+                self.fig.add_axes(ax)
+            for name, items in artists.items():
+                getattr(self.fig, name).extend(items)
+        self.hide_pick_tooltip()
+        self.update_selection_tool()
+        self.toolbar.update()  # The navigation history belongs to the view being left
+        self.canvas.draw()
+
+    def switch_layout(self, event=None):
+        """Save the layout being left and activate the selected layout tab."""
+        index = self.layout_tabs.index("current")
+        if index == self.current_layout:
+            return
+        
+        # Results of a running job belong to the layout that started it
+        if self.jobs.busy:
+            messagebox.showinfo("Busy", f"Please wait for '{self.jobs.job.name}' to finish or cancel it.")
+            if self.current_layout is not None:
+                self.layout_tabs.select(self.current_layout)
+            return
+        
+        if self.current_layout is not None:
+            self.layouts[self.current_layout] = self.capture_layout()
+        self.current_layout = index
+        self.restore_layout(self.layouts[index])
+        self.status_var.set(f"Switched to {self.layout_tabs.tab(index, 'text')}")
+
+    def add_layout(self):
+        """Open a new, empty layout tab and switch to it."""
+        self.layouts.append(None)
+        self.layouts_opened += 1
+        self.layout_tabs.add(ttk.Frame(self.layout_tabs), text=f"Layout {self.layouts_opened}")
+        self.layout_tabs.select(len(self.layouts) - 1)
+
+    def close_layout(self):
+        """Close the active layout tab; its files stay in the shared dataset cache."""
+        if len(self.layouts) <= 1:
+            messagebox.showinfo("Close Layout", "The last layout cannot be closed.")
+            return
+        if self.jobs.busy:
+            messagebox.showinfo("Busy", f"Please wait for '{self.jobs.job.name}' to finish or cancel it.")
+            return
+        
+        index = self.current_layout
+        self.layouts.pop(index)
+        self.current_layout = None  # Nothing to save when the next tab is selected
+        self.layout_tabs.forget(index)
+        self.layout_tabs.select(min(index, len(self.layouts) - 1))
+        self.switch_layout()
+
+    def update_layout_title(self):
+        """Name the active layout tab after its data file."""
+        file_path = self.file_path_var.get() or self.resistor_file_path_var.get()
+        if file_path and self.current_layout is not None:
+            title = os.path.splitext(os.path.basename(file_path))[0]
+            for suffix in ("_capacitor_coordinates", "_resistor_coordinates"):
+                title = title.replace(suffix, "")
+            self.layout_tabs.tab(self.current_layout, text=title)
+
+    def get_layers(self):
+        """Return the Z layer bounds of all loaded data, computing them on first use."""
+        if self.layers is None:
+            self.layers = layer_bounds(self.data_df, self.resistor_df)
+        return self.layers
+
+    def index_layers(self):
+        """Cluster the Z values of the loaded data into layers and index the edges of each dataset by layer."""
+        layers = self.get_layers()
+        for data_type, df in [("capacitor", self.data_df), ("resistor", self.resistor_df)]:
+            if df is not None and self.layer_indexes[data_type] is None:
+                self.layer_indexes[data_type] = LayerIndex(df, layers)
+        
+        top = max(len(layers) - 1, 0)
+        self.layer_first_spinbox.configure(to=top)
+        self.layer_last_spinbox.configure(to=top)
+        self.layer_info_var.set(f"{len(layers)} layers found" if len(layers) else "")
+
+    def get_layer_index(self, data_type="capacitor"):
+        """Return the layer index of a dataset, building it on first use."""
+        if self.layer_indexes[data_type] is None:
+            self.index_layers()
+        return self.layer_indexes[data_type]
+
+    def rows_to_draw(self, df, cmap, norm, raster_sources):
+        """Rows of df to draw as individual line artists.
+        
+        With Rasterize Edges on, the rows are queued in raster_sources with their colors
+        instead, to be drawn together as one image layer, and no rows are returned.
+        """
+        if not self.raster_edges_var.get():
+            return df.iterrows()
+        raster_sources.append((df, cmap(norm(df['Value'].to_numpy(dtype=float)))))
+        return iter(())
+
+    def get_projection(self):
+        """Projection cache of the current axes, shared by picking, raster layers and value labels."""
+        if self.projection is None or self.projection.ax is not self.ax:
+            self.projection = ProjectionCache(self.ax)
+        return self.projection
+
+    def add_raster_layer(self, raster_sources):
+        """Draw the queued edges of all datasets as one raster image layer of the 3D axes."""
+        if not raster_sources:
+            return
+        self.raster_layer = RasterLayer(self.ax, self.get_projection(), 
+                                        [df for df, _ in raster_sources], 
+                                        np.concatenate([colors for _, colors in raster_sources]), 
+                                        linewidth=self.line_width_var.get(), 
+                                        additive=self.raster_additive_var.get())
+        self.ax.add_artist(self.raster_layer)
+
+    def add_value_labels(self, value_labels):
+        """Draw the queued (midpoint, text) value labels as one artist placed from the projection cache."""
+        if not value_labels:
+            return
+        self.ax.add_artist(ValueLabels(self.ax, self.get_projection(), 
+                                       np.array([point for point, _ in value_labels], dtype=float), 
+                                       [text for _, text in value_labels]))
+
+    def index_layer_artists(self, layer_sources):
+        """Draw the queued edges as one collection per layer key, so slicing only toggles whole groups.
+        
+        Each group is an array of artists: the edge collection of a layer key (and the
+        scatter of its end markers when nodes are shown) in the 3D views, one polyline
+        per color in the plan view (which builds its groups itself).
+        
+        Args:
+            layer_sources: List of (data_type, mask, edges, linestyle, marker) for each drawn
+                dataset, in the order of the picker sources, where edges are the
+                (segment, color) pairs of the mask's rows and marker is None without nodes
+        """
+        self.layer_groups = []
+        for data_type, mask, edges, linestyle, marker in layer_sources:
+            keys = self.get_layer_index(data_type).keys[mask]
+            if self.raster_layer is not None:
+                # Rasterized edges have no artists; the slicer masks the raster layer instead
+                self.layer_groups.append((keys, {}))
+                continue
+            segments = np.array([segment for segment, _ in edges], dtype=float).reshape(-1, 2, 3)
+            colors = np.array([color for _, color in edges], dtype=float).reshape(-1, 4)
+            
+            order = np.argsort(keys, kind='stable')
+            bounds = np.flatnonzero(np.diff(keys[order])) + 1
+            groups = {}
+            for group in np.split(order, bounds):
+                if len(group) == 0:
+                    continue
+                artists = [self.add_segment_collection(segments[group], colors=colors[group], 
+                                                       linewidths=self.line_width_var.get(), 
+                                                       linestyles=linestyle)]
+                if marker is not None:
+                    artists.append(self.scatter_points(segments[group].reshape(-1, 3), 
+                                                       c=np.repeat(colors[group], 2, axis=0), marker=marker, 
+                                                       s=self.marker_size_var.get() ** 2))
+                groups[int(keys[group[0]])] = np.empty(len(artists), dtype=object)
+                groups[int(keys[group[0]])][:] = artists
+            self.layer_groups.append((keys, groups))
+
+    def get_layer_key_range(self):
+        """Layer keys selected in the Layer Slicer, or None to show all layers."""
+        mode = self.layer_mode_var.get()
+        if mode == "All Layers":
+            return None
+        
+        num_layers = len(self.get_layers())
+        try:
+            first, last = self.layer_first_var.get(), self.layer_last_var.get()
+        except tk.TclError:
+            raise ValueError("Layer numbers must be whole numbers")
+        top = num_layers - (2 if mode == "Via Level" else 1)
+        for number in (first, last) if mode == "Layer Range" else (first,):
+            if not 0 <= number <= top:
+                raise ValueError(f"{mode} must be between 0 and {top}" if top >= 0 else 
+                                 f"The data has no {mode.lower()}s")
+        
+        if mode == "Single Layer":
+            return layer_key_range(first)
+        if mode == "Layer Range":
+            return layer_key_range(first, last)
+        return layer_key_range(first, via=True)
+
+    def apply_layer_slice(self, event=None, redraw=True):
+        """Show only the edges of the selected layers by toggling the precomputed artist groups."""
+        if self.data_df is None and self.resistor_df is None:
+            return
+        try:
+            key_range = self.get_layer_key_range()
+        except ValueError as e:
+            self.layer_info_var.set(str(e))
+            return
+        
+        in_slice = []
+        for keys, groups in self.layer_groups:
+            in_slice.append(np.ones(len(keys), dtype=bool) if key_range is None else 
+                            (keys >= key_range[0]) & (keys <= key_range[1]))
+            for key, artists in groups.items():
+                visible = key_range is None or key_range[0] <= key <= key_range[1]
+                # Only groups entering or leaving the slice are touched
+                if artists[0].get_visible() != visible:
+                    for artist in artists:
+                        artist.set_visible(visible)
+        shown = int(sum(np.count_nonzero(mask) for mask in in_slice))
+        
+        # Views without layer groups (e.g. the diff view) are not sliced
+        if self.picker is not None and self.layer_groups:
+            self.picker.set_visible(None if key_range is None else np.concatenate(in_slice))
+        
+        layers = self.get_layers()
+        if key_range is None:
+            self.layer_info_var.set(f"{len(layers)} layers, {shown} edges shown")
+        else:
+            low, high = layers[key_range[0] // 2, 0], layers[(key_range[1] + 1) // 2, 1]
+            self.layer_info_var.set(f"Z {low:.4g} to {high:.4g}: {shown} edges shown")
+        
+        if self.density_image is not None:
+            self.update_density(redraw=False)
+        if self.raster_layer is not None:
+            self.raster_layer.set_segment_mask(None if key_range is None else np.concatenate(in_slice))
+        
+        if redraw and self.ax is not None:
+            self.canvas.draw_idle()
+
+    def get_filter_mask(self, data_type="capacitor"):
+        """Boolean mask of the rows passing the value range filter and the filter expression.
+        
+        One draw asks for the mask several times (drawing, statistics, outliers, close
+        pairs), so the last mask is kept until the data, the value range or the
+        expression changes. The mask is read-only; copy it before changing it.
+        """
+        if data_type == "capacitor":
+            df, min_value, max_value = self.data_df, self.min_cap_var.get(), self.max_cap_var.get()
+        else:
+            df, min_value, max_value = self.resistor_df, self.min_res_var.get(), self.max_res_var.get()
+        
+        expression = self.filter_expression
+        layers = self.get_layers() if expression is not None else None
+        settings = (min_value, max_value, None if expression is None else expression.text)
+        cached = self.filter_masks[data_type]
+        if cached is None or cached[0] is not df or cached[1] is not layers or cached[2] != settings:
+            mask = ((df['Value'] >= min_value) & (df['Value'] <= max_value)).values
+            if expression is not None:
+                mask = mask & expression.evaluate(df, layers)
+            mask.flags.writeable = False
+            self.filter_masks[data_type] = cached = (df, layers, settings, mask)
+        return cached[3]
+
+    def apply_filter_expression(self, event=None):
+        """Compile the filter expression and redraw with it."""
+        text = self.filter_expr_var.get().strip()
+        if not text:
+            self.clear_filter_expression()
+            return
+        
+        try:
+            expression = FilterExpression(text)
+            # Evaluate once up front so unknown layers are reported here rather than mid-draw
+            for df in (self.data_df, self.resistor_df):
+                if df is not None:
+                    expression.evaluate(df, self.get_layers())
+        except ValueError as e:
+            self.status_var.set(str(e))
+            messagebox.showerror("Filter Expression", str(e))
+            return
+        
+        self.filter_expression = expression
+        self.status_var.set(f"Filter expression applied: {text}")
+        if self.data_df is not None or self.resistor_df is not None:
+            self.visualize()
+
+    def clear_filter_expression(self):
+        """Remove the filter expression and redraw."""
+        had_expression = self.filter_expression is not None
+        self.filter_expression = None
+        self.filter_expr_var.set("")
+        if had_expression and (self.data_df is not None or self.resistor_df is not None):
+            self.visualize()
+
+    def load_filter_preset(self, event=None):
+        """Put the selected preset into the expression box and apply it."""
+        text = self.filter_presets.get(self.filter_preset_var.get())
+        if text is not None:
+            self.filter_expr_var.set(text)
+            self.apply_filter_expression()
+
+    def save_filter_preset(self):
+        """Save the current expression under the name typed in the preset box."""
+        name = self.filter_preset_var.get().strip()
+        text = self.filter_expr_var.get().strip()
+        if not name or not text:
+            messagebox.showwarning("Save Preset", "Enter an expression and type a preset name first.")
+            return
+        
+        try:
+            FilterExpression(text)
+        except ValueError as e:
+            messagebox.showerror("Filter Expression", str(e))
+            return
+        
+        self.filter_presets[name] = text
+        self.write_filter_presets()
+        self.status_var.set(f"Saved filter preset '{name}'")
+
+    def delete_filter_preset(self):
+        """Delete the preset named in the preset box."""
+        name = self.filter_preset_var.get().strip()
+        if self.filter_presets.pop(name, None) is not None:
+            self.filter_preset_var.set("")
+            self.write_filter_presets()
+            self.status_var.set(f"Deleted filter preset '{name}'")
+
+    def write_filter_presets(self):
+        """Store the presets on disk and refresh the preset list."""
+        self.filter_preset_combobox.configure(values=sorted(self.filter_presets))
+        try:
+            save_presets(self.filter_presets)
+        except OSError as e:
+            self.status_var.set(f"Error saving filter presets: {str(e)}")
+            messagebox.showerror("Save Preset", str(e))
+
+    def get_spatial_index(self, data_type="capacitor"):
+        """Return the spatial index of the loaded capacitor or resistor data, building it on first use."""
+        df = self.data_df if data_type == "capacitor" else self.resistor_df
+        if df is None:
+            return None
+        
+        if self.spatial_indexes[data_type] is None:
+            self.spatial_indexes[data_type] = SpatialIndex.from_dataframe(df)
+        
+        return self.spatial_indexes[data_type]
+
+    def get_node_graph(self):
+        """Return the merged node graph of the loaded capacitor and resistor data, building it on first use."""
+        if self.data_df is None and self.resistor_df is None:
+            return None
+        
+        if self.node_graph is None:
+            self.node_graph = NodeGraph(self.data_df, self.resistor_df)
+        
+        return self.node_graph
+
+    def get_outliers(self, data_type="capacitor"):
+        """Return the outlier flags of the loaded capacitor or resistor data, computing them on first use."""
+        df = self.data_df if data_type == "capacitor" else self.resistor_df
+        if df is None:
+            return None
+        
+        if self.outlier_results[data_type] is None:
+            self.outlier_results[data_type] = find_outliers(df)
+        
+        return self.outlier_results[data_type]
+
+    def snapshot_rc_network(self):
+        """Return the (capacitor df, resistor df, node graph, resistor network) an RC query starts from (Tk thread)."""
+        return self.data_df, self.resistor_df, self.node_graph, self.resistance_network
+
+    @staticmethod
+    def solve_rc_network(job, snapshot, specs, solve):
+        """Resolve node specs and run an RC query on a worker thread, merging and factorizing as needed.
+        
+        Nothing shared with the Tk thread is modified; pass the returned snapshot
+        to ``install_rc_network``. The nodes are resolved before the network is
+        factorized, so a mistyped node is reported without waiting for it.
+        
+        Args:
+            job: Running ``Job``, checked for cancellation between the stages
+            snapshot: State from ``snapshot_rc_network``
+            specs: Node texts for ``NodeGraph.find_node``
+            solve: Function of (network, *nodes) returning the query result
+        
+        Returns:
+            Tuple (snapshot, error, nodes, result), where snapshot has the node
+            graph and network filled in as far as they were built and error is
+            the ``ValueError`` of an unknown node (then nodes and result are None).
+        """
+        data_df, resistor_df, node_graph, network = snapshot
+        if node_graph is None:
+            node_graph = NodeGraph(data_df, resistor_df)
+            node_graph.node_capacitance()
+            node_graph.components()
+        try:
+            nodes = [node_graph.find_node(spec) for spec in specs]
+        except ValueError as e:
+            return (data_df, resistor_df, node_graph, network), e, None, None
+        
+        job.check_cancelled()
+        if network is None:
+            network = ResistanceNetwork(node_graph)
+        job.check_cancelled()
+        return (data_df, resistor_df, node_graph, network), None, nodes, solve(network, *nodes)
+
+    def install_rc_network(self, snapshot):
+        """Keep the node graph and resistor network built by ``solve_rc_network`` (Tk thread).
+        
+        Returns:
+            Whether the snapshot's node graph is the current one; False when the
+            data was replaced or another graph was built in the meantime.
+        """
+        data_df, resistor_df, node_graph, network = snapshot
+        if data_df is not self.data_df or resistor_df is not self.resistor_df:
+            return False
+        if self.node_graph is None:
+            self.node_graph = node_graph
+        if self.node_graph is not node_graph:
+            return False
+        if self.resistance_network is None:
+            self.resistance_network = network
+        return True
+
+    def compute_effective_resistance(self):
+        """Compute the effective resistance between the nodes entered in Node A and Node B as a background job."""
+        if self.resistor_df is None:
+            messagebox.showwarning("No Data", "Please load a resistor data file first.")
+            return
+        
+        snapshot = self.snapshot_rc_network()
+        specs = (self.node_a_var.get(), self.node_b_var.get())
+        res_unit = self.resistor_df['Unit'].iloc[0] if 'Unit' in self.resistor_df.columns else ''
+        
+        def work(job):
+            job.report(0.0, "Merging nodes and factorizing the resistor network...")
+            return self.solve_rc_network(job, snapshot, specs, ResistanceNetwork.effective_resistance)
+        
+        def done(result):
+            rc_snapshot, error, nodes, resistance = result
+            self.install_rc_network(rc_snapshot)
+            if error is not None:
+                self.eff_res_result_var.set("")
+                self.status_var.set(str(error))
+                messagebox.showerror("Node Error", str(error))
+            elif np.isinf(resistance):
+                self.eff_res_result_var.set("Not connected")
+                self.status_var.set("The two nodes are not connected through resistors")
+            else:
+                node_a, node_b = nodes
+                self.eff_res_result_var.set(f"{resistance:.4e} {res_unit}")
+                self.status_var.set(f"Effective resistance between nodes {node_a} and {node_b}: {resistance:.4e} {res_unit}")
+        
+        self.start_job("Effective resistance", work, done)
+
     def update_min_capacitance(self, _=None):
         """Update the min capacitance filter value label and constrain max slider."""
         value = self.min_cap_var.get()
@@ -704,44 +1808,23 @@ Res10,0.15,0.15,0.0,0.25,0.25,0.02,63.2,Ohm
 
     def analyze_capacitance_distribution(self, df):
         """Analyze the distribution of capacitance values and create suitable ranges."""
-        values = df['Value'].values
-        
-        # Get basic statistics
-        min_val = np.min(values)
-        max_val = np.max(values)
-        mean_val = np.mean(values)
-        median_val = np.median(values)
-        
-        self.status_var.set(f"Capacitance range: {min_val:.6e} to {max_val:.6e}")
-        
-        # Get number of bins from UI
-        num_bins = self.num_bins_var.get()
-        
-        # If the range is very large (several orders of magnitude) or log scale is selected, use logarithmic bins
-        if self.use_log_scale_var.get() or max_val / (min_val + 1e-10) > 100:
-            # Ensure min_val is positive for log scale
-            log_min = np.log10(max(min_val, 1e-15))
-            log_max = np.log10(max_val)
-            bins = np.logspace(log_min, log_max, num_bins+1)
-        else:
-            # Otherwise use equal width bins
-            bins = np.linspace(min_val, max_val, num_bins+1)
-        
-        # Count the number of values in each bin
-        hist, bin_edges = np.histogram(values, bins=bins)
-        
-        # Create color ranges
-        color_ranges = []
-        for i in range(len(hist)):
-            color_ranges.append({
-                'min': bin_edges[i],
-                'max': bin_edges[i+1],
-                'label': f"{bin_edges[i]:.3e} - {bin_edges[i+1]:.3e}",
-                'count': hist[i],
-                'percentage': hist[i]/len(values)*100
-            })
-        
-        return color_ranges, bin_edges
+        distribution = self.get_value_distribution(df, "capacitor")
+        self.status_var.set(f"Capacitance range: {distribution['min']:.6e} to {distribution['max']:.6e}")
+        return distribution['color_ranges'], distribution['bin_edges']
+
+    def binning_settings(self):
+        """Current (number of bins, bin strategy, log scale) settings."""
+        return (self.num_bins_var.get(), BIN_STRATEGY_OPTIONS[self.bin_strategy_var.get()], 
+                self.use_log_scale_var.get())
+
+    def get_value_distribution(self, df, data_type="capacitor"):
+        """Return the cached binning of df for the current binning settings."""
+        num_bins, strategy, use_log_scale = self.binning_settings()
+        
+        # The load-time sketch only describes the full dataset, not a filtered subset
+        loaded_df = self.data_df if data_type == "capacitor" else self.resistor_df
+        sketch = self.value_sketches[data_type] if df is loaded_df else None
+        return self.binning_caches[data_type].get(df, num_bins, strategy, use_log_scale, sketch)
 
     def get_color_for_value(self, value, norm, cmap):
         """Get a color for a specific capacitance value using the colormap."""
@@ -758,10 +1841,22 @@ Res10,0.15,0.15,0.0,0.25,0.25,0.02,63.2,Ohm
         self.ax = self.fig.add_subplot(111, projection='3d')
         
         # Reset collections and colors
+        self.picker = None
+        self.search_overlay = None
+        self.proximity_overlay = None
+        self.hide_pick_tooltip()
+        self.clear_selection()
+        self.layer_groups = []
+        self.density_image = None
+        self.raster_layer = None
         self.line_objects = []
         self.resistor_line_objects = []
         self.legend_elements = []
         self.plane_objects = []
+        pick_sources = []
+        layer_sources = []  # (data_type, drawn rows mask, line artists) for the layer slicer
+        raster_sources = []  # (rows, colors) drawn as one raster layer with Rasterize Edges
+        value_labels = []  # (midpoint, text) of each edge labeled with its value
         
         # Set global plot limits
         x_min, x_max = float('inf'), float('-inf')
@@ -783,9 +1878,8 @@ Res10,0.15,0.15,0.0,0.25,0.25,0.02,63.2,Ohm
             df = self.data_df
             
             # Apply capacitance filters
-            min_cap = self.min_cap_var.get()
-            max_cap = self.max_cap_var.get()
-            filtered_df = df[(df['Value'] >= min_cap) & (df['Value'] <= max_cap)]
+            cap_mask = self.get_filter_mask("capacitor")
+            filtered_df = df[cap_mask]
             
             if len(filtered_df) == 0:
                 messagebox.showwarning("No Data", "No capacitors match the current filter range.")
@@ -810,7 +1904,10 @@ Res10,0.15,0.15,0.0,0.25,0.25,0.02,63.2,Ohm
                 cap_norm = BoundaryNorm(self.bin_edges, cap_cmap.N)
         
                 # Plot each capacitor as an edge between start and end nodes
-                for _, row in filtered_df.iterrows():
+                for row_number, (_, row) in enumerate(self.rows_to_draw(filtered_df, cap_cmap, cap_norm, raster_sources)):
+                    if row_number % RENDER_PROGRESS_ROWS == 0:
+                        self.report_render_progress(row_number, len(filtered_df), "capacitors")
+                    
                     # Get node coordinates
                     capacitor_name = row['Capacitor_Name']
                     start_x, start_y, start_z = row['Start_X'], row['Start_Y'], row['Start_Z']
@@ -820,27 +1917,18 @@ Res10,0.15,0.15,0.0,0.25,0.25,0.02,63.2,Ohm
                     value = row['Value']
                     color = self.get_color_for_value(value, cap_norm, cap_cmap)
                     
-                    # Plot the edge as a line with optional markers
-                    if self.show_nodes_var.get():
-                        line, = self.ax.plot([start_x, end_x], [start_y, end_y], [start_z, end_z], 
-                                         color=color, linewidth=self.line_width_var.get(), 
-                                         marker='o', markersize=self.marker_size_var.get())
-                    else:
-                        line, = self.ax.plot([start_x, end_x], [start_y, end_y], [start_z, end_z], 
-                                         color=color, linewidth=self.line_width_var.get())
-                    
-                    self.line_objects.append(line)
+                    # Queue the edge; index_layer_artists draws each layer's edges as one collection
+                    self.line_objects.append((((start_x, start_y, start_z), (end_x, end_y, end_z)), color))
                     
                     # Show capacitance values if enabled
                     if self.show_values_var.get():
-                        # Calculate midpoint of the edge
-                        mid_x = (start_x + end_x) / 2
-                        mid_y = (start_y + end_y) / 2
-                        mid_z = (start_z + end_z) / 2
-                        
-                        # Add text with capacitance value
-                        self.ax.text(mid_x, mid_y, mid_z, f"{row['Value']:.3e}", 
-                                 color='black', fontsize=7, ha='center', va='center')
+                        # Label the midpoint of the edge with its capacitance value
+                        value_labels.append((((start_x + end_x) / 2, (start_y + end_y) / 2, (start_z + end_z) / 2), 
+                                             f"{row['Value']:.3e}"))
+                
+                pick_sources.append(("Capacitor", filtered_df, 'Capacitor_Name'))
+                layer_sources.append(("capacitor", cap_mask, self.line_objects, '-', 
+                                      'o' if self.show_nodes_var.get() else None))
             
                 # Create capacitor legend items
                 cap_unit = df['Unit'].iloc[0] if 'Unit' in df.columns else 'unknown unit'
@@ -862,9 +1950,8 @@ Res10,0.15,0.15,0.0,0.25,0.25,0.02,63.2,Ohm
             res_df = self.resistor_df
             
             # Apply resistance filters
-            min_res = self.min_res_var.get()
-            max_res = self.max_res_var.get()
-            filtered_res_df = res_df[(res_df['Value'] >= min_res) & (res_df['Value'] <= max_res)]
+            res_mask = self.get_filter_mask("resistor")
+            filtered_res_df = res_df[res_mask]
             
             if len(filtered_res_df) == 0:
                 messagebox.showwarning("No Data", "No resistors match the current filter range.")
@@ -889,7 +1976,10 @@ Res10,0.15,0.15,0.0,0.25,0.25,0.02,63.2,Ohm
                 res_norm = BoundaryNorm(self.resistance_bin_edges, res_cmap.N)
                 
                 # Plot each resistor as an edge between start and end nodes
-                for _, row in filtered_res_df.iterrows():
+                for row_number, (_, row) in enumerate(self.rows_to_draw(filtered_res_df, res_cmap, res_norm, raster_sources)):
+                    if row_number % RENDER_PROGRESS_ROWS == 0:
+                        self.report_render_progress(row_number, len(filtered_res_df), "resistors")
+                    
                     # Get node coordinates
                     resistor_name = row['Resistor_Name']
                     start_x, start_y, start_z = row['Start_X'], row['Start_Y'], row['Start_Z']
@@ -899,29 +1989,18 @@ Res10,0.15,0.15,0.0,0.25,0.25,0.02,63.2,Ohm
                     value = row['Value']
                     color = self.get_color_for_value(value, res_norm, res_cmap)
                     
-                    # Plot the edge as a line with optional markers
-                    if self.show_nodes_var.get():
-                        line, = self.ax.plot([start_x, end_x], [start_y, end_y], [start_z, end_z], 
-                                         color=color, linewidth=self.line_width_var.get(), 
-                                         marker='s', markersize=self.marker_size_var.get(),
-                                         linestyle='--')  # Dashed line for resistors
-                    else:
-                        line, = self.ax.plot([start_x, end_x], [start_y, end_y], [start_z, end_z], 
-                                         color=color, linewidth=self.line_width_var.get(),
-                                         linestyle='--')  # Dashed line for resistors
-                    
-                    self.resistor_line_objects.append(line)
+                    # Queue the edge; index_layer_artists draws each layer's edges as one collection
+                    self.resistor_line_objects.append((((start_x, start_y, start_z), (end_x, end_y, end_z)), color))
         
                     # Show resistance values if enabled
                     if self.show_values_var.get():
-                        # Calculate midpoint of the edge
-                        mid_x = (start_x + end_x) / 2
-                        mid_y = (start_y + end_y) / 2
-                        mid_z = (start_z + end_z) / 2
-                        
-                        # Add text with resistance value
-                        self.ax.text(mid_x, mid_y, mid_z, f"{row['Value']:.1f}", 
-                                 color='black', fontsize=7, ha='center', va='center')
+                        # Label the midpoint of the edge with its resistance value
+                        value_labels.append((((start_x + end_x) / 2, (start_y + end_y) / 2, (start_z + end_z) / 2), 
+                                             f"{row['Value']:.1f}"))
+                
+                pick_sources.append(("Resistor", filtered_res_df, 'Resistor_Name'))
+                layer_sources.append(("resistor", res_mask, self.resistor_line_objects, '--',  # Dashed line for resistors
+                                      's' if self.show_nodes_var.get() else None))
         
                 # Create resistor legend items
                 res_unit = res_df['Unit'].iloc[0] if 'Unit' in res_df.columns else 'unknown unit'
@@ -1006,6 +2085,11 @@ Res10,0.15,0.15,0.0,0.25,0.25,0.02,63.2,Ohm
         elif res_filename:
             self.ax.set_title(f'Component Visualization: {res_filename}', fontsize=10)
         
+        # Draw merged nodes colored by the selected node quantity
+        node_overlay_text = self.draw_node_overlay()
+        node_overlay_text += self.draw_outlier_overlay()
+        self.draw_search_overlay()
+        
         # Create dedicated legend axes on the bottom right corner
         self.legend_ax = self.fig.add_axes([0.70, 0.05, 0.25, 0.20])  # Smaller height
         self.legend_ax.axis('off')  # Hide axes
@@ -1018,8 +2102,7 @@ Res10,0.15,0.15,0.0,0.25,0.25,0.02,63.2,Ohm
         stats_text = "Component Statistics:\n"
         
         if self.data_df is not None and self.show_capacitors_var.get():
-            filtered_count = len(self.data_df[(self.data_df['Value'] >= self.min_cap_var.get()) & 
-                                           (self.data_df['Value'] <= self.max_cap_var.get())])
+            filtered_count = int(self.get_filter_mask("capacitor").sum())
             total_count = len(self.data_df)
             cap_unit = self.data_df['Unit'].iloc[0] if 'Unit' in self.data_df.columns else 'unknown unit'
             
@@ -1030,8 +2113,7 @@ Res10,0.15,0.15,0.0,0.25,0.25,0.02,63.2,Ohm
             )
         
         if self.resistor_df is not None and self.show_resistors_var.get():
-            filtered_res_count = len(self.resistor_df[(self.resistor_df['Value'] >= self.min_res_var.get()) & 
-                                                   (self.resistor_df['Value'] <= self.max_res_var.get())])
+            filtered_res_count = int(self.get_filter_mask("resistor").sum())
             total_res_count = len(self.resistor_df)
             res_unit = self.resistor_df['Unit'].iloc[0] if 'Unit' in self.resistor_df.columns else 'unknown unit'
             
@@ -1041,6 +2123,9 @@ Res10,0.15,0.15,0.0,0.25,0.25,0.02,63.2,Ohm
                 f"Range: {self.resistor_df['Value'].min():.2e} - {self.resistor_df['Value'].max():.2e} {res_unit}\n"
             )
         
+        if self.filter_expression is not None:
+            stats_text += f"Expression: {self.filter_expression.text}\n"
+        
         # Add Z levels information if planes are shown
         if self.show_z_planes_var.get() and hasattr(self, 'z_levels_count') and self.z_levels_count > 0:
             stats_text += f"\nZ Levels: {self.z_levels_count}\n"
@@ -1049,64 +2134,706 @@ Res10,0.15,0.15,0.0,0.25,0.25,0.02,63.2,Ohm
             else:
                 stats_text += f"Range: {self.z_levels.min():.4f} to {self.z_levels.max():.4f}"
         
+        stats_text += node_overlay_text
+        
         self.fig.text(0.02, 0.02, stats_text, ha='left', fontsize='x-small')
         
         # Maximize the visualization area
         plt.subplots_adjust(left=0.02, right=0.98, top=0.95, bottom=0.15)
+        self.add_raster_layer(raster_sources)
+        self.add_value_labels(value_labels)
+        self.index_layer_artists(layer_sources)
+        self.picker = ScreenPicker(self.ax, pick_sources, self.get_projection())
+        self.apply_layer_slice(redraw=False)
+        self.update_selection_tool()
         self.canvas.draw()
         
         comp_count_text = []
         if self.data_df is not None and self.show_capacitors_var.get():
-            filtered_count = len(self.data_df[(self.data_df['Value'] >= self.min_cap_var.get()) & 
-                                           (self.data_df['Value'] <= self.max_cap_var.get())])
+            filtered_count = int(self.get_filter_mask("capacitor").sum())
             comp_count_text.append(f"{filtered_count} capacitors")
         if self.resistor_df is not None and self.show_resistors_var.get():
-            filtered_res_count = len(self.resistor_df[(self.resistor_df['Value'] >= self.min_res_var.get()) & 
-                                                   (self.resistor_df['Value'] <= self.max_res_var.get())])
+            filtered_res_count = int(self.get_filter_mask("resistor").sum())
             comp_count_text.append(f"{filtered_res_count} resistors")
             
         self.status_var.set(f"Visualization created with {' and '.join(comp_count_text)}")
 
-    def analyze_resistance_distribution(self, df):
-        """Analyze the distribution of resistance values and create suitable ranges."""
-        values = df['Value'].values
+    def visualize_plan(self):
+        """Top-down plan view drawing the X/Y extent of every edge in 2D.
+        
+        Edges sharing a layer key and a color are drawn as NaN-separated polylines of up to
+        ``PLAN_POLYLINE_EDGES`` edges, so a million edges make about a hundred artists; 2D paths draw far faster than mplot3d and are
+        clipped to the visible area, which keeps pan and zoom (toolbar) interactive. Groups
+        are stacked bottom to top, so upper layers cover the ones below, and the Layer Slicer
+        shows and hides them.
+        """
+        if self.data_df is None and self.resistor_df is None:
+            messagebox.showwarning("No Data", "Please load at least one data file (capacitor or resistor).")
+            return
+        
+        # Clear previous plot
+        self.fig.clear()
+        self.ax = self.fig.add_subplot(111)
+        
+        # Reset collections and colors
+        self.picker = None
+        self.search_overlay = None
+        self.proximity_overlay = None
+        self.hide_pick_tooltip()
+        self.clear_selection()
+        self.layer_groups = []
+        self.density_image = None
+        self.raster_layer = None
+        self.line_objects = []
+        self.resistor_line_objects = []
+        self.legend_elements = []
+        self.plane_objects = []
+        pick_sources = []
+        
+        layers = self.get_layers()
+        color_by_layer = self.plan_color_by_layer_var.get()
+        layer_cmap = plt.get_cmap('tab20')  # Layer n in a dark shade, the vias above it in the light one
+        num_keys = 2 * max(len(layers), 1)
+        
+        components = [
+            ("capacitor", self.data_df, 'Capacitor_Name', "Capacitor", '-', self.show_capacitors_var.get()),
+            ("resistor", self.resistor_df, 'Resistor_Name', "Resistor", '--', self.show_resistors_var.get()),
+        ]
+        counts = []
+        for data_type, df, name_col, label, linestyle, show in components:
+            if df is None or not show:
+                continue
+            
+            mask = self.get_filter_mask(data_type)
+            filtered_df = df[mask]
+            if len(filtered_df) == 0:
+                messagebox.showwarning("No Data", f"No {data_type}s match the current filter range.")
+                continue
+            
+            starts, ends = edge_endpoints(filtered_df)
+            keys = self.get_layer_index(data_type).keys[mask]
+            
+            if color_by_layer:
+                palette = layer_cmap
+                color_ids = keys % layer_cmap.N
+            else:
+                if data_type == "capacitor":
+                    color_ranges, bin_edges = self.analyze_capacitance_distribution(df)
+                else:
+                    color_ranges, bin_edges = self.analyze_resistance_distribution(df)
+                cmap = plt.get_cmap(self.color_scheme_var.get())
+                norm = BoundaryNorm(bin_edges, cmap.N)
+                palette = cmap
+                color_ids = np.ma.filled(norm(filtered_df['Value'].to_numpy(dtype=float)), 0).astype(int)
+                
+                short_label = "Cap" if data_type == "capacitor" else "Res"
+                for range_info in color_ranges:
+                    mid_val = (range_info['min'] + range_info['max']) / 2
+                    self.legend_elements.append(mpatches.Patch(
+                        color=self.get_color_for_value(mid_val, norm, cmap), 
+                        label=f"{short_label}: {range_info['label']} ({range_info['count']})"))
+            
+            # One polyline per (layer key, color), stacked bottom to top
+            groups = {}
+            for key, color_id, polyline in plan_polylines(starts, ends, keys, color_ids, palette.N, PLAN_POLYLINE_EDGES):
+                line, = self.ax.plot(polyline[:, 0], polyline[:, 1], color=palette(color_id), 
+                                     linewidth=self.line_width_var.get(), linestyle=linestyle, 
+                                     antialiased=len(keys) <= PLAN_ANTIALIAS_MAX_EDGES, 
+                                     zorder=2 + key / num_keys)
+                groups.setdefault(key, []).append(line)
+            self.layer_groups.append((keys, {key: np.array(lines, dtype=object) for key, lines in groups.items()}))
+            
+            pick_sources.append((label, filtered_df, name_col))
+            counts.append(f"{len(filtered_df)} {data_type}s")
+        
+        if color_by_layer:
+            drawn_layers = np.unique(np.concatenate([keys for keys, _ in self.layer_groups]) // 2) if self.layer_groups else []
+            for layer in drawn_layers:
+                self.legend_elements.append(mpatches.Patch(color=layer_cmap((2 * layer) % layer_cmap.N), 
+                                                           label=f"Layer {layer} (Z {layers[layer, 0]:.3g})"))
+        
+        self.ax.autoscale_view()
+        self.ax.set_aspect('equal', adjustable='box')
+        self.ax.set_xlabel('X')
+        self.ax.set_ylabel('Y')
+        
+        cap_filename = os.path.basename(self.file_path_var.get()) if self.file_path_var.get() else ""
+        res_filename = os.path.basename(self.resistor_file_path_var.get()) if self.resistor_file_path_var.get() else ""
+        self.ax.set_title(f"Plan View: {' & '.join(name for name in (cap_filename, res_filename) if name)}", fontsize=10)
+        
+        overlay_text = self.draw_node_overlay()
+        overlay_text += self.draw_outlier_overlay()
+        self.draw_search_overlay()
+        
+        if self.legend_elements:
+            self.ax.legend(handles=self.legend_elements, loc='upper left', bbox_to_anchor=(1.02, 1), fontsize='x-small')
+        
+        stats_text = f"Plan View: {' and '.join(counts)}, {len(layers)} layers"
+        if self.filter_expression is not None:
+            stats_text += f"\nExpression: {self.filter_expression.text}"
+        self.fig.text(0.02, 0.02, stats_text + overlay_text, ha='left', fontsize='x-small')
+        
+        self.picker = ScreenPicker(self.ax, pick_sources, self.get_projection())
+        self.apply_layer_slice(redraw=False)
+        self.update_selection_tool()
+        self.canvas.draw()
+        
+        self.status_var.set(f"Plan view created with {' and '.join(counts)}")
+
+    def visualize_density(self):
+        """Plan-view heatmap of edge density, for edge counts at which individual lines become unreadable.
+        
+        Edge midpoints (or whole segments) are accumulated into a grid over the visible
+        extent, counting edges or summing their capacitance, and shown with ``imshow``.
+        Zooming or panning recomputes the grid for the new extent only, so detail grows
+        as you zoom in; the Layer Slicer restricts it to the selected layers.
+        """
+        if self.data_df is None and self.resistor_df is None:
+            messagebox.showwarning("No Data", "Please load at least one data file (capacitor or resistor).")
+            return
+        
+        # Clear previous plot
+        self.fig.clear()
+        self.ax = self.fig.add_subplot(111)
+        
+        # Reset collections and colors
+        self.picker = None
+        self.search_overlay = None
+        self.proximity_overlay = None
+        self.hide_pick_tooltip()
+        self.clear_selection()
+        self.layer_groups = []
+        self.density_image = None
+        self.raster_layer = None
+        self.density_sources = []
+        self.line_objects = []
+        self.resistor_line_objects = []
+        self.legend_elements = []
+        self.plane_objects = []
+        pick_sources = []
+        
+        # Capacitance weights only make sense for capacitors
+        weighted = self.density_weight_var.get() == "Capacitance"
+        components = [
+            ("capacitor", self.data_df, 'Capacitor_Name', "Capacitor", self.show_capacitors_var.get()),
+            ("resistor", self.resistor_df, 'Resistor_Name', "Resistor", self.show_resistors_var.get() and not weighted),
+        ]
+        counts = []
+        for data_type, df, name_col, label, show in components:
+            if df is None or not show:
+                continue
+            
+            mask = self.get_filter_mask(data_type)
+            filtered_df = df[mask]
+            if len(filtered_df) == 0:
+                messagebox.showwarning("No Data", f"No {data_type}s match the current filter range.")
+                continue
+            
+            keys = self.get_layer_index(data_type).keys
+            weights = df['Value'].to_numpy(dtype=float) if weighted else None
+            self.density_sources.append((self.get_spatial_index(data_type), mask, keys, weights))
+            self.layer_groups.append((keys[mask], {}))  # For the slicer counts and the picker visibility
+            pick_sources.append((label, filtered_df, name_col))
+            counts.append(f"{len(filtered_df)} {data_type}s")
+        
+        if not self.density_sources:
+            if weighted and self.data_df is None:
+                messagebox.showwarning("No Data", "Capacitance density needs a capacitor data file.")
+            self.canvas.draw()
+            return
+        
+        points = []
+        for index, mask, _, _ in self.density_sources:
+            shown = mask & index.finite
+            points += [index.starts[shown, :2], index.ends[shown, :2]]
+        points = np.concatenate(points)
+        lo, hi = points.min(axis=0), points.max(axis=0)
+        padding = 0.05 * np.where(hi > lo, hi - lo, 1.0)
+        extent = (lo[0] - padding[0], hi[0] + padding[0], lo[1] - padding[1], hi[1] + padding[1])
+        
+        # Empty cells stay transparent
+        cmap = plt.get_cmap(self.color_scheme_var.get()).copy()
+        cmap.set_bad(alpha=0.0)
+        self.density_image = self.ax.imshow(np.ma.masked_all((1, 1)), extent=extent, origin='lower', cmap=cmap, 
+                                            norm=LogNorm(), interpolation='nearest', zorder=1)
+        self.ax.set_xlim(extent[0], extent[1])
+        self.ax.set_ylim(extent[2], extent[3])
+        self.ax.set_aspect('equal', adjustable='box')
+        self.update_density(redraw=False)
+        
+        cap_unit = self.data_df['Unit'].iloc[0] if self.data_df is not None and 'Unit' in self.data_df.columns else ''
+        self.fig.colorbar(self.density_image, ax=self.ax, shrink=0.7, 
+                          label=f"Capacitance per cell ({cap_unit})" if weighted else "Edges per cell")
+        
+        self.ax.set_xlabel('X')
+        self.ax.set_ylabel('Y')
+        cap_filename = os.path.basename(self.file_path_var.get()) if self.file_path_var.get() else ""
+        res_filename = os.path.basename(self.resistor_file_path_var.get()) if self.resistor_file_path_var.get() else ""
+        self.ax.set_title(f"Density: {' & '.join(name for name in (cap_filename, res_filename) if name)}", fontsize=10)
+        
+        overlay_text = self.draw_node_overlay()
+        overlay_text += self.draw_outlier_overlay()
+        self.draw_search_overlay()
+        if self.legend_elements:
+            self.ax.legend(handles=self.legend_elements, loc='upper left', bbox_to_anchor=(1.25, 1), fontsize='x-small')
+        
+        stats_text = f"Density of {' and '.join(counts)} ({self.density_sampling_var.get().lower()})"
+        if self.filter_expression is not None:
+            stats_text += f"\nExpression: {self.filter_expression.text}"
+        self.fig.text(0.02, 0.02, stats_text + overlay_text, ha='left', fontsize='x-small')
+        
+        # Zooming and panning recompute the grid for the new extent
+        self.ax.callbacks.connect('xlim_changed', self.on_density_limits_changed)
+        self.ax.callbacks.connect('ylim_changed', self.on_density_limits_changed)
+        
+        self.picker = ScreenPicker(self.ax, pick_sources, self.get_projection())
+        self.apply_layer_slice(redraw=False)
+        self.update_selection_tool()
+        self.canvas.draw()
+        
+        self.status_var.set(f"Density view created with {' and '.join(counts)}")
+
+    def on_density_limits_changed(self, ax):
+        """Schedule one density update after the view limits changed (x and y change together on zoom)."""
+        if not self.density_update_pending:
+            self.density_update_pending = True
+            self.root.after_idle(self.update_density)
+
+    def update_density(self, redraw=True):
+        """Recompute the density grid for the visible extent and the selected layers.
+        
+        Only the edges the dataset's spatial index finds in the visible box are
+        accumulated, so a zoomed-in view costs in proportion to what it shows.
+        """
+        self.density_update_pending = False
+        if self.density_image is None:
+            return
+        
+        x0, x1 = self.ax.get_xlim()
+        y0, y1 = self.ax.get_ylim()
+        extent = (min(x0, x1), max(x0, x1), min(y0, y1), max(y0, y1))
+        shape = grid_shape(extent)
+        try:
+            key_range = self.get_layer_key_range()
+        except ValueError:
+            key_range = None
+        
+        accumulate = segment_density if self.density_sampling_var.get() == "Full Segments" else midpoint_density
+        grid = np.zeros(shape)
+        for index, mask, keys, weights in self.density_sources:
+            rows = index.query_box((extent[0], extent[2], index.bounds_lo[2]), (extent[1], extent[3], index.bounds_hi[2]))
+            rows = rows[mask[rows]]
+            if key_range is not None:
+                rows = rows[(keys[rows] >= key_range[0]) & (keys[rows] <= key_range[1])]
+            grid += accumulate(index.starts[rows, :2], index.ends[rows, :2], extent, shape, 
+                               weights[rows] if weights is not None else None)
+        
+        self.density_image.set_data(np.ma.masked_less_equal(grid, 0))
+        self.density_image.set_extent(extent)
+        positive = grid[grid > 0]
+        if len(positive) > 0:
+            self.density_image.set_clim(positive.min(), positive.max())
+        
+        if redraw:
+            self.canvas.draw_idle()
+
+    def draw_node_overlay(self, top_count=5):
+        """Draw merged nodes sized and colored by the quantity selected in Node Coloring.
+        
+        Returns:
+            Statistics text listing the top nodes, or an empty string when no overlay is drawn
+        """
+        mode = self.node_color_mode_var.get()
+        if mode == "None":
+            return ""
+        node_graph = self.get_node_graph()
+        if node_graph is None:
+            return ""
+        
+        cap_unit = self.data_df['Unit'].iloc[0] if self.data_df is not None and 'Unit' in self.data_df.columns else ''
+        driver = None
+        
+        if mode == "Total Capacitance":
+            node_values = node_graph.node_capacitance()
+            top_nodes = node_graph.top_loaded_nodes(top_count)
+            unit = cap_unit
+            title = "Most Loaded Nodes"
+        elif mode == "Elmore Delay":
+            if self.resistor_df is None:
+                messagebox.showwarning("No Data", "Elmore delay needs a resistor data file.")
+                return ""
+            # Computed by the visualization job, which also reported a driver it could not resolve
+            if self.elmore_cache is None or self.elmore_cache[0] != self.driver_node_var.get():
+                return ""
+            _, driver, node_values = self.elmore_cache
+            
+            # Slowest reachable nodes first
+            reachable = np.flatnonzero(np.isfinite(node_values))
+            top_nodes = reachable[np.argsort(-node_values[reachable], kind='stable')[:top_count]]
+            res_unit = self.resistor_df['Unit'].iloc[0] if 'Unit' in self.resistor_df.columns else ''
+            unit = f"{res_unit}*{cap_unit}"
+            title = "Slowest Nodes (Elmore)"
+        else:
+            return ""
+        
+        # Only nodes that carry some of the quantity are drawn
+        shown = np.flatnonzero(np.isfinite(node_values) & (node_values > 0))
+        if len(shown) == 0:
+            return ""
+        
+        shown_values = node_values[shown]
+        sizes = 10 + 90 * shown_values / shown_values.max()
+        xyz = node_graph.node_xyz[shown]
+        self.scatter_points(xyz, c=shown_values, s=sizes, cmap='hot', edgecolors='black', linewidths=0.3)
+        
+        self.legend_elements.append(plt.Line2D([0], [0], marker='o', color='w', markerfacecolor='orange',
+                                               markeredgecolor='black', markersize=6, label=f"Node: {mode}"))
+        
+        # Mark the driver so the delay map has a visible origin
+        if driver is not None:
+            dx, dy, dz = node_graph.node_xyz[driver]
+            self.scatter_points(np.array([[dx, dy, dz]]), marker='*', s=200, color='cyan', edgecolors='black')
+            self.legend_elements.append(plt.Line2D([0], [0], marker='*', color='w', markerfacecolor='cyan',
+                                                   markeredgecolor='black', markersize=10, label="Driver"))
+        
+        # List the top nodes with their coordinates
+        overlay_text = f"\n\n{title}:"
+        for node in top_nodes:
+            x, y, z = node_graph.node_xyz[node]
+            overlay_text += f"\n({x:.4f}, {y:.4f}, {z:.4f}): {node_values[node]:.2e} {unit}"
+        
+        return overlay_text
+
+    def draw_outlier_overlay(self, list_count=5):
+        """Draw the outlier edges that pass the current filters as a separate highlighted collection.
+        
+        Returns:
+            Statistics text with the outlier counts and the most extreme edges
+        """
+        if not self.highlight_outliers_var.get():
+            return ""
+        
+        overlay_text = ""
+        components = [
+            ("capacitor", self.data_df, 'Capacitor_Name', "Capacitor", self.show_capacitors_var.get()),
+            ("resistor", self.resistor_df, 'Resistor_Name', "Resistor", self.show_resistors_var.get()),
+        ]
+        
+        for data_type, df, name_col, label, show in components:
+            if df is None or not show:
+                continue
+            
+            result = self.get_outliers(data_type)
+            visible = self.get_filter_mask(data_type)
+            flagged = np.flatnonzero(result['any'] & visible)
+            overlay_text += f"\n\n{label} Outliers: {len(flagged)}"
+            if len(flagged) == 0:
+                continue
+            
+            # One collection for all flagged edges, drawn over the regular edges
+            flagged_df = df.iloc[flagged]
+            starts, ends = edge_endpoints(flagged_df)
+            self.add_segment_collection(np.stack([starts, ends], axis=1), colors='red',
+                                        linewidths=self.line_width_var.get() * 2, zorder=10)
+            
+            # List the most extreme edges
+            worst = np.argsort(-result['score'][flagged], kind='stable')[:list_count]
+            lengths = edge_lengths(flagged_df.iloc[worst])
+            for position, length in zip(worst, lengths):
+                row = flagged_df.iloc[position]
+                overlay_text += f"\n{row[name_col]}: {row['Value']:.2e}, length {length:.2e}"
+        
+        if overlay_text:
+            self.legend_elements.append(plt.Line2D([0], [0], color='red', lw=3, label='Outlier'))
+        
+        return overlay_text
+
+    def draw_search_overlay(self):
+        """Add the collection that name search matches are highlighted in, filled with the current matches."""
+        self.search_overlay = self.add_segment_collection([], autolim=False, colors='cyan', 
+                                                          linewidths=self.line_width_var.get() * 3, zorder=11)
+        if self.search_var.get().strip():
+            self.search_names(redraw=False)
+
+    def add_segment_collection(self, segments, autolim=True, **kwargs):
+        """Add (N, 2, 3) segments to the axes as one collection; the plan view keeps X and Y only."""
+        if self.ax.name == '3d':
+            collection = Line3DCollection(segments, **kwargs)
+            self.ax.add_collection3d(collection, autolim=autolim)
+        else:
+            collection = LineCollection(plan_segments(segments), **kwargs)
+            self.ax.add_collection(collection, autolim=autolim)
+        return collection
+
+    def scatter_points(self, xyz, **kwargs):
+        """Scatter (N, 3) points on the axes; the plan view keeps X and Y only."""
+        if self.ax.name == '3d':
+            return self.ax.scatter(xyz[:, 0], xyz[:, 1], xyz[:, 2], depthshade=False, **kwargs)
+        return self.ax.scatter(xyz[:, 0], xyz[:, 1], zorder=12, **kwargs)
+
+    def get_name_index(self, data_type="capacitor"):
+        """Return the name index of the loaded capacitor or resistor data, building it on first use."""
+        if self.name_indexes[data_type] is None:
+            df, name_col = ((self.data_df, 'Capacitor_Name') if data_type == "capacitor" 
+                            else (self.resistor_df, 'Resistor_Name'))
+            self.name_indexes[data_type] = NameIndex(df[name_col].values)
+        return self.name_indexes[data_type]
+
+    def search_names(self, event=None, redraw=True):
+        """Find components by name prefix or wildcard pattern and highlight them in the 3D view."""
+        query = self.search_var.get().strip()
+        if not query:
+            self.clear_search()
+            return
+        
+        found = []
+        segments = []
+        for data_type, df in [("capacitor", self.data_df), ("resistor", self.resistor_df)]:
+            if df is None:
+                continue
+            rows = self.get_name_index(data_type).search(query)
+            found.append(f"{len(rows)} {data_type}s")
+            if len(rows) > 0:
+                starts, ends = edge_endpoints(df.iloc[rows])
+                segments.append(np.stack([starts, ends], axis=1))
+        
+        if not found:
+            self.search_result_var.set("No data loaded")
+            return
+        self.search_result_var.set(f"Found {' and '.join(found)}")
+        
+        # Only the overlay changes, the edges themselves are left as drawn
+        if self.search_overlay is not None:
+            segments = np.concatenate(segments) if segments else []
+            self.search_overlay.set_segments(segments if self.ax.name == '3d' else plan_segments(segments))
+            if redraw:
+                self.canvas.draw_idle()
+
+    def clear_search(self):
+        """Remove the search highlight."""
+        self.search_var.set("")
+        self.search_result_var.set("")
+        if self.search_overlay is not None:
+            self.search_overlay.set_segments([])
+            self.canvas.draw_idle()
+
+    def on_proximity_slider_changed(self, value=None):
+        """Take the close pair threshold from the log-scale slider and schedule a live update."""
+        self.proximity_threshold = float(10 ** self.proximity_log_var.get())
+        self.proximity_entry_var.set(f"{self.proximity_threshold:.3g}")
+        self.schedule_proximity_update()
+
+    def on_proximity_entry_changed(self, event=None):
+        """Take the close pair threshold typed into the entry box, capped at the slider's maximum."""
+        try:
+            value = float(self.proximity_entry_var.get().strip())
+            if value <= 0:
+                raise ValueError("threshold must be positive")
+        except ValueError:
+            # Restore previous valid value on parse error
+            self.proximity_entry_var.set(f"{self.proximity_threshold:.3g}")
+            return
         
-        # Get basic statistics
-        min_val = np.min(values)
-        max_val = np.max(values)
-        mean_val = np.mean(values)
-        median_val = np.median(values)
+        # The re-query runs on the Tk thread, and a huge threshold would pair up nearly every edge
+        max_threshold = 10 ** PROXIMITY_LOG_RANGE[1]
+        if value > max_threshold:
+            value = max_threshold
+            self.proximity_entry_var.set(f"{value:.3g}")
+            self.status_var.set(f"Close pair threshold capped at {value:.3g}")
         
-        self.status_var.set(f"Resistance range: {min_val:.6e} to {max_val:.6e}")
+        self.proximity_threshold = value
+        self.proximity_log_var.set(float(np.clip(np.log10(value), *PROXIMITY_LOG_RANGE)))
+        self.schedule_proximity_update()
+
+    def schedule_proximity_update(self):
+        """Schedule one close pair update; slider moves arriving meanwhile are folded into it."""
+        if not self.proximity_update_pending:
+            self.proximity_update_pending = True
+            self.root.after_idle(self.update_proximity)
+
+    def draw_proximity_overlay(self):
+        """Add the collection close pairs are highlighted in, filled for the current threshold."""
+        self.proximity_overlay = self.add_segment_collection([], autolim=False, colors='magenta', alpha=0.6, 
+                                                             linewidths=self.line_width_var.get() * 2, zorder=10)
+        if self.proximity_overlay_var.get():
+            self.legend_elements.append(plt.Line2D([0], [0], color='magenta', lw=3, alpha=0.6, label='Close Pair'))
+        self.update_proximity(redraw=False)
+
+    def update_proximity(self, redraw=True):
+        """Refresh the close pair count and overlay of the advanced view for the current threshold.
+        
+        The pairs come from the proximity caches: a smaller threshold only filters the
+        cached pairs, and a larger one re-queries the KD-tree kept for the dataset.
+        """
+        self.proximity_update_pending = False
+        if self.proximity_overlay is None:
+            self.proximity_result_var.set(f"Threshold {self.proximity_threshold:.3g} applies to the Advanced view")
+            return
         
-        # Get number of bins from UI
-        num_bins = self.num_bins_var.get()
+        counts = []
+        segments = []
+        for data_type, df, show_var in [("capacitor", self.data_df, self.show_capacitors_var), 
+                                        ("resistor", self.resistor_df, self.show_resistors_var)]:
+            if df is None or not show_var.get():
+                continue
+            first, second, _ = self.proximity_caches[data_type].get_pairs(
+                df, self.proximity_threshold, self.get_filter_mask(data_type))
+            counts.append(f"{len(first)} {data_type} pairs")
+            
+            # Highlight every edge that is part of a close pair
+            if self.proximity_overlay_var.get() and len(first) > 0:
+                starts, ends = edge_endpoints(df.iloc[np.unique(np.concatenate([first, second]))])
+                segments.append(np.stack([starts, ends], axis=1))
         
-        # If the range is very large (several orders of magnitude) or log scale is selected, use logarithmic bins
-        if self.use_log_scale_var.get() or max_val / (min_val + 1e-10) > 100:
-            # Ensure min_val is positive for log scale
-            log_min = np.log10(max(min_val, 1e-15))
-            log_max = np.log10(max_val)
-            bins = np.logspace(log_min, log_max, num_bins+1)
+        if counts:
+            self.proximity_result_var.set(f"{' and '.join(counts)} closer than {self.proximity_threshold:.3g}")
         else:
-            # Otherwise use equal width bins
-            bins = np.linspace(min_val, max_val, num_bins+1)
+            self.proximity_result_var.set("No components shown")
+        self.proximity_overlay.set_segments(np.concatenate(segments) if segments else [])
+        if redraw:
+            self.canvas.draw_idle()
+
+    def browse_compare_file(self):
+        """Open file dialog to select the extraction to compare with."""
+        file_path = filedialog.askopenfilename(
+            title="Select File to Compare",
+            filetypes=[("CSV files", "*.csv"), ("All files", "*.*")]
+        )
+        if file_path:
+            self.compare_file_path_var.set(file_path)
+
+    def compare_extractions(self):
+        """Diff the compare file against the loaded data of the same type and draw the differences."""
+        file_path = self.compare_file_path_var.get()
+        if not file_path:
+            messagebox.showwarning("No File Selected", "Please select a file to compare with.")
+            return
+        if self.data_df is None and self.resistor_df is None:
+            messagebox.showwarning("No Data", "Please load the baseline capacitor or resistor file first.")
+            return
         
-        # Count the number of values in each bin
-        hist, bin_edges = np.histogram(values, bins=bins)
+        # The worker gets the loaded datasets here rather than reading them off the Tk thread
+        baselines = {'Capacitor_Name': self.data_df, 'Resistor_Name': self.resistor_df}
+        
+        def compare(job):
+            job.report(0.0, "Loading comparison data...")
+            new_df, _ = dataset_cache.get(file_path, lambda path: read_csv_with_sketch(
+                path, progress=lambda fraction: job.report(0.8 * fraction, "Loading comparison data...")))
+            
+            # The loaded dataset with the same name column is the baseline
+            column = name_column(new_df)
+            if column not in new_df.columns:
+                raise ValueError("The file has no Capacitor_Name or Resistor_Name column")
+            old_df = baselines.get(column)
+            if old_df is None:
+                data_type = "capacitor" if column == 'Capacitor_Name' else "resistor"
+                raise ValueError(f"The file holds {data_type}s, but no {data_type} data is loaded")
+            
+            job.report(0.8, "Matching components by name...")
+            return old_df, new_df, diff_datasets(old_df, new_df)
         
-        # Create color ranges
-        color_ranges = []
-        for i in range(len(hist)):
-            color_ranges.append({
-                'min': bin_edges[i],
-                'max': bin_edges[i+1],
-                'label': f"{bin_edges[i]:.3e} - {bin_edges[i+1]:.3e}",
-                'count': hist[i],
-                'percentage': hist[i]/len(values)*100
-            })
+        self.start_job(f"Comparing with {os.path.basename(file_path)}", compare, 
+                       lambda result: self.draw_diff(*result))
+
+    def draw_diff(self, old_df, new_df, diff):
+        """Draw only the added, removed and changed edges of a diff, colored by relative value change.
+        
+        Args:
+            old_df: Baseline DataFrame
+            new_df: Compared DataFrame
+            diff: Result of ``diff_datasets(old_df, new_df)``
+        """
+        self.fig.clear()
+        self.ax = self.fig.add_subplot(111, projection='3d')
+        self.picker = None
+        self.search_overlay = None
+        self.proximity_overlay = None
+        self.hide_pick_tooltip()
+        self.clear_selection()
+        self.layer_groups = []
+        self.density_image = None
+        self.raster_layer = None
+        
+        column = name_column(new_df)
+        changed_df = new_df.iloc[diff['new_rows'][diff['changed']]]
+        added_df = new_df.iloc[diff['added']]
+        removed_df = old_df.iloc[diff['removed']]
+        changes = diff['relative_change'][diff['changed']]
+        moved_only = ~diff['value_changed'][diff['changed']]
+        
+        # Symmetric color scale so growth and shrinkage of the same size get the same intensity
+        finite = np.abs(changes[np.isfinite(changes)])
+        limit = np.percentile(finite, DIFF_COLOR_PERCENTILE) if len(finite) > 0 else 0.0
+        limit = limit if limit > 0 else 1.0
+        norm = Normalize(vmin=-limit, vmax=limit)
+        cmap = plt.get_cmap('coolwarm')
+        line_width = self.line_width_var.get()
+        
+        all_points = []
+        if len(changed_df) > 0:
+            starts, ends = edge_endpoints(changed_df)
+            colors = cmap(norm(np.clip(changes, -limit, limit)))
+            colors[moved_only] = mcolors.to_rgba('darkorange')  # Moved with the same value
+            self.ax.add_collection3d(Line3DCollection(np.stack([starts, ends], axis=1), colors=colors, 
+                                                      linewidths=line_width))
+            all_points.extend([starts, ends])
+        if len(added_df) > 0:
+            starts, ends = edge_endpoints(added_df)
+            self.ax.add_collection3d(Line3DCollection(np.stack([starts, ends], axis=1), colors='green', 
+                                                      linewidths=line_width * 1.5))
+            all_points.extend([starts, ends])
+        if len(removed_df) > 0:
+            starts, ends = edge_endpoints(removed_df)
+            self.ax.add_collection3d(Line3DCollection(np.stack([starts, ends], axis=1), colors='gray', 
+                                                      linewidths=line_width * 1.5, linestyles='--'))
+            all_points.extend([starts, ends])
+        
+        if all_points:
+            points = np.concatenate(all_points)
+            lo, hi = points.min(axis=0), points.max(axis=0)
+            padding = 0.05 * np.where(hi > lo, hi - lo, 1.0)
+            self.ax.set_xlim(lo[0] - padding[0], hi[0] + padding[0])
+            self.ax.set_ylim(lo[1] - padding[1], hi[1] + padding[1])
+            self.ax.set_zlim(lo[2] - padding[2], hi[2] + padding[2])
         
-        return color_ranges, bin_edges
+        self.ax.set_xlabel('X')
+        self.ax.set_ylabel('Y')
+        self.ax.set_zlabel('Z')
+        self.ax.set_title(f'Diff: {os.path.basename(self.compare_file_path_var.get())} vs. '
+                          f'{len(old_df)} loaded {column.split("_")[0].lower()}s', fontsize=10)
+        
+        self.fig.colorbar(ScalarMappable(norm=norm, cmap=cmap), ax=self.ax, shrink=0.5, pad=0.1, 
+                          label='Relative value change')
+        legend_elements = [
+            plt.Line2D([0], [0], color='green', lw=2, label=f'Added ({len(added_df)})'),
+            plt.Line2D([0], [0], color='gray', lw=2, linestyle='--', label=f'Removed ({len(removed_df)})'),
+            plt.Line2D([0], [0], color=cmap(1.0), lw=2, label=f'Value changed ({int(np.sum(~moved_only))})'),
+            plt.Line2D([0], [0], color='darkorange', lw=2, label=f'Moved only ({int(np.sum(moved_only))})')
+        ]
+        self.ax.legend(handles=legend_elements, loc='upper left', fontsize='x-small')
+        
+        summary = (f"{len(diff['new_rows'])} matched: {int(diff['value_changed'].sum())} value changes, "
+                   f"{int(diff['moved'].sum())} moved\n"
+                   f"{len(added_df)} added, {len(removed_df)} removed")
+        if diff['duplicates']:
+            summary += f"\n{diff['duplicates']} duplicate names ignored"
+        if len(changes) > 0:
+            summary += f"\nLargest change: {np.max(np.abs(changes)):.1%}"
+        self.fig.text(0.02, 0.02, summary, ha='left', fontsize='x-small')
+        self.diff_result_var.set(summary)
+        
+        self.picker = ScreenPicker(self.ax, [("Changed", changed_df, column), ("Added", added_df, column), 
+                                             ("Removed", removed_df, column)], self.get_projection())
+        self.update_selection_tool()
+        self.canvas.draw()
+        self.status_var.set(f"Diff shows {len(changed_df)} changed, {len(added_df)} added and "
+                            f"{len(removed_df)} removed components")
+
+    def analyze_resistance_distribution(self, df):
+        """Analyze the distribution of resistance values and create suitable ranges."""
+        distribution = self.get_value_distribution(df, "resistor")
+        self.status_var.set(f"Resistance range: {distribution['min']:.6e} to {distribution['max']:.6e}")
+        return distribution['color_ranges'], distribution['bin_edges']
 
     def visualize(self):
         """Visualize the data based on selected visualization type."""
@@ -1120,29 +2847,165 @@ Res10,0.15,0.15,0.0,0.25,0.25,0.02,63.2,Ohm
             if self.data_df is None:  # Still None after attempted load
                 return
         
-        # Run visualization in a separate thread to avoid GUI freezing
+        # Heavy analysis runs on a worker thread; drawing then happens on the Tk thread from warm caches
         viz_type = self.viz_type_var.get()
-        
-        if viz_type == "Basic":
-            threading.Thread(target=self.visualize_basic_thread).start()
-        else:
-            threading.Thread(target=self.visualize_advanced_thread).start()
+        node_mode = self.node_color_mode_var.get()
+        plan = self.plan_visualization(viz_type == "Advanced", self.highlight_outliers_var.get(), node_mode != "None", 
+                                       viz_type == "Density", node_mode == "Elmore Delay")
+        draw = {"Advanced": self.visualize_advanced, "Plan View": self.visualize_plan, 
+                "Density": self.visualize_density}.get(viz_type, self.visualize_basic)
+        
+        def on_done(results):
+            self.install_visualization(results)
+            draw()
+        
+        self.start_job(f"{viz_type} visualization", 
+                       lambda job: self.prepare_visualization(job, plan), on_done)
 
-    def visualize_basic_thread(self):
-        """Run basic visualization in a thread."""
-        self.status_var.set("Creating basic visualization...")
-        self.root.update_idletasks()
+    def plan_visualization(self, advanced, outliers, nodes, density=False, elmore=False):
+        """List the analysis steps a visualization still needs, reading the caches on the Tk thread.
+        
+        Returns:
+            List of (step, data_type, df, args) tuples for ``prepare_visualization``.
+        """
+        num_bins, strategy, use_log_scale = binning = self.binning_settings()
+        plan = []
+        for data_type, df in [("capacitor", self.data_df), ("resistor", self.resistor_df)]:
+            if df is None:
+                continue
+            if self.binning_caches[data_type].lookup(df, num_bins, strategy, use_log_scale) is None:
+                plan.append(('binning', data_type, df, (binning, self.value_sketches[data_type])))
+            cache = self.proximity_caches[data_type]
+            if advanced and not cache.is_valid_for(df, self.proximity_threshold):
+                plan.append(('proximity', data_type, df, (self.proximity_threshold, cache.snapshot())))
+            if outliers and self.outlier_results[data_type] is None:
+                plan.append(('outliers', data_type, df, None))
+            if density and self.spatial_indexes[data_type] is None:
+                plan.append(('spatial', data_type, df, None))
+        
+        # The Elmore step merges the nodes itself when they are not cached yet;
+        # the Advanced view lists the node and component counts
+        driver = self.driver_node_var.get()
+        if elmore and self.resistor_df is not None and (self.elmore_cache is None or self.elmore_cache[0] != driver):
+            plan.append(('elmore', None, None, (self.snapshot_rc_network(), driver)))
+        elif (nodes or advanced) and self.node_graph is None and (self.data_df is not None or self.resistor_df is not None):
+            plan.append(('nodes', None, None, (self.data_df, self.resistor_df)))
+        return plan
+
+    def prepare_visualization(self, job, plan):
+        """Run the analysis steps of a plan on the worker thread, reporting progress on job.
+        
+        Nothing shared with the Tk thread is modified here; the results are
+        returned for ``install_visualization``.
+        
+        Returns:
+            List of (step, data_type, df, args, result) tuples.
+        """
+        messages = {'binning': "Binning {} values...", 'proximity': "Finding close {} pairs...", 
+                    'outliers': "Finding {} outliers...", 'spatial': "Indexing {} edges...", 
+                    'nodes': "Merging nodes...", 'elmore': "Computing Elmore delays..."}
+        results = []
+        for done, (step, data_type, df, args) in enumerate(plan):
+            job.report(done / len(plan), messages[step].format(data_type))
+            if step == 'binning':
+                binning, sketch = args
+                result = analyze_distribution(df['Value'].values if sketch is None else None, *binning, sketch=sketch)
+            elif step == 'proximity':
+                result = ProximityCache.compute(df, *args)
+            elif step == 'outliers':
+                result = find_outliers(df)
+            elif step == 'spatial':
+                result = SpatialIndex.from_dataframe(df)
+            elif step == 'elmore':
+                snapshot, driver = args
+                result = self.solve_rc_network(job, snapshot, [driver], ResistanceNetwork.elmore_delays)
+            else:
+                result = NodeGraph(*args)
+                result.node_capacitance()
+                result.components()
+            results.append((step, data_type, df, args, result))
         
-        # Call the visualization function directly
-        self.root.after(0, self.visualize_basic)
+        job.report(1.0, "Drawing...")
+        return results
+
+    def install_visualization(self, results):
+        """Store the results of ``prepare_visualization`` in the caches (Tk thread).
+        
+        Results computed for data that was replaced in the meantime are dropped.
+        """
+        for step, data_type, df, args, result in results:
+            current = self.data_df if data_type == "capacitor" else self.resistor_df
+            if step == 'binning':
+                self.binning_caches[data_type].store(df, *args[0], result)
+            elif step == 'proximity':
+                if df is current:
+                    self.proximity_caches[data_type].install(result)
+            elif step == 'outliers':
+                if df is current and self.outlier_results[data_type] is None:
+                    self.outlier_results[data_type] = result
+            elif step == 'spatial':
+                if df is current and self.spatial_indexes[data_type] is None:
+                    self.spatial_indexes[data_type] = result
+            elif step == 'elmore':
+                snapshot, error, nodes, delays = result
+                if self.install_rc_network(snapshot):
+                    if error is not None:
+                        messagebox.showwarning("Driver Node", f"Cannot draw the Elmore delay map: {error}")
+                    else:
+                        self.elmore_cache = (args[1], nodes[0], delays)
+            elif self.node_graph is None and result.capacitor_df is self.data_df and \
+                    result.resistor_df is self.resistor_df:
+                self.node_graph = result
+
+    def start_job(self, name, work, on_done=None, on_error=None):
+        """Start a background job unless one is already running; see ``JobRunner.start``."""
+        if self.jobs.busy:
+            messagebox.showinfo("Busy", f"Please wait for '{self.jobs.job.name}' to finish or cancel it.")
+            return None
+        
+        if on_error is None:
+            def on_error(error):
+                self.status_var.set(f"{name} failed: {str(error)}")
+                messagebox.showerror("Error", str(error))
+        
+        self.cancel_button.configure(state=tk.NORMAL)
+        self.progress_var.set(0.0)
+        return self.jobs.start(name, work, on_done, on_error)
+
+    def show_job_progress(self, job, fraction, message):
+        """Show a progress report of the running job in the status bar."""
+        self.progress_var.set(fraction * 100)
+        self.status_var.set(f"{message or job.name} {fraction:.0%}")
+
+    def job_finished(self, job, outcome):
+        """Reset the progress display when a job ends."""
+        self.progress_var.set(0.0)
+        self.cancel_button.configure(state=tk.DISABLED)
+        if outcome == 'cancelled':
+            self.status_var.set(f"{job.name} cancelled")
+
+    def cancel_job(self):
+        """Ask the running job to stop at its next checkpoint."""
+        if self.jobs.busy:
+            self.status_var.set(f"Cancelling {self.jobs.job.name}...")
+            self.jobs.cancel()
 
-    def visualize_advanced_thread(self):
-        """Run advanced visualization in a thread."""
-        self.status_var.set("Creating advanced visualization...")
+    def report_render_progress(self, done, total, label):
+        """Report drawing progress from the Tk thread and stop if the job was cancelled.
+        
+        Only pending redraws are processed (``update_idletasks``), so the progress
+        bar repaints without re-entering the event loop in the middle of a render;
+        a cancel requested while the analysis ran stops drawing at the next report.
+        
+        Raises:
+            JobCancelled: If the running job was cancelled
+        """
+        job = self.jobs.job
+        if job is None:
+            return
+        self.show_job_progress(job, done / max(total, 1), f"Drawing {label}...")
         self.root.update_idletasks()
-        
-        # Call the visualization function directly
-        self.root.after(0, self.visualize_advanced)
+        job.check_cancelled()
 
     def save_visualization(self):
         """Save the current visualization as an image file."""
@@ -1164,14 +3027,103 @@ Res10,0.15,0.15,0.0,0.25,0.25,0.02,63.2,Ohm
         )
         
         if file_path:
-            try:
-                # Save the figure
-                self.fig.savefig(file_path, dpi=300, bbox_inches='tight')
-                self.status_var.set(f"Visualization saved to {file_path}")
-                messagebox.showinfo("Save Successful", f"Visualization saved to:\n{file_path}")
-            except Exception as e:
-                self.status_var.set(f"Error saving figure: {str(e)}")
-                messagebox.showerror("Save Error", str(e))
+            self.export_figure(file_path)
+
+    def export_figure(self, file_path, dpi=DEFAULT_EXPORT_DPI):
+        """Save the figure as a background job drawing an off-screen copy, with progress and cancel.
+        
+        Only the copy is taken on the GUI thread; the figure stays interactive while the
+        copy is drawn and written (see ``exporter.export_snapshot``).
+        """
+        if self.jobs.busy:
+            messagebox.showinfo("Busy", f"Please wait for '{self.jobs.job.name}' to finish or cancel it.")
+            return
+        
+        try:
+            snapshot = snapshot_figure(self.fig)
+        except Exception as e:
+            self.status_var.set(f"Error saving figure: {str(e)}")
+            messagebox.showerror("Save Error", str(e))
+            return
+        
+        def saved(path):
+            self.status_var.set(f"Visualization saved to {path}")
+            messagebox.showinfo("Save Successful", f"Visualization saved to:\n{path}")
+        
+        def failed(error):
+            self.status_var.set(f"Error saving figure: {str(error)}")
+            messagebox.showerror("Save Error", str(error))
+        
+        self.start_job(f"Saving {os.path.basename(file_path)}", 
+                       lambda job: export_snapshot(snapshot, file_path, dpi, job.report), saved, failed)
+
+    def large_render_dpi(self):
+        """Resolution typed in the Large Render box, or None if it is not a positive number."""
+        try:
+            dpi = int(self.large_render_dpi_var.get())
+        except (tk.TclError, ValueError):
+            return None
+        return dpi if dpi > 0 else None
+
+    def update_large_render_info(self, _=None):
+        """Show the pixel size of a large render of the current figure at the chosen resolution."""
+        dpi = self.large_render_dpi()
+        if self.fig is None or dpi is None:
+            self.large_render_info_var.set("")
+            return
+        
+        width, height = self.fig.get_size_inches() * dpi
+        self.large_render_info_var.set(f"Up to {width:,.0f} x {height:,.0f} pixels "
+                                       f"({width * height / 1e6:,.0f} megapixels), trimmed to the content")
+
+    def save_large_render(self):
+        """Render the current view tile by tile at the Large Render resolution into a TIFF or PNG file.
+        
+        The figure is copied as for ``export_figure``, and the copy is drawn one tile at a
+        time in the background (see ``exporter.export_tiled``), so the memory used does not
+        grow with the size of the image.
+        """
+        if self.fig is None:
+            messagebox.showwarning("No Visualization", "Please create a visualization first.")
+            return
+        
+        dpi = self.large_render_dpi()
+        if dpi is None:
+            messagebox.showerror("Invalid DPI", "Please enter a positive whole number of dots per inch.")
+            return
+        if self.jobs.busy:
+            messagebox.showinfo("Busy", f"Please wait for '{self.jobs.job.name}' to finish or cancel it.")
+            return
+        
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".tif",
+            filetypes=[
+                ("Tiled TIFF Files", "*.tif *.tiff"),
+                ("PNG Files", "*.png")
+            ],
+            title="Save Large Render As"
+        )
+        if not file_path:
+            return
+        
+        try:
+            snapshot = snapshot_figure(self.fig)
+        except Exception as e:
+            self.status_var.set(f"Error saving render: {str(e)}")
+            messagebox.showerror("Save Error", str(e))
+            return
+        
+        def saved(result):
+            path, width, height = result
+            self.status_var.set(f"{width} x {height} render saved to {path}")
+            messagebox.showinfo("Save Successful", f"{width} x {height} pixel render saved to:\n{path}")
+        
+        def failed(error):
+            self.status_var.set(f"Error saving render: {str(error)}")
+            messagebox.showerror("Save Error", str(error))
+        
+        self.start_job(f"Rendering {os.path.basename(file_path)}", 
+                       lambda job: export_tiled(snapshot, file_path, dpi, job.report), saved, failed)
 
     def update_min_resistance(self, _=None):
         """Update the min resistance filter value label and constrain max slider."""
@@ -1266,10 +3218,22 @@ Res10,0.15,0.15,0.0,0.25,0.25,0.02,63.2,Ohm
         self.ax = self.fig.add_subplot(111, projection='3d')
         
         # Reset collections and colors
+        self.picker = None
+        self.search_overlay = None
+        self.proximity_overlay = None
+        self.hide_pick_tooltip()
+        self.clear_selection()
+        self.layer_groups = []
+        self.density_image = None
+        self.raster_layer = None
         self.line_objects = []
         self.resistor_line_objects = []
         self.legend_elements = []
         self.plane_objects = []
+        pick_sources = []
+        layer_sources = []  # (data_type, drawn rows mask, line artists) for the layer slicer
+        raster_sources = []  # (rows, colors) drawn as one raster layer with Rasterize Edges
+        value_labels = []  # (midpoint, text) of each edge labeled with its value
         
         # Set global plot limits
         x_min, x_max = float('inf'), float('-inf')
@@ -1288,13 +3252,13 @@ Res10,0.15,0.15,0.0,0.25,0.25,0.02,63.2,Ohm
         
         # Capacitor visualization
         cap_filtered_df = None
+        cap_proximity_data = None
         if self.data_df is not None and self.show_capacitors_var.get():
             df = self.data_df
             
             # Apply capacitance filters
-            min_cap = self.min_cap_var.get()
-            max_cap = self.max_cap_var.get()
-            cap_filtered_df = df[(df['Value'] >= min_cap) & (df['Value'] <= max_cap)]
+            cap_mask = self.get_filter_mask("capacitor")
+            cap_filtered_df = df[cap_mask]
             
             if len(cap_filtered_df) == 0:
                 messagebox.showwarning("No Data", "No capacitors match the current filter range.")
@@ -1314,20 +3278,19 @@ Res10,0.15,0.15,0.0,0.25,0.25,0.02,63.2,Ohm
                 y_min, y_max = min(y_min, cap_y_min), max(y_max, cap_y_max)
                 z_min, z_max = min(z_min, cap_z_min), max(z_max, cap_z_max)
                 
-                # Proximity analysis for capacitors
-                cap_proximity_data = None
-                if hasattr(self, 'find_closest_edges'):
-                    cap_proximity_data = self.find_closest_edges(cap_filtered_df)
+                # Proximity analysis for capacitors, masked from the cached full-dataset result
+                cap_proximity_data = self.proximity_caches['capacitor'].get_records(
+                    df, 'Capacitor_Name', self.proximity_threshold, cap_mask, limit=3)
         
         # Resistor visualization
         res_filtered_df = None
+        res_proximity_data = None
         if self.resistor_df is not None and self.show_resistors_var.get():
             res_df = self.resistor_df
             
             # Apply resistance filters
-            min_res = self.min_res_var.get()
-            max_res = self.max_res_var.get()
-            res_filtered_df = res_df[(res_df['Value'] >= min_res) & (res_df['Value'] <= max_res)]
+            res_mask = self.get_filter_mask("resistor")
+            res_filtered_df = res_df[res_mask]
             
             if len(res_filtered_df) == 0:
                 messagebox.showwarning("No Data", "No resistors match the current filter range.")
@@ -1347,10 +3310,9 @@ Res10,0.15,0.15,0.0,0.25,0.25,0.02,63.2,Ohm
                 y_min, y_max = min(y_min, res_y_min), max(y_max, res_y_max)
                 z_min, z_max = min(z_min, res_z_min), max(z_max, res_z_max)
                 
-                # Proximity analysis for resistors
-                res_proximity_data = None
-                if hasattr(self, 'find_closest_edges'):
-                    res_proximity_data = self.find_closest_edges(res_filtered_df)
+                # Proximity analysis for resistors, masked from the cached full-dataset result
+                res_proximity_data = self.proximity_caches['resistor'].get_records(
+                    res_df, 'Resistor_Name', self.proximity_threshold, res_mask, limit=3)
                     
         # If no data was loaded or none passed the filters
         if x_min == float('inf') or x_max == float('-inf'):
@@ -1436,7 +3398,10 @@ Res10,0.15,0.15,0.0,0.25,0.25,0.02,63.2,Ohm
             cap_norm = BoundaryNorm(self.bin_edges, cap_cmap.N)
             
             # Plot each capacitor as an edge
-            for _, row in cap_filtered_df.iterrows():
+            for row_number, (_, row) in enumerate(self.rows_to_draw(cap_filtered_df, cap_cmap, cap_norm, raster_sources)):
+                if row_number % RENDER_PROGRESS_ROWS == 0:
+                    self.report_render_progress(row_number, len(cap_filtered_df), "capacitors")
+                
                 capacitor_name = row['Capacitor_Name']
                 start_x, start_y, start_z = row['Start_X'], row['Start_Y'], row['Start_Z']
                 end_x, end_y, end_z = row['End_X'], row['End_Y'], row['End_Z']
@@ -1445,27 +3410,18 @@ Res10,0.15,0.15,0.0,0.25,0.25,0.02,63.2,Ohm
                 value = row['Value']
                 color = self.get_color_for_value(value, cap_norm, cap_cmap)
                 
-                # Plot the edge as a line
-                if cap_viz_mode['show_nodes']:
-                    line, = self.ax.plot([start_x, end_x], [start_y, end_y], [start_z, end_z], 
-                                     color=color, linewidth=self.line_width_var.get(), 
-                                     marker='o', markersize=self.marker_size_var.get())
-                else:
-                    line, = self.ax.plot([start_x, end_x], [start_y, end_y], [start_z, end_z], 
-                                     color=color, linewidth=self.line_width_var.get())
-                
-                self.line_objects.append((line, value))
+                # Queue the edge; index_layer_artists draws each layer's edges as one collection
+                self.line_objects.append((((start_x, start_y, start_z), (end_x, end_y, end_z)), color))
                 
                 # Add capacitance values as text if enabled
                 if cap_viz_mode['show_values']:
-                    # Calculate midpoint of the edge
-                    mid_x = (start_x + end_x) / 2
-                    mid_y = (start_y + end_y) / 2
-                    mid_z = (start_z + end_z) / 2
-                    
-                    # Add text with capacitance value
-                    self.ax.text(mid_x, mid_y, mid_z, f"{row['Value']:.3e}", 
-                             color='black', fontsize=7, ha='center', va='center')
+                    # Label the midpoint of the edge with its capacitance value
+                    value_labels.append((((start_x + end_x) / 2, (start_y + end_y) / 2, (start_z + end_z) / 2), 
+                                         f"{row['Value']:.3e}"))
+            
+            pick_sources.append(("Capacitor", cap_filtered_df, 'Capacitor_Name'))
+            layer_sources.append(("capacitor", cap_mask, self.line_objects, '-', 
+                                  'o' if cap_viz_mode['show_nodes'] else None))
             
             # Create a color legend for capacitors
             cap_unit = self.data_df['Unit'].iloc[0] if 'Unit' in self.data_df.columns else 'unknown unit'
@@ -1489,7 +3445,10 @@ Res10,0.15,0.15,0.0,0.25,0.25,0.02,63.2,Ohm
             res_norm = BoundaryNorm(self.resistance_bin_edges, res_cmap.N)
             
             # Plot each resistor as an edge
-            for _, row in res_filtered_df.iterrows():
+            for row_number, (_, row) in enumerate(self.rows_to_draw(res_filtered_df, res_cmap, res_norm, raster_sources)):
+                if row_number % RENDER_PROGRESS_ROWS == 0:
+                    self.report_render_progress(row_number, len(res_filtered_df), "resistors")
+                
                 resistor_name = row['Resistor_Name']
                 start_x, start_y, start_z = row['Start_X'], row['Start_Y'], row['Start_Z']
                 end_x, end_y, end_z = row['End_X'], row['End_Y'], row['End_Z']
@@ -1498,29 +3457,18 @@ Res10,0.15,0.15,0.0,0.25,0.25,0.02,63.2,Ohm
                 value = row['Value']
                 color = self.get_color_for_value(value, res_norm, res_cmap)
                 
-                # Plot the edge as a line
-                if res_viz_mode['show_nodes']:
-                    line, = self.ax.plot([start_x, end_x], [start_y, end_y], [start_z, end_z], 
-                                     color=color, linewidth=self.line_width_var.get(), 
-                                     marker='s', markersize=self.marker_size_var.get(),
-                                     linestyle='--')  # Dashed line for resistors
-                else:
-                    line, = self.ax.plot([start_x, end_x], [start_y, end_y], [start_z, end_z], 
-                                     color=color, linewidth=self.line_width_var.get(),
-                                     linestyle='--')  # Dashed line for resistors
-                
-                self.resistor_line_objects.append((line, value))
+                # Queue the edge; index_layer_artists draws each layer's edges as one collection
+                self.resistor_line_objects.append((((start_x, start_y, start_z), (end_x, end_y, end_z)), color))
                 
                 # Add resistance values as text if enabled
                 if res_viz_mode['show_values']:
-                    # Calculate midpoint of the edge
-                    mid_x = (start_x + end_x) / 2
-                    mid_y = (start_y + end_y) / 2
-                    mid_z = (start_z + end_z) / 2
-                    
-                    # Add text with resistance value
-                    self.ax.text(mid_x, mid_y, mid_z, f"{row['Value']:.1f}", 
-                             color='black', fontsize=7, ha='center', va='center')
+                    # Label the midpoint of the edge with its resistance value
+                    value_labels.append((((start_x + end_x) / 2, (start_y + end_y) / 2, (start_z + end_z) / 2), 
+                                         f"{row['Value']:.1f}"))
+            
+            pick_sources.append(("Resistor", res_filtered_df, 'Resistor_Name'))
+            layer_sources.append(("resistor", res_mask, self.resistor_line_objects, '--',  # Dashed line for resistors
+                                  's' if res_viz_mode['show_nodes'] else None))
             
             # Create a color legend for resistors
             res_unit = self.resistor_df['Unit'].iloc[0] if 'Unit' in self.resistor_df.columns else 'unknown unit'
@@ -1537,6 +3485,12 @@ Res10,0.15,0.15,0.0,0.25,0.25,0.02,63.2,Ohm
                 # Create a patch for the legend
                 self.legend_elements.append(mpatches.Patch(color=color, label=label))
         
+        # Draw merged nodes colored by the selected node quantity
+        node_overlay_text = self.draw_node_overlay()
+        node_overlay_text += self.draw_outlier_overlay()
+        self.draw_search_overlay()
+        self.draw_proximity_overlay()
+        
         # Add legend with all elements
         legend = self.legend_ax.legend(handles=self.legend_elements, 
                                      fontsize='x-small',  # Smaller font size
@@ -1547,8 +3501,7 @@ Res10,0.15,0.15,0.0,0.25,0.25,0.02,63.2,Ohm
         stats_text = "Component Statistics:\n"
         
         if self.data_df is not None and self.show_capacitors_var.get():
-            filtered_count = len(self.data_df[(self.data_df['Value'] >= self.min_cap_var.get()) & 
-                                           (self.data_df['Value'] <= self.max_cap_var.get())])
+            filtered_count = int(self.get_filter_mask("capacitor").sum())
             total_count = len(self.data_df)
             cap_unit = self.data_df['Unit'].iloc[0] if 'Unit' in self.data_df.columns else 'unknown unit'
             
@@ -1559,8 +3512,7 @@ Res10,0.15,0.15,0.0,0.25,0.25,0.02,63.2,Ohm
             )
         
         if self.resistor_df is not None and self.show_resistors_var.get():
-            filtered_res_count = len(self.resistor_df[(self.resistor_df['Value'] >= self.min_res_var.get()) & 
-                                                   (self.resistor_df['Value'] <= self.max_res_var.get())])
+            filtered_res_count = int(self.get_filter_mask("resistor").sum())
             total_res_count = len(self.resistor_df)
             res_unit = self.resistor_df['Unit'].iloc[0] if 'Unit' in self.resistor_df.columns else 'unknown unit'
             
@@ -1569,6 +3521,9 @@ Res10,0.15,0.15,0.0,0.25,0.25,0.02,63.2,Ohm
                 f"Filter: {self.min_res_var.get():.2e} - {self.max_res_var.get():.2e} {res_unit}\n"
                 f"Range: {self.resistor_df['Value'].min():.2e} - {self.resistor_df['Value'].max():.2e} {res_unit}\n"
             )
+        
+        if self.filter_expression is not None:
+            stats_text += f"Expression: {self.filter_expression.text}\n"
 
         # Add Z levels information if planes are shown
         if self.show_z_planes_var.get() and hasattr(self, 'z_levels_count') and self.z_levels_count > 0:
@@ -1578,6 +3533,12 @@ Res10,0.15,0.15,0.0,0.25,0.25,0.02,63.2,Ohm
             else:
                 stats_text += f"Range: {self.z_levels.min():.4f} to {self.z_levels.max():.4f}"
         
+        # Add merged node and connectivity information, merged by the visualization job
+        if self.node_graph is not None:
+            num_components, _ = self.node_graph.components()
+            stats_text += f"\nNodes: {self.node_graph.num_nodes} ({num_components} connected components)"
+        stats_text += node_overlay_text
+        
         # Add proximity data information if available
         if cap_proximity_data:
             # Sort proximity data by distance
@@ -1627,13 +3588,13 @@ Res10,0.15,0.15,0.0,0.25,0.25,0.02,63.2,Ohm
         # Function to toggle nodes
         def toggle_nodes(event):
             self.show_nodes_var.set(not self.show_nodes_var.get())
-            self.visualize_advanced()
+            self.visualize()
         toggle_nodes_button.on_clicked(toggle_nodes)
         
         # Function to toggle values
         def toggle_values(event):
             self.show_values_var.set(not self.show_values_var.get())
-            self.visualize_advanced()
+            self.visualize()
         toggle_values_button.on_clicked(toggle_values)
         
         # Function to toggle between showing capacitors, resistors, or both
@@ -1655,7 +3616,7 @@ Res10,0.15,0.15,0.0,0.25,0.25,0.02,63.2,Ohm
                 self.show_capacitors_var.set(True)
                 self.show_resistors_var.set(True)
             
-            self.visualize_advanced()
+            self.visualize()
         toggle_components_button.on_clicked(toggle_components)
         
         # Function to save the figure
@@ -1678,29 +3639,154 @@ Res10,0.15,0.15,0.0,0.25,0.25,0.02,63.2,Ohm
                 
             file_path = os.path.join(output_dir, f"{base_filename}.png")
             
-            plt.savefig(file_path, dpi=300, bbox_inches='tight')
-            self.status_var.set(f"Figure saved as {file_path}")
-            messagebox.showinfo("Save Successful", f"Visualization saved to:\n{file_path}")
+            self.export_figure(file_path)
             
         save_button.on_clicked(save_figure)
         
         # Maximize the visualization area
         plt.subplots_adjust(left=0.02, right=0.98, top=0.95, bottom=0.15)
+        self.add_raster_layer(raster_sources)
+        self.add_value_labels(value_labels)
+        self.index_layer_artists(layer_sources)
+        self.picker = ScreenPicker(self.ax, pick_sources, self.get_projection())
+        self.apply_layer_slice(redraw=False)
+        self.update_selection_tool()
         self.canvas.draw()
         
         # Update status bar
         comp_count_text = []
         if self.data_df is not None and self.show_capacitors_var.get():
-            filtered_count = len(self.data_df[(self.data_df['Value'] >= self.min_cap_var.get()) & 
-                                           (self.data_df['Value'] <= self.max_cap_var.get())])
+            filtered_count = int(self.get_filter_mask("capacitor").sum())
             comp_count_text.append(f"{filtered_count} capacitors")
         if self.resistor_df is not None and self.show_resistors_var.get():
-            filtered_res_count = len(self.resistor_df[(self.resistor_df['Value'] >= self.min_res_var.get()) & 
-                                                   (self.resistor_df['Value'] <= self.max_res_var.get())])
+            filtered_res_count = int(self.get_filter_mask("resistor").sum())
             comp_count_text.append(f"{filtered_res_count} resistors")
             
         self.status_var.set(f"Advanced visualization created with {' and '.join(comp_count_text)}")
 
+    def on_canvas_hover(self, event):
+        """Show a tooltip with the name and value of the edge under the cursor."""
+        # While a button is held the view is being rotated or panned
+        if self.picker is None or event.inaxes is not self.ax or self.pick_press_xy is not None:
+            self.hide_pick_tooltip()
+            return
+        
+        picked = self.picker.pick(event.x, event.y)
+        if picked is None:
+            self.hide_pick_tooltip()
+            return
+        
+        # Matplotlib measures from the bottom left in physical pixels, Tk from the top left
+        scale = getattr(self.canvas, 'device_pixel_ratio', 1) or 1
+        self.pick_tooltip.configure(text=self.format_pick(picked))
+        self.pick_tooltip.place(x=event.x / scale + 12, y=(self.fig.bbox.height - event.y) / scale + 12)
+
+    def on_canvas_press(self, event):
+        """Remember where a mouse button went down to tell clicks from drags."""
+        self.pick_press_xy = (event.x, event.y)
+        self.hide_pick_tooltip()
+
+    def on_canvas_release(self, event):
+        """Report the edge under the cursor in the status bar on a click (press and release in place)."""
+        press_xy, self.pick_press_xy = self.pick_press_xy, None
+        if self.picker is None or press_xy is None or event.inaxes is not self.ax:
+            return
+        if abs(event.x - press_xy[0]) > 3 or abs(event.y - press_xy[1]) > 3:
+            return
+        
+        picked = self.picker.pick(event.x, event.y)
+        if picked is not None:
+            self.status_var.set("Picked " + self.format_pick(picked).replace("\n", ", "))
+
+    def update_selection_tool(self, event=None):
+        """Switch mouse drags on the 3D view between rotating and box or lasso selection."""
+        if self.selector is not None:
+            self.selector.set_active(False)
+            self.selector = None
+        if self.ax is None or self.picker is None:
+            return
+        
+        mode = self.selection_mode_var.get()
+        rotates = self.ax.name == '3d'  # The plan view pans and zooms with the toolbar instead
+        if mode == "Box Select":
+            if rotates:
+                self.ax.disable_mouse_rotation()
+            self.selector = RectangleSelector(self.ax, self.on_box_select, useblit=True, button=[1])
+        elif mode == "Lasso Select":
+            if rotates:
+                self.ax.disable_mouse_rotation()
+            self.selector = LassoSelector(self.ax, self.on_lasso_select, useblit=True, button=[1])
+        elif rotates:
+            self.ax.mouse_init()
+
+    def on_box_select(self, eclick, erelease):
+        """Select the edges inside the dragged rectangle."""
+        self.apply_selection(self.picker.select_box(eclick.x, eclick.y, erelease.x, erelease.y))
+
+    def on_lasso_select(self, vertices):
+        """Select the edges inside the lasso outline."""
+        # The lasso reports vertices in the projected data coordinates of the axes
+        self.apply_selection(self.picker.select_lasso(self.ax.transData.transform(vertices)))
+
+    def apply_selection(self, mask):
+        """Store the edges in mask as the current selection and summarize them."""
+        self.selection = self.picker.selected_frames(mask)
+        if not self.selection:
+            self.selection_summary_var.set("No edges in selection")
+            self.status_var.set("No edges in selection")
+            return
+        
+        lines = []
+        for kind, df in self.selection:
+            unit = df['Unit'].iloc[0] if 'Unit' in df.columns else ''
+            values = df['Value']
+            lines.append(
+                f"{kind}s: {len(df)}\n"
+                f"  Sum: {values.sum():.3e} {unit}, Mean: {values.mean():.3e}\n"
+                f"  Range: {values.min():.3e} - {values.max():.3e}"
+            )
+        self.selection_summary_var.set("\n".join(lines))
+        self.status_var.set("Selected " + " and ".join(f"{len(df)} {kind.lower()}s" for kind, df in self.selection))
+
+    def clear_selection(self):
+        """Forget the current selection."""
+        self.selection = []
+        self.selection_summary_var.set("No selection")
+
+    def export_selection(self):
+        """Save the selected edges to a CSV file."""
+        if not self.selection:
+            messagebox.showwarning("No Selection", "Please select edges with Box Select or Lasso Select first.")
+            return
+        
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".csv",
+            filetypes=[("CSV Files", "*.csv"), ("All Files", "*.*")],
+            title="Export Selection As"
+        )
+        
+        if file_path:
+            try:
+                if len(self.selection) == 1:
+                    # A single component type keeps the input format, so it can be loaded again
+                    export_df = self.selection[0][1]
+                else:
+                    export_df = pd.concat([df.assign(Component_Type=kind) for kind, df in self.selection], 
+                                          ignore_index=True)
+                export_df.to_csv(file_path, index=False)
+                self.status_var.set(f"Exported {len(export_df)} selected edges to {file_path}")
+            except Exception as e:
+                self.status_var.set(f"Error exporting selection: {str(e)}")
+                messagebox.showerror("Export Error", str(e))
+
+    def format_pick(self, picked):
+        """Format a picked edge as tooltip text."""
+        return f"{picked['kind']} {picked['name']}\nValue: {picked['value']:.4e} {picked['unit']}".rstrip()
+
+    def hide_pick_tooltip(self):
+        """Remove the hover tooltip from the canvas."""
+        self.pick_tooltip.place_forget()
+
     def _configure_canvas(self, event=None):
         """Configure the canvas scrolling region when the window is resized."""
         # Update the scrollregion to include all of the control frame
@@ -1755,6 +3841,8 @@ Res10,0.15,0.15,0.0,0.25,0.25,0.02,63.2,Ohm
 
 def main():
     """Main function to start the application."""
+    # Proximity analysis uses worker processes, which need this in a frozen app
+    multiprocessing.freeze_support()
     root = tk.Tk()
     app = CapacitorVisualizerApp(root)
     root.mainloop()
@@ -0,0 +1,115 @@
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+# Default memory budget of the process-wide cache
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+
+# Rows parsed per chunk by read_csv_chunked, between progress reports
+DEFAULT_CHUNK_ROWS = 500000
+
+def dataframe_bytes(df):
+    """Memory used by a DataFrame, including the contents of string columns."""
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+def read_csv_chunked(file_path, chunksize=DEFAULT_CHUNK_ROWS, progress=None, on_chunk=None):
+    """Read a whole CSV into memory in chunks, reporting progress between them.
+
+    Args:
+        file_path: CSV file to read
+        chunksize: Rows parsed per chunk
+        progress: Optional callback receiving the fraction of the file read
+            after each chunk; it may raise to abort the read
+        on_chunk: Optional callback receiving each parsed chunk, e.g. to
+            summarize a column in the same pass
+
+    Returns:
+        The DataFrame of the whole file.
+    """
+    chunks = []
+    size = os.path.getsize(file_path)
+    with open(file_path, 'rb') as f:
+        for chunk in pd.read_csv(f, chunksize=chunksize):
+            chunks.append(chunk)
+            if on_chunk is not None:
+                on_chunk(chunk)
+            if progress is not None:
+                progress(f.tell() / size if size else 1.0)
+
+    if not chunks:
+        return pd.read_csv(file_path)
+    return pd.concat(chunks, ignore_index=True)
+
+class DatasetCache:
+    """Parsed data files kept in memory, evicted least recently used first by memory.
+
+    Entries are keyed by absolute path, modification time and size, so a file
+    is parsed once for as long as it is cached and unchanged, and an edited
+    file is parsed again. Loaders run outside the lock; two threads asking for
+    the same uncached file may both parse it, and the last result is kept.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        """Initialize an empty cache holding at most max_bytes of DataFrames."""
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries = OrderedDict()  # key -> (data, bytes)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(file_path):
+        stat = os.stat(file_path)
+        return (os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size)
+
+    def get(self, file_path, loader):
+        """Return the cached data of file_path, calling loader(file_path) on a miss.
+
+        The loader returns either a DataFrame or a tuple whose first item is
+        the DataFrame; the whole result is cached and returned.
+        """
+        key = self._key(file_path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry[0]
+
+        data = loader(file_path)
+        size = dataframe_bytes(data[0] if isinstance(data, tuple) else data)
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.total_bytes -= previous[1]
+            self._entries[key] = (data, size)
+            self.total_bytes += size
+            self._evict()
+        return data
+
+    def _evict(self):
+        """Drop least recently used entries until the budget is met, always keeping the newest."""
+        while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+            _, (_, size) = self._entries.popitem(last=False)
+            self.total_bytes -= size
+
+    def __contains__(self, file_path):
+        try:
+            key = self._key(file_path)
+        except OSError:
+            return False
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        """Drop all entries."""
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+# Shared by every layout tab (and any other user) in this process
+dataset_cache = DatasetCache()
@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+
+from proximity import edge_endpoints
+
+# Relative value change at or below which a matched edge counts as unchanged
+DEFAULT_VALUE_TOLERANCE = 1e-6
+
+# Endpoint displacement at or below which a matched edge counts as not moved
+DEFAULT_MOVE_TOLERANCE = 1e-9
+
+def name_column(df):
+    """Name column of a capacitor or resistor DataFrame."""
+    return 'Capacitor_Name' if 'Capacitor_Name' in df.columns else 'Resistor_Name'
+
+def relative_changes(old_values, new_values):
+    """(new - old) / |old|, with +-inf for a value that changed from zero and 0 for unchanged zeros."""
+    delta = new_values - old_values
+    scale = np.abs(old_values)
+    changes = np.where(delta == 0, 0.0, np.copysign(np.inf, delta))
+    np.divide(delta, scale, out=changes, where=scale > 0)
+    return changes
+
+def endpoint_moves(old_df, new_df):
+    """Largest endpoint displacement of each edge between two row-aligned DataFrames.
+
+    An edge whose start and end were swapped by the extractor is not a move,
+    so the displacement is the smaller of the direct and the swapped pairing.
+    """
+    old_starts, old_ends = edge_endpoints(old_df)
+    new_starts, new_ends = edge_endpoints(new_df)
+    direct = np.maximum(np.linalg.norm(new_starts - old_starts, axis=1),
+                        np.linalg.norm(new_ends - old_ends, axis=1))
+    swapped = np.maximum(np.linalg.norm(new_starts - old_ends, axis=1),
+                         np.linalg.norm(new_ends - old_starts, axis=1))
+    return np.minimum(direct, swapped)
+
+def diff_datasets(old_df, new_df, value_tolerance=DEFAULT_VALUE_TOLERANCE,
+                  move_tolerance=DEFAULT_MOVE_TOLERANCE):
+    """Join two extractions of the same design by component name and compare them.
+
+    The old names are put in a hash index (``pd.Index.get_indexer``), so the
+    join is one linear pass over each file; value deltas and endpoint moves
+    are then computed on whole aligned arrays. When a name occurs more than
+    once in a file, its last occurrence is used.
+
+    Args:
+        old_df: Baseline capacitor or resistor DataFrame
+        new_df: DataFrame of the same component type to compare against it
+        value_tolerance: Largest relative value change treated as unchanged
+        move_tolerance: Largest endpoint displacement treated as unchanged
+
+    Returns:
+        Dictionary with row positions 'added' (new_df rows without a match),
+        'removed' (old_df rows without a match), the matched 'old_rows' and
+        'new_rows', and per matched pair the 'relative_change' of the value,
+        the 'move' distance, and the masks 'value_changed', 'moved' and
+        'changed' (either one). 'duplicates' counts the repeated names ignored.
+    """
+    old_column, new_column = name_column(old_df), name_column(new_df)
+    if old_column != new_column:
+        raise ValueError("Cannot compare a capacitor file with a resistor file")
+
+    old_names = old_df[old_column].astype(str)
+    new_names = new_df[new_column].astype(str)
+    old_duplicates = old_names.duplicated(keep='last').to_numpy()
+    new_duplicates = new_names.duplicated(keep='last').to_numpy()
+
+    old_unique = np.flatnonzero(~old_duplicates)
+    new_unique = np.flatnonzero(~new_duplicates)
+    index = pd.Index(old_names.to_numpy()[old_unique])
+    positions = index.get_indexer(new_names.to_numpy()[new_unique])
+
+    matched = positions >= 0
+    new_rows = new_unique[matched]
+    old_rows = old_unique[positions[matched]]
+
+    unmatched_old = np.ones(len(old_unique), dtype=bool)
+    unmatched_old[positions[matched]] = False
+
+    old_values = old_df['Value'].to_numpy(dtype=float)[old_rows]
+    new_values = new_df['Value'].to_numpy(dtype=float)[new_rows]
+    relative_change = relative_changes(old_values, new_values)
+    move = endpoint_moves(old_df.iloc[old_rows], new_df.iloc[new_rows])
+
+    value_changed = np.abs(relative_change) > value_tolerance
+    moved = move > move_tolerance
+
+    return {
+        'added': new_unique[~matched],
+        'removed': old_unique[unmatched_old],
+        'old_rows': old_rows,
+        'new_rows': new_rows,
+        'relative_change': relative_change,
+        'move': move,
+        'value_changed': value_changed,
+        'moved': moved,
+        'changed': value_changed | moved,
+        'duplicates': int(old_duplicates.sum() + new_duplicates.sum())
+    }
@@ -0,0 +1,119 @@
+import numpy as np
+
+# Cells along the longer side of a density grid
+DEFAULT_GRID_SIZE = 512
+
+# Segment samples accumulated per chunk, bounding the temporary arrays of segment mode
+DEFAULT_CHUNK_SAMPLES = 4000000
+
+def grid_shape(extent, size=DEFAULT_GRID_SIZE):
+    """(rows, columns) of a grid over extent (x0, x1, y0, y1) with square cells and size cells on the longer side."""
+    width, height = extent[1] - extent[0], extent[3] - extent[2]
+    if width <= 0 or height <= 0:
+        return size, size
+    if width >= height:
+        return max(int(round(size * height / width)), 1), size
+    return size, max(int(round(size * width / height)), 1)
+
+def midpoint_density(starts, ends, extent, shape, weights=None):
+    """Accumulate the X/Y midpoints of segments into a (rows, columns) grid.
+
+    Args:
+        starts: (N, 2+) segment starts; only X and Y are used
+        ends: (N, 2+) segment ends
+        extent: (x0, x1, y0, y1) covered by the grid; points outside are dropped
+        shape: (rows, columns) of the grid
+        weights: Optional (N,) weight per segment, e.g. its capacitance
+
+    Returns:
+        (rows, columns) array, row 0 at y0, as expected by ``imshow(origin='lower')``.
+    """
+    midpoints = (np.asarray(starts, dtype=float)[:, :2] + np.asarray(ends, dtype=float)[:, :2]) / 2
+    grid, _, _ = np.histogram2d(midpoints[:, 1], midpoints[:, 0], bins=shape,
+                                range=[[extent[2], extent[3]], [extent[0], extent[1]]], weights=weights)
+    return grid
+
+def clip_segments(starts, ends, extent):
+    """Clip 2D segments to a rectangle with the Liang-Barsky algorithm.
+
+    Args:
+        starts: (N, 2) segment starts
+        ends: (N, 2) segment ends
+        extent: (x0, x1, y0, y1) of the rectangle
+
+    Returns:
+        (t0, t1, inside): parameters along each segment (0 at its start, 1 at
+        its end) where the part inside the rectangle begins and ends, and a
+        boolean array marking the segments with a part inside. Segments with
+        non-finite endpoints are never inside.
+    """
+    x0, x1, y0, y1 = extent
+    delta = ends - starts
+    t0 = np.zeros(len(starts))
+    t1 = np.ones(len(starts))
+    inside = np.isfinite(starts).all(axis=1) & np.isfinite(ends).all(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for p, q in ((-delta[:, 0], starts[:, 0] - x0), (delta[:, 0], x1 - starts[:, 0]),
+                     (-delta[:, 1], starts[:, 1] - y0), (delta[:, 1], y1 - starts[:, 1])):
+            # p < 0: the segment enters through this edge, p > 0: it leaves, p == 0: it runs parallel
+            ratio = q / p
+            inside &= (p != 0) | (q >= 0)
+            t0 = np.where(p < 0, np.maximum(t0, ratio), t0)
+            t1 = np.where(p > 0, np.minimum(t1, ratio), t1)
+    inside &= t0 <= t1
+    return t0, t1, inside
+
+def segment_density(starts, ends, extent, shape, weights=None, chunk_samples=DEFAULT_CHUNK_SAMPLES):
+    """Accumulate whole segments into a (rows, columns) grid.
+
+    Each segment is sampled about once per cell it crosses and every sample
+    adds an equal share of the segment's weight, so a long wire spreads its
+    weight over the cells it covers instead of landing in one cell. Segments
+    are clipped to the extent first (``clip_segments``) and only the part
+    inside is sampled, with the matching fraction of the weight, so the cost
+    of a segment is bounded by the grid size however far the view is zoomed
+    in. The samples are generated and binned in chunks of about
+    chunk_samples so memory stays bounded for any number of segments.
+
+    Args and Returns are as for ``midpoint_density``.
+    """
+    rows, columns = shape
+    x0, x1, y0, y1 = extent
+    cell_w = (x1 - x0) / columns if x1 > x0 else 1.0
+    cell_h = (y1 - y0) / rows if y1 > y0 else 1.0
+
+    starts = np.asarray(starts, dtype=float)[:, :2]
+    ends = np.asarray(ends, dtype=float)[:, :2]
+    weights = np.ones(len(starts)) if weights is None else np.asarray(weights, dtype=float)
+
+    # Keep only the part of each segment inside the extent, with its share of the weight
+    t0, t1, inside = clip_segments(starts, ends, extent)
+    t0, t1 = t0[inside, None], t1[inside, None]
+    delta = ends[inside] - starts[inside]
+    starts, ends = starts[inside] + t0 * delta, starts[inside] + t1 * delta
+    weights = weights[inside] * (t1 - t0)[:, 0]
+
+    # About one sample per crossed cell, at least one per segment
+    cells = np.abs(ends[:, 0] - starts[:, 0]) / cell_w + np.abs(ends[:, 1] - starts[:, 1]) / cell_h
+    samples = np.ceil(cells).astype(np.int64) + 1
+
+    grid = np.zeros(rows * columns)
+    boundaries = np.searchsorted(np.cumsum(samples), np.arange(chunk_samples, samples.sum(), chunk_samples))
+    for chunk in np.split(np.arange(len(samples)), boundaries):
+        if len(chunk) == 0:
+            continue
+        counts = samples[chunk]
+        segment = np.repeat(chunk, counts)
+
+        # Position of each sample along its segment, at the centers of equal parts
+        first = np.cumsum(counts) - counts
+        t = (np.arange(len(segment)) - np.repeat(first, counts) + 0.5) / np.repeat(counts, counts)
+        points = starts[segment] + t[:, None] * (ends[segment] - starts[segment])
+
+        valid = (points[:, 0] >= x0) & (points[:, 0] <= x1) & (points[:, 1] >= y0) & (points[:, 1] <= y1)
+        column = np.minimum(np.floor((points[:, 0] - x0) / cell_w).astype(np.int64), columns - 1)
+        row = np.minimum(np.floor((points[:, 1] - y0) / cell_h).astype(np.int64), rows - 1)
+        grid += np.bincount(row[valid] * columns + column[valid],
+                            weights=(weights[segment] / np.repeat(counts, counts))[valid],
+                            minlength=rows * columns)
+    return grid.reshape(rows, columns)
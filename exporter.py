@@ -0,0 +1,444 @@
+import os
+import pickle
+import struct
+import zlib
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg, RendererAgg
+from matplotlib.collections import LineCollection
+from matplotlib.colors import to_rgba
+from matplotlib.lines import Line2D
+
+# Resolution of exported images
+DEFAULT_EXPORT_DPI = 300
+
+# Rows compressed and written per PNG band; bounds the temporary buffers of the encoder
+PNG_BAND_ROWS = 256
+
+# Margin kept around the drawn content when an export is trimmed, as with bbox_inches='tight'
+TIGHT_PAD_INCHES = 0.1
+
+# Formats written by matplotlib's vector backends, with the edge artists rasterized
+VECTOR_FORMATS = ('pdf', 'svg')
+
+# Share of the progress bar spent drawing the figure; the rest is writing the file
+RENDER_PROGRESS = 0.8
+
+# Resolution of tiled renders, for wall plots; 10x8 inch figures come out near 100 megapixels
+DEFAULT_TILED_DPI = 1200
+
+# Edge of the square tiles of a tiled render, in pixels; TIFF needs a multiple of 16
+DEFAULT_TILE_SIZE = 1024
+
+# Memory allowed for one row band of a tiled PNG render; bands get fewer rows on wide images
+DEFAULT_BAND_BYTES = 256 * 1024 ** 2
+
+# Classic TIFF offsets are 32-bit; larger images are written as BigTIFF
+CLASSIC_TIFF_MAX_BYTES = 2 ** 32 - 2 ** 26
+
+# Output formats of tiled renders, by file extension
+TILED_FORMATS = ('tif', 'tiff', 'png')
+
+class PngWriter:
+    """Writes an 8-bit RGBA PNG file one band of rows at a time.
+
+    Rows are compressed with a streaming zlib compressor and written as IDAT
+    chunks as soon as the compressor emits data, so neither the whole image
+    nor its compressed form has to be held in memory.
+    """
+
+    def __init__(self, file, width, height, compression=6):
+        """Write the PNG header to an open binary file.
+
+        Args:
+            file: File object opened for binary writing
+            width: Image width in pixels
+            height: Image height in pixels
+            compression: zlib compression level
+        """
+        self.file = file
+        self.width = width
+        self.height = height
+        self.rows_written = 0
+        self._compressor = zlib.compressobj(compression)
+        file.write(b'\x89PNG\r\n\x1a\n')
+        self._chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0))
+
+    def _chunk(self, kind, data):
+        self.file.write(struct.pack('>I', len(data)))
+        self.file.write(kind)
+        self.file.write(data)
+        self.file.write(struct.pack('>I', zlib.crc32(data, zlib.crc32(kind)) & 0xffffffff))
+
+    def write_rows(self, rows):
+        """Append (n, width, 4) uint8 rows, top row first."""
+        rows = np.ascontiguousarray(rows, dtype=np.uint8)
+        if rows.shape[1:] != (self.width, 4):
+            raise ValueError(f"Expected rows of {self.width} RGBA pixels, got shape {rows.shape}")
+
+        # Each scanline starts with its filter type; 0 stores the pixels unfiltered
+        scanlines = np.zeros((len(rows), 1 + self.width * 4), dtype=np.uint8)
+        scanlines[:, 1:] = rows.reshape(len(rows), -1)
+        data = self._compressor.compress(scanlines.tobytes())
+        if data:
+            self._chunk(b'IDAT', data)
+        self.rows_written += len(rows)
+
+    def close(self):
+        """Flush the compressor and write the end of the file."""
+        if self.rows_written != self.height:
+            raise ValueError(f"PNG has {self.height} rows but {self.rows_written} were written")
+        self._chunk(b'IDAT', self._compressor.flush())
+        self._chunk(b'IEND', b'')
+
+class TiffTileWriter:
+    """Writes an 8-bit RGBA tiled TIFF one deflate-compressed tile at a time.
+
+    Tiles may arrive in any order; their offsets are collected and the image
+    directory is written after the last tile, then linked from the header.
+    Images too large for 32-bit offsets are written as BigTIFF.
+    """
+
+    def __init__(self, file, width, height, tile_size=DEFAULT_TILE_SIZE, compression=6):
+        """Write the TIFF header to an open, seekable binary file.
+
+        Args:
+            file: File object opened for binary writing
+            width: Image width in pixels
+            height: Image height in pixels
+            tile_size: Tile edge in pixels, a multiple of 16
+            compression: zlib compression level
+        """
+        if tile_size % 16 != 0:
+            raise ValueError("TIFF tile size must be a multiple of 16")
+        self.file = file
+        self.width = width
+        self.height = height
+        self.tile_size = tile_size
+        self.compression = compression
+        self.tiles_across = -(-width // tile_size)
+        self.tiles_down = -(-height // tile_size)
+        self.offsets = np.zeros(self.tiles_across * self.tiles_down, dtype=np.uint64)
+        self.byte_counts = np.zeros(self.tiles_across * self.tiles_down, dtype=np.uint64)
+
+        self.big = width * height * 4 > CLASSIC_TIFF_MAX_BYTES
+        if self.big:
+            file.write(b'II' + struct.pack('<HHHQ', 43, 8, 0, 0))
+        else:
+            file.write(b'II' + struct.pack('<HI', 42, 0))
+
+    def write_tile(self, tile_row, tile_column, rgba):
+        """Write the (rows, columns, 4) uint8 pixels of one tile; edge tiles may be smaller than tile_size."""
+        tile = np.zeros((self.tile_size, self.tile_size, 4), dtype=np.uint8)
+        tile[:rgba.shape[0], :rgba.shape[1]] = rgba
+        data = zlib.compress(tile.tobytes(), self.compression)
+
+        index = tile_row * self.tiles_across + tile_column
+        self.offsets[index] = self.file.tell()
+        self.byte_counts[index] = len(data)
+        self.file.write(data)
+
+    def close(self):
+        """Write the image directory and link it from the header."""
+        # (tag, type, values); types 3 = SHORT, 4 = LONG, 16 = LONG8
+        offset_type = 16 if self.big else 4
+        entries = [
+            (256, 4, [self.width]),
+            (257, 4, [self.height]),
+            (258, 3, [8, 8, 8, 8]),
+            (259, 3, [8]),  # Deflate
+            (262, 3, [2]),  # RGB
+            (277, 3, [4]),
+            (284, 3, [1]),  # Samples interleaved
+            (322, 4, [self.tile_size]),
+            (323, 4, [self.tile_size]),
+            (324, offset_type, self.offsets),
+            (325, offset_type, self.byte_counts),
+            (338, 3, [2])  # Unassociated alpha
+        ]
+        formats = {3: 'H', 4: 'I', 16: 'Q'}
+        inline = 8 if self.big else 4
+
+        # Values that do not fit in their entry are written before the directory
+        fields = []
+        for tag, kind, values in entries:
+            data = np.asarray(values, dtype='<' + formats[kind]).tobytes()
+            if len(data) > inline:
+                if self.file.tell() % 2:
+                    self.file.write(b'\0')
+                position = self.file.tell()
+                self.file.write(data)
+                data = struct.pack('<Q' if self.big else '<I', position)
+            fields.append((tag, kind, len(values), data.ljust(inline, b'\0')))
+
+        if self.file.tell() % 2:
+            self.file.write(b'\0')
+        directory = self.file.tell()
+        if self.big:
+            self.file.write(struct.pack('<Q', len(fields)))
+            for tag, kind, count, data in fields:
+                self.file.write(struct.pack('<HHQ', tag, kind, count) + data)
+            self.file.write(struct.pack('<Q', 0))
+            self.file.seek(8)
+            self.file.write(struct.pack('<Q', directory))
+        else:
+            self.file.write(struct.pack('<H', len(fields)))
+            for tag, kind, count, data in fields:
+                self.file.write(struct.pack('<HHI', tag, kind, count) + data)
+            self.file.write(struct.pack('<I', 0))
+            self.file.seek(4)
+            self.file.write(struct.pack('<I', directory))
+        self.file.seek(0, os.SEEK_END)
+
+def snapshot_figure(fig):
+    """Pickled copy of a figure, taken on the GUI thread before exporting it elsewhere."""
+    return pickle.dumps(fig)
+
+def restore_figure(snapshot):
+    """Rebuild a pickled figure on an off-screen Agg canvas, safe to draw on a worker thread."""
+    fig = pickle.loads(snapshot)
+    FigureCanvasAgg(fig)
+    return fig
+
+def rasterize_edges(fig):
+    """Mark the edge lines and line collections of every axes to be drawn as images in vector output."""
+    for ax in fig.axes:
+        for artist in ax.lines + ax.collections:
+            if isinstance(artist, (Line2D, LineCollection)):
+                artist.set_rasterized(True)
+
+def track_progress(fig, report, start=0.0, end=1.0):
+    """Call report(fraction) while the artists of fig's axes are drawn.
+
+    Each artist's draw is wrapped on the instance, which the figure copy being
+    exported can afford; report may raise to abort the drawing.
+    """
+    artists = [artist for ax in fig.axes for artist in ax.get_children()]
+    step = max(len(artists) // 100, 1)
+    for count, artist in enumerate(artists, 1):
+        if count % step != 0 and count != len(artists):
+            continue
+
+        def draw(renderer, draw=artist.draw, count=count):
+            draw(renderer)
+            report(start + (end - start) * count / len(artists))
+        artist.draw = draw
+
+def tight_region(fig, renderer, pad_inches=TIGHT_PAD_INCHES):
+    """Pixel box (left, top, width, height) of fig that bbox_inches='tight' keeps.
+
+    Like ``savefig``, the box is the figure's tight bounding box measured with
+    renderer, padded by pad_inches and converted to display pixels at the
+    figure's dpi. Rows count from the top of the figure; the padding may reach
+    past its edges, where savefig shows the figure background.
+    """
+    height = int(round(fig.bbox.height))
+    tight = fig.dpi_scale_trans.transform_bbox(fig.get_tightbbox(renderer).padded(pad_inches))
+    left, right = int(np.floor(tight.x0)), int(np.ceil(tight.x1))
+    top, bottom = height - int(np.ceil(tight.y1)), height - int(np.floor(tight.y0))
+    return left, top, max(right - left, 1), max(bottom - top, 1)
+
+def crop_region(rgba, region, fill):
+    """Cut a (left, top, width, height) box out of an (H, W, 4) image, filling the parts outside it with fill."""
+    left, top, width, height = region
+    image_height, image_width = rgba.shape[:2]
+    if left >= 0 and top >= 0 and left + width <= image_width and top + height <= image_height:
+        return rgba[top:top + height, left:left + width]
+
+    cropped = np.empty((height, width, 4), dtype=rgba.dtype)
+    cropped[:] = fill
+    x0, y0 = max(left, 0), max(top, 0)
+    x1, y1 = min(left + width, image_width), min(top + height, image_height)
+    if x0 < x1 and y0 < y1:
+        cropped[y0 - top:y1 - top, x0 - left:x1 - left] = rgba[y0:y1, x0:x1]
+    return cropped
+
+def write_png(path, rgba, report=None, start=0.0, end=1.0):
+    """Write an (H, W, 4) uint8 image to a PNG file in bands of PNG_BAND_ROWS rows."""
+    height, width = rgba.shape[:2]
+    with open(path, 'wb') as file:
+        writer = PngWriter(file, width, height)
+        for top in range(0, height, PNG_BAND_ROWS):
+            writer.write_rows(rgba[top:top + PNG_BAND_ROWS])
+            if report is not None:
+                report(start + (end - start) * min(top + PNG_BAND_ROWS, height) / height)
+        writer.close()
+
+def export_snapshot(snapshot, file_path, dpi=DEFAULT_EXPORT_DPI, report=None):
+    """Draw a figure snapshot off-screen and save it, without touching the on-screen figure.
+
+    PNG files are drawn with Agg, cropped to the tight bounding box and written in
+    row bands. PDF and SVG keep text and axes as vectors but draw the edge
+    lines as embedded images, so files with many edges stay small and quick
+    to open. Other formats go through ``savefig``. The file is written under a
+    temporary name and renamed when complete, so a cancelled or failed export
+    leaves no partial file behind.
+
+    Args:
+        snapshot: Figure pickled with ``snapshot_figure``
+        file_path: Output path; the format is taken from its extension
+        dpi: Output resolution
+        report: Optional callable taking (fraction, message), e.g.
+            ``Job.report``; it may raise to cancel the export
+
+    Returns:
+        file_path
+    """
+    def progress(fraction, message="Rendering..."):
+        if report is not None:
+            report(fraction, message)
+
+    progress(0.0, "Copying figure...")
+    fig = restore_figure(snapshot)
+    fmt = os.path.splitext(file_path)[1].lstrip('.').lower() or 'png'
+    temp_path = f"{file_path}.part"
+    try:
+        if fmt == 'png':
+            track_progress(fig, progress, 0.0, RENDER_PROGRESS)
+            fig.set_dpi(dpi)
+            fig.canvas.draw()
+            background = np.round(np.asarray(to_rgba(fig.get_facecolor())) * 255).astype(np.uint8)
+            rgba = crop_region(np.asarray(fig.canvas.buffer_rgba()), tight_region(fig, fig.canvas.get_renderer()),
+                               background)
+            write_png(temp_path, rgba, lambda fraction: progress(fraction, "Writing PNG..."), RENDER_PROGRESS, 1.0)
+        else:
+            if fmt in VECTOR_FORMATS:
+                rasterize_edges(fig)
+            track_progress(fig, progress, 0.0, RENDER_PROGRESS)
+            fig.savefig(temp_path, format=fmt, dpi=dpi, bbox_inches='tight')
+        os.replace(temp_path, file_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    progress(1.0, "Saved")
+    return file_path
+
+class TiledRenderer:
+    """Draws a figure at a size too large for one canvas, one tile at a time.
+
+    The layout is fixed once at the full size: every axes keeps the pixel box
+    it has in the full image. 2D axes get an automatic aspect and no box
+    aspect, so they fill that box exactly; 3D axes only ever shrink their box
+    to a square, and the box they had at the full size already is one. A tile
+    is then drawn by shrinking the figure to the tile and shifting the axes
+    and figure texts by the tile's offset, so the 3D view matrix stays the
+    same for every tile (and the projection cache only reapplies the 2D
+    offset) while only a tile-sized canvas is ever allocated.
+    """
+
+    def __init__(self, fig, dpi, pad_inches=TIGHT_PAD_INCHES):
+        """Fix the layout of fig, a figure copy on an Agg canvas, at dpi.
+
+        Args:
+            fig: Figure to draw; it is modified and should be a copy
+            dpi: Output resolution
+            pad_inches: Margin kept around the drawn content
+        """
+        self.fig = fig
+        self.dpi = dpi
+        fig.set_dpi(dpi)
+        self.width, self.height = (int(round(size)) for size in fig.bbox.size)
+
+        self.axes_boxes = []
+        for ax in fig.axes:
+            ax.apply_aspect()
+            self.axes_boxes.append((ax, ax.get_position().frozen().bounds))
+        self.texts = [(text, fig.transFigure.transform(text.get_position())) for text in fig.texts
+                      if text.get_transform() is fig.transFigure]
+
+        # Trim to the drawn content as bbox_inches='tight' would; a 1x1 renderer is enough to measure text
+        self.region = tight_region(fig, RendererAgg(1, 1, dpi), pad_inches)
+
+        for ax in fig.axes:
+            if ax.name != '3d':
+                ax.set_aspect('auto')
+                ax.set_box_aspect(None)
+
+    def render(self, left, top, width, height):
+        """(height, width, 4) uint8 pixels of the full image from column left and row top (row 0 at the top)."""
+        fig = self.fig
+
+        # A hair over the tile size, so the canvas never rounds down to one pixel less
+        fig.set_size_inches((width + 0.01) / self.dpi, (height + 0.01) / self.dpi)
+        fig_width, fig_height = fig.bbox.size
+        bottom = self.height - top - height
+
+        for ax, (x, y, w, h) in self.axes_boxes:
+            ax.set_position([(x * self.width - left) / fig_width, (y * self.height - bottom) / fig_height,
+                             w * self.width / fig_width, h * self.height / fig_height])
+        for text, (x, y) in self.texts:
+            text.set_position(((x - left) / fig_width, (y - bottom) / fig_height))
+
+        fig.canvas.draw()
+        buffer = np.asarray(fig.canvas.buffer_rgba())
+        return buffer[buffer.shape[0] - height:, :width]
+
+def export_tiled(snapshot, file_path, dpi, report=None, tile_size=DEFAULT_TILE_SIZE,
+                 band_bytes=DEFAULT_BAND_BYTES):
+    """Render a figure snapshot at a very large size tile by tile and stream it to a file.
+
+    A ``.tif``/``.tiff`` path gets a tiled TIFF written tile by tile; a
+    ``.png`` path gets a PNG written one row band at a time, with as many
+    rows per band as fit in band_bytes. Memory stays bounded by one tile (or
+    one band) whatever the output size. As in ``export_snapshot``, the file
+    is written under a temporary name and renamed when complete.
+
+    Args:
+        snapshot: Figure pickled with ``snapshot_figure``
+        file_path: Output path ending in .tif, .tiff or .png
+        dpi: Output resolution
+        report: Optional callable taking (fraction, message); it may raise
+            to cancel the render
+        tile_size: Tile edge in pixels
+        band_bytes: Memory allowed for one PNG row band
+
+    Returns:
+        (file_path, width, height) of the written image.
+    """
+    fmt = os.path.splitext(file_path)[1].lstrip('.').lower()
+    if fmt not in TILED_FORMATS:
+        raise ValueError("Tiled renders are written as TIFF (.tif) or PNG (.png) files")
+
+    def progress(fraction, message):
+        if report is not None:
+            report(fraction, message)
+
+    progress(0.0, "Copying figure...")
+    renderer = TiledRenderer(restore_figure(snapshot), dpi)
+    left, top, width, height = renderer.region
+
+    # PNG bands span the whole width, so wide images get shorter bands
+    band_rows = tile_size if fmt != 'png' else int(np.clip(band_bytes // (width * 4), 1, tile_size))
+    columns = range(0, width, tile_size)
+    rows = range(0, height, band_rows)
+    total = len(columns) * len(rows)
+
+    temp_path = f"{file_path}.part"
+    try:
+        with open(temp_path, 'wb') as file:
+            if fmt == 'png':
+                writer = PngWriter(file, width, height)
+            else:
+                writer = TiffTileWriter(file, width, height, tile_size)
+
+            done = 0
+            for tile_row, y in enumerate(rows):
+                rows_here = min(band_rows, height - y)
+                band = np.empty((rows_here, width, 4), dtype=np.uint8) if fmt == 'png' else None
+                for tile_column, x in enumerate(columns):
+                    columns_here = min(tile_size, width - x)
+                    tile = renderer.render(left + x, top + y, columns_here, rows_here)
+                    if band is not None:
+                        band[:, x:x + columns_here] = tile
+                    else:
+                        writer.write_tile(tile_row, tile_column, tile)
+                    done += 1
+                    progress(done / total, f"Rendering tile {done} of {total}...")
+                if band is not None:
+                    writer.write_rows(band)
+            writer.close()
+        os.replace(temp_path, file_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return file_path, width, height
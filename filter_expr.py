@@ -0,0 +1,296 @@
+import fnmatch
+import json
+import operator
+import os
+import re
+
+import numpy as np
+
+from outliers import edge_lengths
+from layers import layer_bounds
+
+# Saved filter presets, shared by all sessions of the current user
+PRESETS_FILE = os.path.join(os.path.expanduser("~"), ".capacitor_visualizer_filters.json")
+
+TOKEN_PATTERN = re.compile(r"""\s*(?:
+    (?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?) |
+    (?P<string>'[^']*'|"[^"]*") |
+    (?P<word>[A-Za-z_][A-Za-z_0-9]*) |
+    (?P<op><=|>=|==|!=|<|>|~|\(|\)|,|-)
+)""", re.VERBOSE)
+
+KEYWORDS = ("and", "or", "not", "in")
+
+COMPARISONS = {
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+    '==': operator.eq,
+    '!=': operator.ne,
+}
+
+def _column(name):
+    return lambda df: df[name].to_numpy(dtype=float)
+
+def _midpoint(axis):
+    return lambda df: (df[f'Start_{axis}'].to_numpy(dtype=float) + df[f'End_{axis}'].to_numpy(dtype=float)) / 2
+
+def _names(df):
+    name_col = 'Capacitor_Name' if 'Capacitor_Name' in df.columns else 'Resistor_Name'
+    return df[name_col].astype(str)
+
+# Fields usable in expressions: x/y/z are edge midpoints, x0.../x1... the start and end nodes
+NUMERIC_FIELDS = {
+    'value': _column('Value'),
+    'length': edge_lengths,
+    'x': _midpoint('X'),
+    'y': _midpoint('Y'),
+    'z': _midpoint('Z'),
+    'x0': _column('Start_X'),
+    'y0': _column('Start_Y'),
+    'z0': _column('Start_Z'),
+    'x1': _column('End_X'),
+    'y1': _column('End_Y'),
+    'z1': _column('End_Z'),
+}
+TEXT_FIELDS = {
+    'name': _names,
+}
+
+class _Fields:
+    """Lazily computed field arrays of one DataFrame, each computed at most once per evaluation."""
+
+    def __init__(self, df, layers):
+        self.df = df
+        self.layers = layers
+        self._cache = {}
+
+    def __getitem__(self, name):
+        if name not in self._cache:
+            getter = NUMERIC_FIELDS.get(name) or TEXT_FIELDS[name]
+            self._cache[name] = getter(self.df)
+        return self._cache[name]
+
+class FilterExpression:
+    """A parsed filter expression, compiled to vectorized NumPy operations.
+
+    The language combines comparisons with ``and``, ``or``, ``not`` and
+    parentheses, for example::
+
+        value > 1e-3 and z in layer(2) and length < 0.05 and name ~ 'GateLine*'
+
+    Numeric fields are ``value``, ``length``, ``x``, ``y``, ``z`` (edge
+    midpoint), ``x0``, ``y0``, ``z0`` (start node) and ``x1``, ``y1``, ``z1``
+    (end node); they support ``<``, ``<=``, ``>``, ``>=``, ``==``, ``!=``,
+    ``in range(lo, hi)`` and ``in layer(n)`` / ``in layer(first, last)``,
+    where layers are the Z layers of the loaded data (see ``layers.find_layers``)
+    numbered from 0 at the bottom; the two layers of a range may come in
+    either order.
+    The ``name`` field supports ``==``, ``!=`` and ``~``, which finds a
+    wildcard pattern (``*``, ``?``, ``[...]``) anywhere in the name, so
+    ``'GateLine*'`` matches ``A26GateLine_0_3``.
+
+    Parsing happens once in the constructor; ``evaluate`` only runs the
+    compiled operations on whole columns.
+
+    Raises:
+        ValueError: If the text is not a valid expression
+    """
+
+    def __init__(self, text):
+        """Parse and compile an expression."""
+        self.text = text
+        self._tokens = self._tokenize(text)
+        self._position = 0
+        self._evaluate = self._parse_or()
+        if self._peek() is not None:
+            self._error(f"unexpected '{self._peek()[1]}'")
+
+    def evaluate(self, df, layers=None):
+        """Return the boolean mask of the rows of df matching the expression.
+
+        Args:
+            df: Capacitor or resistor DataFrame
+            layers: (L, 2) layer bounds used by layer(), from ``layer_bounds``;
+                computed from df alone when None
+        """
+        fields = _Fields(df, layer_bounds(df) if layers is None else layers)
+        return np.broadcast_to(np.asarray(self._evaluate(fields), dtype=bool), (len(df),)).copy()
+
+    def _tokenize(self, text):
+        """Split the text into (kind, text, offset) tokens."""
+        tokens = []
+        position = 0
+        text = text.rstrip()
+        while position < len(text):
+            match = TOKEN_PATTERN.match(text, position)
+            if match is None:
+                raise ValueError(f"Invalid filter expression at position {position}: '{text[position:position + 10]}'")
+            kind = match.lastgroup
+            token = match.group(kind)
+            offset = match.start(kind)
+            if kind == 'word' and token.lower() in KEYWORDS:
+                kind, token = 'keyword', token.lower()
+            tokens.append((kind, token, offset))
+            position = match.end()
+        return tokens
+
+    def _peek(self):
+        return self._tokens[self._position] if self._position < len(self._tokens) else None
+
+    def _error(self, message, token=None):
+        token = token or self._peek()
+        where = f"position {token[2]}" if token is not None else "end of expression"
+        raise ValueError(f"Invalid filter expression at {where}: {message}")
+
+    def _accept(self, kind, text=None):
+        """Consume and return the next token if it matches, otherwise return None."""
+        token = self._peek()
+        if token is not None and token[0] == kind and (text is None or token[1] == text):
+            self._position += 1
+            return token
+        return None
+
+    def _expect(self, kind, text=None, description=None):
+        token = self._accept(kind, text)
+        if token is None:
+            self._error(f"expected {description or text or kind}")
+        return token
+
+    def _parse_or(self):
+        terms = [self._parse_and()]
+        while self._accept('keyword', 'or'):
+            terms.append(self._parse_and())
+        if len(terms) == 1:
+            return terms[0]
+        return lambda fields: np.logical_or.reduce([term(fields) for term in terms])
+
+    def _parse_and(self):
+        terms = [self._parse_not()]
+        while self._accept('keyword', 'and'):
+            terms.append(self._parse_not())
+        if len(terms) == 1:
+            return terms[0]
+        return lambda fields: np.logical_and.reduce([term(fields) for term in terms])
+
+    def _parse_not(self):
+        if self._accept('keyword', 'not'):
+            term = self._parse_not()
+            return lambda fields: np.logical_not(term(fields))
+        return self._parse_comparison()
+
+    def _parse_comparison(self):
+        if self._accept('op', '('):
+            term = self._parse_or()
+            self._expect('op', ')')
+            return term
+
+        left, left_type = self._parse_operand()
+
+        if self._accept('keyword', 'in'):
+            if left_type != 'number':
+                self._error("'in' needs a numeric field")
+            return self._parse_membership(left)
+
+        if self._accept('op', '~'):
+            if left_type != 'text':
+                self._error("'~' needs the name field")
+            pattern = self._expect('string', description="a quoted pattern")[1][1:-1]
+            # A search, not a whole-name match: the pattern may start anywhere in the name
+            regex = fnmatch.translate(f"*{pattern}*")
+            return lambda fields: left(fields).str.match(regex).to_numpy(dtype=bool)
+
+        token = self._peek()
+        if token is None or token[0] != 'op' or token[1] not in COMPARISONS:
+            self._error("expected a comparison")
+        self._position += 1
+        compare = COMPARISONS[token[1]]
+
+        right, right_type = self._parse_operand()
+        if left_type != right_type:
+            self._error("cannot compare text with a number")
+        if left_type == 'text' and token[1] not in ('==', '!='):
+            self._error("names only support ==, != and ~")
+        return lambda fields: np.asarray(compare(left(fields), right(fields)))
+
+    def _parse_operand(self):
+        """Parse a field or literal, returning (function of the fields, 'number' or 'text')."""
+        negative = self._accept('op', '-') is not None
+
+        token = self._accept('number')
+        if token is not None:
+            value = -float(token[1]) if negative else float(token[1])
+            return (lambda fields: value), 'number'
+        if negative:
+            self._error("expected a number after '-'")
+
+        token = self._accept('string')
+        if token is not None:
+            text = token[1][1:-1]
+            return (lambda fields: text), 'text'
+
+        token = self._accept('word')
+        if token is not None:
+            name = token[1].lower()
+            if name in NUMERIC_FIELDS:
+                return (lambda fields: fields[name]), 'number'
+            if name in TEXT_FIELDS:
+                return (lambda fields: fields[name]), 'text'
+            self._error(f"unknown field '{token[1]}'", token)
+
+        self._error("expected a field or value")
+
+    def _parse_number_arguments(self):
+        """Parse '(a[, b])' and return the numbers."""
+        self._expect('op', '(')
+        arguments = []
+        while True:
+            negative = self._accept('op', '-') is not None
+            value = float(self._expect('number', description="a number")[1])
+            arguments.append(-value if negative else value)
+            if not self._accept('op', ','):
+                break
+        self._expect('op', ')')
+        return arguments
+
+    def _parse_membership(self, left):
+        token = self._expect('word', description="layer(...) or range(...)")
+        function = token[1].lower()
+        arguments = self._parse_number_arguments()
+
+        if function == 'range':
+            if len(arguments) != 2:
+                self._error("range() takes a lower and an upper bound", token)
+            low, high = arguments
+            return lambda fields: (left(fields) >= low) & (left(fields) <= high)
+
+        if function == 'layer':
+            if len(arguments) not in (1, 2) or any(argument != int(argument) for argument in arguments):
+                self._error("layer() takes one or two layer numbers", token)
+            first, last = sorted((int(arguments[0]), int(arguments[-1])))
+
+            def in_layers(fields):
+                if first < 0 or last >= len(fields.layers):
+                    raise ValueError(f"Layer {first if first < 0 else last} does not exist; "
+                                     f"the data has layers 0 to {len(fields.layers) - 1}")
+                values = left(fields)
+                return (values >= fields.layers[first, 0]) & (values <= fields.layers[last, 1])
+
+            return in_layers
+
+        self._error(f"unknown function '{token[1]}'", token)
+
+def load_presets(file_path=PRESETS_FILE):
+    """Load the saved {name: expression} presets; missing or unreadable files give no presets."""
+    try:
+        with open(file_path) as f:
+            presets = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return {str(name): str(text) for name, text in presets.items()} if isinstance(presets, dict) else {}
+
+def save_presets(presets, file_path=PRESETS_FILE):
+    """Write the {name: expression} presets."""
+    with open(file_path, 'w') as f:
+        json.dump(presets, f, indent=2, sort_keys=True)
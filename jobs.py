@@ -0,0 +1,144 @@
+import queue
+import threading
+
+# How often the Tk thread drains the progress queue of a running job
+POLL_INTERVAL_MS = 100
+
+class JobCancelled(Exception):
+    """Raised inside a job once it has been asked to stop."""
+
+class Job:
+    """Handle a background job uses to report progress and notice cancellation.
+
+    Job functions call ``report`` between units of work; it posts the progress
+    to the runner's queue and raises ``JobCancelled`` if Cancel was pressed, so
+    the job unwinds at the next checkpoint without any extra code.
+    """
+
+    def __init__(self, name, updates):
+        """Create a job that posts to the updates queue."""
+        self.name = name
+        self._updates = updates
+        self._cancel_event = threading.Event()
+
+    @property
+    def cancelled(self):
+        """Whether the job has been asked to stop."""
+        return self._cancel_event.is_set()
+
+    def cancel(self):
+        """Ask the job to stop at its next checkpoint."""
+        self._cancel_event.set()
+
+    def check_cancelled(self):
+        """Raise ``JobCancelled`` if the job has been asked to stop."""
+        if self._cancel_event.is_set():
+            raise JobCancelled(self.name)
+
+    def report(self, fraction, message=None):
+        """Post progress (0 to 1) with an optional stage message, then check for cancellation."""
+        self._updates.put(('progress', self, min(max(fraction, 0.0), 1.0), message))
+        self.check_cancelled()
+
+class JobRunner:
+    """Runs one job at a time on a worker thread and relays its events to Tk.
+
+    The worker only talks to the Tk thread through a thread-safe queue, which is
+    drained with ``root.after`` polling; all callbacks run on the Tk thread.
+    ``on_done`` may keep working on the Tk thread (e.g. drawing) and still call
+    ``check_cancelled`` on the job, which stays current until it returns.
+    """
+
+    def __init__(self, root, on_progress, on_finish, poll_interval=POLL_INTERVAL_MS):
+        """Initialize the runner.
+
+        Args:
+            root: Tk root used for polling
+            on_progress: Called with (job, fraction, message) for each report
+            on_finish: Called with (job, outcome) when a job ends, where
+                outcome is 'done', 'cancelled' or 'error'
+            poll_interval: Queue polling interval in milliseconds
+        """
+        self.root = root
+        self.on_progress = on_progress
+        self.on_finish = on_finish
+        self.poll_interval = poll_interval
+        self.updates = queue.Queue()
+        self.job = None
+        self._callbacks = None
+
+    @property
+    def busy(self):
+        """Whether a job is running."""
+        return self.job is not None
+
+    def start(self, name, work, on_done=None, on_error=None):
+        """Run work(job) on a worker thread.
+
+        Args:
+            name: Job name shown in progress messages
+            work: Function of the ``Job`` handle; its return value is passed
+                to on_done
+            on_done: Called on the Tk thread with the result
+            on_error: Called on the Tk thread with the exception if work fails
+
+        Returns:
+            The ``Job``, or None if another job is still running.
+        """
+        if self.job is not None:
+            return None
+
+        self.job = Job(name, self.updates)
+        self._callbacks = (on_done, on_error)
+        threading.Thread(target=self._run, args=(self.job, work), daemon=True).start()
+        self.root.after(self.poll_interval, self._poll)
+        return self.job
+
+    def cancel(self):
+        """Ask the running job, if any, to stop."""
+        if self.job is not None:
+            self.job.cancel()
+
+    def _run(self, job, work):
+        """Worker thread body: run the job and post its outcome."""
+        try:
+            result = work(job)
+        except JobCancelled:
+            self.updates.put(('cancelled', job, None, None))
+        except Exception as e:
+            self.updates.put(('error', job, e, None))
+        else:
+            self.updates.put(('done', job, result, None))
+
+    def _poll(self):
+        """Deliver queued events on the Tk thread and keep polling while the job runs."""
+        while True:
+            try:
+                kind, job, payload, message = self.updates.get_nowait()
+            except queue.Empty:
+                break
+            if job is not self.job:
+                continue  # Left over from an earlier job
+            if kind == 'progress':
+                self.on_progress(job, payload, message)
+            else:
+                self._finish(job, kind, payload)
+                return
+
+        self.root.after(self.poll_interval, self._poll)
+
+    def _finish(self, job, kind, payload):
+        """Run the completion callbacks and release the runner."""
+        on_done, on_error = self._callbacks
+        outcome = kind
+        try:
+            if kind == 'done' and on_done is not None:
+                on_done(payload)
+            elif kind == 'error' and on_error is not None:
+                on_error(payload)
+        except JobCancelled:
+            outcome = 'cancelled'
+        finally:
+            self.job = None
+            self._callbacks = None
+            self.on_finish(job, outcome)
@@ -0,0 +1,122 @@
+import numpy as np
+
+# Neighbouring Z values closer than this fraction of the total Z extent belong to the same layer
+LAYER_GAP_FRACTION = 0.005
+
+def find_layers(z_values, gap_fraction=LAYER_GAP_FRACTION):
+    """Group Z coordinates into layers.
+
+    Extracted coordinates of one metal layer scatter slightly around its
+    nominal height, so sorted distinct values are split wherever the gap to the
+    next value exceeds gap_fraction of the total extent.
+
+    Returns:
+        (L, 2) array of [lowest, highest] Z of each layer, from bottom to top.
+    """
+    z = np.unique(np.asarray(z_values, dtype=float))
+    if len(z) == 0:
+        return np.empty((0, 2))
+
+    breaks = np.flatnonzero(np.diff(z) > gap_fraction * (z[-1] - z[0])) + 1
+    lows = z[np.concatenate([[0], breaks])]
+    highs = z[np.concatenate([breaks - 1, [len(z) - 1]])]
+    return np.column_stack([lows, highs])
+
+def layer_bounds(*dfs):
+    """Layers of the edge endpoints of all given DataFrames (None entries are skipped)."""
+    z_values = [df[column].to_numpy(dtype=float) for df in dfs if df is not None
+                for column in ('Start_Z', 'End_Z')]
+    return find_layers(np.concatenate(z_values) if z_values else [])
+
+def layer_key_range(first, last=None, via=False):
+    """Range of ``LayerIndex`` keys selecting layers first..last, or the via level above layer first.
+
+    A layer range includes the vias between its layers, but not those leaving it.
+    """
+    if via:
+        return 2 * first + 1, 2 * first + 1
+    last = first if last is None else last
+    return 2 * min(first, last), 2 * max(first, last)
+
+def plan_polyline(starts, ends):
+    """Join (N, 2) segment ends into one (3N, 2) polyline with NaN breaks between the segments."""
+    points = np.full((len(starts), 3, 2), np.nan)
+    points[:, 0] = starts
+    points[:, 1] = ends
+    return points.reshape(-1, 2)
+
+def plan_polylines(starts, ends, keys, color_ids, num_colors, max_edges):
+    """Group edges by layer key and color into NaN-separated X/Y polylines.
+
+    Args:
+        starts: (N, 2) or (N, 3) start points; only X and Y are used
+        ends: End points like starts
+        keys: ``LayerIndex`` key of each edge
+        color_ids: Palette index of each edge, clipped to 0..num_colors - 1
+        num_colors: Number of palette colors
+        max_edges: Most edges joined into one polyline; larger groups are split
+
+    Returns:
+        List of (key, color id, polyline) tuples ordered by key and then color,
+        so drawing them in order stacks upper layers over lower ones. Edges
+        keep their order within a group.
+    """
+    keys = np.asarray(keys, dtype=np.int64)
+    group_ids = keys * num_colors + np.clip(np.asarray(color_ids, dtype=np.int64), 0, num_colors - 1)
+    order = np.argsort(group_ids, kind='stable')
+    bounds = np.flatnonzero(np.diff(group_ids[order])) + 1
+
+    polylines = []
+    for group in np.split(order, bounds):
+        if len(group) == 0:
+            continue
+        key, color_id = divmod(int(group_ids[group[0]]), num_colors)
+        for chunk_start in range(0, len(group), max_edges):
+            chunk = group[chunk_start:chunk_start + max_edges]
+            polylines.append((key, color_id, plan_polyline(starts[chunk, :2], ends[chunk, :2])))
+    return polylines
+
+class LayerIndex:
+    """Edges of one DataFrame grouped by the layers they lie in, in one sorted order.
+
+    An edge with both endpoints in layer n gets key 2n; an edge running from
+    layer n up to a higher layer is a via with key 2n + 1. Rows are sorted by
+    key once, so the rows of any single layer, via level or contiguous range
+    of layers (with the vias between them) are one slice of ``order``, found
+    from the precomputed ``offsets``.
+    """
+
+    def __init__(self, df, bounds):
+        """Assign every edge of df to a layer or via level.
+
+        Args:
+            df: Capacitor or resistor DataFrame
+            bounds: (L, 2) layer bounds from ``find_layers`` or ``layer_bounds``
+        """
+        self.bounds = np.asarray(bounds, dtype=float)
+        start_layers = self.layer_of(df['Start_Z'].to_numpy(dtype=float))
+        end_layers = self.layer_of(df['End_Z'].to_numpy(dtype=float))
+        low = np.minimum(start_layers, end_layers)
+        self.keys = 2 * low + (np.maximum(start_layers, end_layers) > low)
+        self.order = np.argsort(self.keys, kind='stable')
+        self.offsets = np.searchsorted(self.keys[self.order], np.arange(2 * len(self.bounds) + 1))
+
+    @property
+    def num_layers(self):
+        """Number of layers."""
+        return len(self.bounds)
+
+    def layer_of(self, z_values):
+        """Layer number of each Z value (values between layers belong to the one below)."""
+        if len(self.bounds) == 0:
+            return np.zeros(len(z_values), dtype=int)
+        layers = np.searchsorted(self.bounds[:, 0], z_values, side='right') - 1
+        return np.clip(layers, 0, len(self.bounds) - 1)
+
+    def rows(self, first_key, last_key):
+        """Rows with keys from first_key to last_key, in row order within each key."""
+        first_key = max(first_key, 0)
+        last_key = min(last_key, len(self.offsets) - 2)
+        if first_key > last_key:
+            return self.order[:0]
+        return self.order[self.offsets[first_key]:self.offsets[last_key + 1]]
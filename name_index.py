@@ -0,0 +1,56 @@
+import fnmatch
+import re
+
+import numpy as np
+
+# Characters that turn a search into a shell-style wildcard pattern
+WILDCARD_CHARS = "*?["
+
+class NameIndex:
+    """Sorted index over component names for prefix and wildcard search.
+
+    Names are sorted once; a prefix query is two ``searchsorted`` calls on the
+    sorted array. Wildcard patterns (``*``, ``?`` and ``[...]`` as in fnmatch)
+    are narrowed to the range sharing their literal prefix before the pattern
+    is matched, so a query like ``A26Gate*_3`` only tests the A26Gate names.
+    Results are row positions into the array the index was built from.
+    """
+
+    def __init__(self, names):
+        """Sort the names.
+
+        Args:
+            names: Sequence of component names, one per DataFrame row
+        """
+        names = np.asarray(names).astype(str)
+        self.order = np.argsort(names, kind='stable')
+        self.sorted_names = names[self.order]
+
+    def _prefix_range(self, prefix):
+        """Slice bounds of the sorted names starting with prefix."""
+        if not prefix:
+            return 0, len(self.sorted_names)
+        lo = np.searchsorted(self.sorted_names, prefix, side='left')
+
+        # Every name with the prefix sorts before the prefix with its last character bumped
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        hi = np.searchsorted(self.sorted_names, upper, side='left')
+        return lo, hi
+
+    def prefix(self, prefix):
+        """Rows whose name starts with prefix, in name order."""
+        lo, hi = self._prefix_range(prefix)
+        return self.order[lo:hi]
+
+    def search(self, query):
+        """Rows matching a prefix query or, if it contains wildcards, a whole-name pattern."""
+        query = query.strip()
+        wildcard_at = min((query.find(char) for char in WILDCARD_CHARS if char in query), default=-1)
+        if wildcard_at < 0:
+            return self.prefix(query)
+
+        lo, hi = self._prefix_range(query[:wildcard_at])
+        matcher = re.compile(fnmatch.translate(query)).match
+        hits = np.fromiter((matcher(name) is not None for name in self.sorted_names[lo:hi]),
+                           dtype=bool, count=hi - lo)
+        return self.order[lo:hi][hits]
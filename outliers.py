@@ -0,0 +1,79 @@
+import numpy as np
+
+# Modified z-score above which a value is flagged (Iglewicz and Hoaglin)
+DEFAULT_OUTLIER_THRESHOLD = 3.5
+
+# Values spanning more than this ratio are analysed in log space
+LOG_RANGE_RATIO = 100
+
+# Scale factors turning MAD and IQR into standard-deviation estimates for normal data
+MAD_SCALE = 1.4826
+IQR_SCALE = 1.0 / 1.349
+
+def edge_lengths(df):
+    """Return the Euclidean length of every edge."""
+    delta = (df[['End_X', 'End_Y', 'End_Z']].to_numpy(dtype=float)
+             - df[['Start_X', 'Start_Y', 'Start_Z']].to_numpy(dtype=float))
+    return np.sqrt(np.einsum('ij,ij->i', delta, delta))
+
+def _uses_log_space(column):
+    """Check whether a column is strictly positive and spans a wide range."""
+    low = column.min()
+    return low > 0 and column.max() / low > LOG_RANGE_RATIO
+
+def robust_scores(columns):
+    """Robust z-scores of each column of an (N, K) array in one vectorized pass.
+
+    Columns that are strictly positive and span more than ``LOG_RANGE_RATIO``
+    are transformed to log10 first. Each column is centered on its median and
+    scaled by its median absolute deviation; when the MAD is zero (more than
+    half the values identical) the interquartile range is used instead.
+
+    Returns:
+        Tuple of (scores, log_space) where scores is an (N, K) array of
+        absolute robust z-scores and log_space flags the transformed columns.
+    """
+    columns = np.asarray(columns, dtype=float)
+    log_space = np.array([len(columns) > 0 and _uses_log_space(columns[:, k]) for k in range(columns.shape[1])])
+    transformed = np.where(log_space, np.log10(np.where(log_space, columns, 1.0)), columns)
+
+    if len(transformed) == 0:
+        return np.zeros_like(transformed), log_space
+
+    median = np.median(transformed, axis=0)
+    deviation = np.abs(transformed - median)
+    scale = MAD_SCALE * np.median(deviation, axis=0)
+
+    # Fall back to the IQR where the MAD collapses to zero
+    needs_iqr = scale <= 0
+    if np.any(needs_iqr):
+        q1, q3 = np.percentile(transformed[:, needs_iqr], [25, 75], axis=0)
+        scale[needs_iqr] = IQR_SCALE * (q3 - q1)
+
+    # Columns with no spread at all have no outliers
+    scores = np.divide(deviation, scale, out=np.zeros_like(deviation), where=scale > 0)
+    return scores, log_space
+
+def find_outliers(df, threshold=DEFAULT_OUTLIER_THRESHOLD):
+    """Flag edges whose value or length is a robust-statistics outlier.
+
+    Args:
+        df: Capacitor or resistor DataFrame
+        threshold: Robust z-score above which an edge is flagged
+
+    Returns:
+        Dictionary with boolean masks 'value' and 'length', their union 'any',
+        the per-edge 'score' (largest of the two z-scores) and 'log_space'
+        flags for the value and length columns.
+    """
+    columns = np.column_stack([df['Value'].to_numpy(dtype=float), edge_lengths(df)])
+    scores, log_space = robust_scores(columns)
+    flagged = scores > threshold
+
+    return {
+        'value': flagged[:, 0],
+        'length': flagged[:, 1],
+        'any': flagged.any(axis=1),
+        'score': scores.max(axis=1),
+        'log_space': log_space
+    }
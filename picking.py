@@ -0,0 +1,142 @@
+import numpy as np
+from matplotlib.path import Path
+
+from projection import ProjectionCache, project_points
+from spatial_index import SpatialIndex
+
+# Largest cursor distance, in display pixels, at which an edge is picked
+DEFAULT_PICK_RADIUS = 6.0
+
+def project_to_screen(ax, points):
+    """Project (N, 3) data coordinates to (N, 2) display pixels of a 3D axes (or a 2D axes, ignoring Z)."""
+    return project_points(ax, points)[0]
+
+class ScreenPicker:
+    """Finds the drawn edges under the cursor or inside a screen region of an axes.
+
+    The edge endpoints are taken from a ``ProjectionCache`` of the axes and
+    indexed with a ``SpatialIndex`` over the flat screen coordinates, so a
+    hover lookup only tests the few edges in the cells around the cursor. Box
+    and lasso selections test the same projected endpoints as whole arrays.
+    The screen index is rebuilt on the first lookup after the cache
+    reprojected for a new view (or after ``invalidate``). Edges hidden with
+    ``set_visible`` are never picked or selected.
+    """
+
+    def __init__(self, ax, sources, projection=None):
+        """Collect the edges that can be picked.
+
+        Args:
+            ax: 3D or plan-view axes the edges are drawn on
+            sources: List of (kind, df, name_column) tuples, where kind is a
+                display label such as 'Capacitor' and df holds the drawn rows
+            projection: ``ProjectionCache`` of ax shared with other view-dependent
+                features; a private one is created when omitted
+        """
+        self.ax = ax
+        self.projection = ProjectionCache(ax) if projection is None else projection
+        self.sources = [source for source in sources if source[1] is not None and len(source[1]) > 0]
+        self.start_points, self.end_points = self.projection.edge_indices([df for _, df, _ in self.sources])
+
+        source_ids, rows = [], []
+        for source_id, (_, df, _) in enumerate(self.sources):
+            source_ids.append(np.full(len(df), source_id))
+            rows.append(np.arange(len(df)))
+
+        self.source_ids = np.concatenate(source_ids) if source_ids else np.empty(0, dtype=int)
+        self.rows = np.concatenate(rows) if rows else np.empty(0, dtype=int)
+        self.screen_starts = None
+        self.screen_ends = None
+        self.projected_version = None
+        self.index = None
+        self.visible = None
+
+    def set_visible(self, mask):
+        """Restrict picking and selection to the edges flagged in mask (None for all edges)."""
+        self.visible = None if mask is None else np.asarray(mask, dtype=bool)
+
+    def invalidate(self):
+        """Forget the screen projection after the view changed."""
+        self.screen_starts = None
+        self.screen_ends = None
+        self.index = None
+
+    def _project(self):
+        """Display pixels of all edge endpoints for the current view."""
+        screen, _ = self.projection.project()
+        if self.screen_starts is None or self.projected_version != self.projection.version:
+            self.screen_starts = np.nan_to_num(screen[self.start_points])
+            self.screen_ends = np.nan_to_num(screen[self.end_points])
+            self.projected_version = self.projection.version
+            self.index = None
+        return self.screen_starts, self.screen_ends
+
+    def _build_index(self):
+        """Grid the projected edges in screen space."""
+        screen_starts, screen_ends = self._project()
+
+        # Flat third coordinate so the 3D grid collapses to a 2D one
+        flat = np.zeros((len(screen_starts), 1))
+        self.index = SpatialIndex(np.hstack([screen_starts, flat]), np.hstack([screen_ends, flat]))
+
+    def pick(self, x, y, radius=DEFAULT_PICK_RADIUS):
+        """Return the edge nearest to display position (x, y), or None.
+
+        Returns:
+            Dictionary with 'kind', 'name', 'value', 'unit', 'row' (position
+            in the source DataFrame) and 'distance' in pixels.
+        """
+        if len(self.start_points) == 0:
+            return None
+        self._project()
+        if self.index is None:
+            self._build_index()
+
+        edges, distances = self.index.query_radius(np.array([x, y, 0.0]), radius)
+        if self.visible is not None:
+            keep = self.visible[edges]
+            edges, distances = edges[keep], distances[keep]
+        if len(edges) == 0:
+            return None
+
+        edge = edges[0]
+        kind, df, name_column = self.sources[self.source_ids[edge]]
+        row = df.iloc[self.rows[edge]]
+        return {
+            'kind': kind,
+            'name': row[name_column],
+            'value': row['Value'],
+            'unit': row['Unit'] if 'Unit' in df.columns else '',
+            'row': int(self.rows[edge]),
+            'distance': float(distances[0])
+        }
+
+    def select_box(self, x0, y0, x1, y1):
+        """Mask of the edges with both endpoints inside a display-pixel rectangle."""
+        screen_starts, screen_ends = self._project()
+        lo = np.minimum([x0, y0], [x1, y1])
+        hi = np.maximum([x0, y0], [x1, y1])
+        inside_starts = np.all((screen_starts >= lo) & (screen_starts <= hi), axis=1)
+        inside_ends = np.all((screen_ends >= lo) & (screen_ends <= hi), axis=1)
+        return self._visible_only(inside_starts & inside_ends)
+
+    def select_lasso(self, vertices):
+        """Mask of the edges with both endpoints inside a display-pixel polygon."""
+        screen_starts, screen_ends = self._project()
+        if len(vertices) < 3:
+            return np.zeros(len(screen_starts), dtype=bool)
+
+        path = Path(np.asarray(vertices, dtype=float))
+        return self._visible_only(path.contains_points(screen_starts) & path.contains_points(screen_ends))
+
+    def _visible_only(self, mask):
+        return mask if self.visible is None else mask & self.visible
+
+    def selected_frames(self, mask):
+        """Split an edge mask into (kind, rows of the source DataFrame) pairs, skipping empty ones."""
+        frames = []
+        for source_id, (kind, df, _) in enumerate(self.sources):
+            rows = self.rows[mask & (self.source_ids == source_id)]
+            if len(rows) > 0:
+                frames.append((kind, df.iloc[rows]))
+        return frames
@@ -0,0 +1,202 @@
+import numpy as np
+from matplotlib.artist import Artist
+from matplotlib.text import Text
+from matplotlib.transforms import IdentityTransform
+
+from proximity import edge_endpoints
+
+def projection_key(ax):
+    """Bytes identifying the 3D view matrix of an axes (empty for a 2D axes)."""
+    return ax.get_proj().tobytes() if ax.name == '3d' else b''
+
+def display_key(ax):
+    """Bytes identifying the data-to-display transform of an axes, which moves with the axes' pixel box."""
+    return ax.transData.get_affine().get_matrix().tobytes()
+
+def project_normalized(ax, points):
+    """Apply the 3D view matrix of an axes to (N, 3) points; see ``project_points``.
+
+    Returns:
+        (xy, depth): (N, 2) projected coordinates, still to be mapped to
+        display pixels by the axes' transData, and (N,) depths.
+    """
+    points = np.asarray(points, dtype=float).reshape(-1, 3)
+    if ax.name != '3d':
+        return points[:, :2], points[:, 2].copy()
+
+    proj = ax.get_proj()
+    homogeneous = points @ proj[:, :3].T + proj[:, 3]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        projected = homogeneous[:, :3] / homogeneous[:, 3:]
+    return projected[:, :2], projected[:, 2]
+
+def to_display(ax, xy):
+    """Map (N, 2) projected coordinates to display pixels with the affine part of the axes' transData."""
+    affine = ax.transData.get_affine().get_matrix()
+    return xy @ affine[:2, :2].T + affine[:2, 2]
+
+def project_points(ax, points):
+    """Project (N, 3) data coordinates to display pixels of an axes in one matrix multiply.
+
+    Args:
+        ax: 3D axes, or a 2D axes where X and Y are plotted directly
+        points: (N, 3) data coordinates
+
+    Returns:
+        (screen, depth): (N, 2) display pixels and (N,) depths, where a
+        smaller depth is nearer to the viewer (the Z coordinate on a 2D axes).
+    """
+    xy, depth = project_normalized(ax, points)
+    return to_display(ax, xy), depth
+
+class ProjectionCache:
+    """Screen coordinates and depths of every point a view-dependent feature needs.
+
+    Picking, raster layers and value labels register their points once, and
+    all registered points are projected together in one pass the first time
+    they are asked for after the view changed (rotation, zoom, resize). The
+    view is identified by ``projection_key`` and ``display_key``, so nothing
+    has to tell the cache about redraws. The two are cached separately: when
+    only the axes' pixel box moves (resizing, or the tiles of a tiled
+    export), just the cheap 2D affine map is applied again. Edges of the same
+    DataFrame are registered once however many features use them.
+    """
+
+    def __init__(self, ax):
+        """Initialize an empty cache for the 3D or plan-view axes ax."""
+        self.ax = ax
+        self.version = 0  # Incremented whenever the points are projected again
+        self._blocks = []
+        self._count = 0
+        self._points = np.empty((0, 3))
+        self._edges = {}  # id(df) -> (df, start slice, end slice)
+        self._projection_view = None
+        self._display_view = None
+        self._xy = None
+        self._screen = None
+        self._depth = None
+
+    def __getstate__(self):
+        # Copies (e.g. a pickled figure being exported) keep the points but not the DataFrames
+        state = self.__dict__.copy()
+        state['_edges'] = {}
+        return state
+
+    def add_points(self, points):
+        """Register (N, 3) points and return the slice of the cache's arrays holding them."""
+        points = np.asarray(points, dtype=float).reshape(-1, 3)
+        self._blocks.append(points)
+        self._count += len(points)
+        self._projection_view = None
+        return slice(self._count - len(points), self._count)
+
+    def add_edges(self, df):
+        """Register the endpoints of every edge of df and return (start slice, end slice)."""
+        entry = self._edges.get(id(df))
+        if entry is None or entry[0] is not df:
+            starts, ends = edge_endpoints(df)
+            entry = (df, self.add_points(starts), self.add_points(ends))
+            self._edges[id(df)] = entry
+        return entry[1], entry[2]
+
+    def edge_indices(self, frames):
+        """Register the edges of several DataFrames and return their (start, end) positions in order."""
+        slices = [self.add_edges(df) for df in frames]
+        starts = [np.arange(start.start, start.stop) for start, _ in slices]
+        ends = [np.arange(end.start, end.stop) for _, end in slices]
+        empty = np.empty(0, dtype=np.int64)
+        return (np.concatenate(starts) if starts else empty), (np.concatenate(ends) if ends else empty)
+
+    def project(self):
+        """Return (screen, depth) of all registered points for the current view, projecting only on change."""
+        projection_view, display_view = projection_key(self.ax), display_key(self.ax)
+        if projection_view != self._projection_view:
+            if self._blocks:
+                self._points = np.concatenate([self._points] + self._blocks)
+                self._blocks = []
+            self._xy, self._depth = project_normalized(self.ax, self._points)
+            self._projection_view = projection_view
+            self._display_view = None
+        if display_view != self._display_view:
+            self._screen = to_display(self.ax, self._xy)
+            self._display_view = display_view
+            self.version += 1
+        return self._screen, self._depth
+
+class ValueLabels(Artist):
+    """Text labels at 3D points, placed from a shared ``ProjectionCache``.
+
+    Instead of one text artist per label, each projecting itself on every
+    draw, the labels are laid out from the cached projection: labels outside
+    the axes are culled, and going from the nearest label to the farthest,
+    a label overlapping one already placed is skipped, so dense areas stay
+    readable.
+    """
+
+    def __init__(self, ax, projection, points, texts, fontsize=7, color='black'):
+        """Create the labels; add them to the axes with ``ax.add_artist``.
+
+        Args:
+            ax: Axes the labels are drawn on
+            projection: ``ProjectionCache`` of ax
+            points: (N, 3) label anchors in data coordinates
+            texts: N label strings
+            fontsize: Font size in points
+            color: Text color
+        """
+        super().__init__()
+        self.ax = ax
+        self.projection = projection
+        self.slice = projection.add_points(points)
+        self.texts = np.asarray(texts, dtype=object)
+        self.set_zorder(Text.zorder)
+        self._text = Text(fontsize=fontsize, color=color, ha='center', va='center',
+                          transform=IdentityTransform())
+        self._placed_version = None
+        self._placed = np.empty(0, dtype=np.int64)
+
+    def place(self, renderer):
+        """Indices of the labels to draw for the current view."""
+        screen, depth = self.projection.project()
+        screen, depth = screen[self.slice], depth[self.slice]
+        x0, y0, x1, y1 = self.ax.bbox.extents
+        inside = np.flatnonzero(np.isfinite(depth) & (screen[:, 0] >= x0) & (screen[:, 0] <= x1) &
+                                (screen[:, 1] >= y0) & (screen[:, 1] <= y1))
+
+        # Label boxes estimated from the text length, in display pixels
+        height = renderer.points_to_pixels(self._text.get_fontsize()) * 1.2
+        widths = np.array([len(text) for text in self.texts[inside]]) * height * 0.5
+
+        # Placed boxes are bucketed in a grid of label-height cells, so each test only looks nearby
+        placed, boxes, grid = [], [], {}
+        for i in inside[np.argsort(depth[inside], kind='stable')]:
+            x, y = screen[i]
+            half_w = widths[np.searchsorted(inside, i)] / 2
+            box = (x - half_w, y - height / 2, x + half_w, y + height / 2)
+            cells = [(cx, cy) for cx in range(int(box[0] // height), int(box[2] // height) + 1)
+                     for cy in range(int(box[1] // height), int(box[3] // height) + 1)]
+            nearby = {b for cell in cells for b in grid.get(cell, ())}
+            if any(box[0] < boxes[b][2] and boxes[b][0] < box[2] and box[1] < boxes[b][3] and boxes[b][1] < box[3]
+                   for b in nearby):
+                continue
+            for cell in cells:
+                grid.setdefault(cell, []).append(len(boxes))
+            placed.append(i)
+            boxes.append(box)
+        return np.array(placed, dtype=np.int64)
+
+    def draw(self, renderer):
+        if not self.get_visible() or len(self.texts) == 0:
+            return
+        self._text.set_figure(self.figure)
+        screen, _ = self.projection.project()
+        if self._placed_version != self.projection.version:
+            self._placed = self.place(renderer)
+            self._placed_version = self.projection.version
+
+        screen = screen[self.slice]
+        for i in self._placed:
+            self._text.set_position(screen[i])
+            self._text.set_text(self.texts[i])
+            self._text.draw(renderer)
+        self.stale = False
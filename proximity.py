@@ -0,0 +1,289 @@
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from scipy.spatial import cKDTree
+
+# Default distance below which two edges are reported as "close"
+DEFAULT_THRESHOLD = 0.05
+
+# Below this many endpoints a single KD-tree is faster than starting worker processes
+PARALLEL_MIN_POINTS = 400000
+
+# Number of tiles handed out per worker so uneven tiles still balance out
+TILES_PER_WORKER = 4
+
+def edge_endpoints(df):
+    """Return the start and end coordinates of every edge as two (N, 3) arrays."""
+    starts = df[['Start_X', 'Start_Y', 'Start_Z']].to_numpy(dtype=float)
+    ends = df[['End_X', 'End_Y', 'End_Z']].to_numpy(dtype=float)
+    return starts, ends
+
+def _empty_pairs():
+    """Return an empty (first, second, distance) result."""
+    return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0, dtype=float)
+
+def _edge_pairs_from_point_pairs(points, point_pairs, num_edges, threshold):
+    """Convert endpoint pairs into unique edge pairs keeping the minimum distance.
+
+    Endpoints are stored as all start points followed by all end points, so
+    endpoint ``p`` belongs to edge ``p % num_edges``.
+    """
+    if len(point_pairs) == 0:
+        return _empty_pairs()
+
+    distances = np.linalg.norm(points[point_pairs[:, 0]] - points[point_pairs[:, 1]], axis=1)
+    edge_a = point_pairs[:, 0] % num_edges
+    edge_b = point_pairs[:, 1] % num_edges
+
+    # Drop the start/end pair of the same edge and keep the strict threshold
+    keep = (edge_a != edge_b) & (distances < threshold)
+    edge_a, edge_b, distances = edge_a[keep], edge_b[keep], distances[keep]
+    first = np.minimum(edge_a, edge_b).astype(np.int64)
+    second = np.maximum(edge_a, edge_b).astype(np.int64)
+
+    # Several endpoint combinations can match the same edge pair - keep the closest
+    keys = first * num_edges + second
+    order = np.lexsort((distances, keys))
+    keys = keys[order]
+    unique = np.ones(len(keys), dtype=bool)
+    unique[1:] = keys[1:] != keys[:-1]
+    order = order[unique]
+
+    return first[order], second[order], distances[order]
+
+def _make_tiles(points, threshold, num_tiles):
+    """Split the X/Y bounding box of points into a grid of roughly num_tiles tiles.
+
+    Returns a list of (lo, hi) X/Y bounds. The outermost bounds are infinite so
+    every point falls in exactly one half-open tile.
+    """
+    lo = points[:, :2].min(axis=0)
+    hi = points[:, :2].max(axis=0)
+    extent = np.maximum(hi - lo, 1e-12)
+
+    # Split along both axes in proportion to the layout aspect ratio
+    nx = max(1, int(round(np.sqrt(num_tiles * extent[0] / extent[1]))))
+    ny = max(1, int(round(num_tiles / nx)))
+
+    # Tiles much smaller than the halo would mostly duplicate their neighbours' work
+    min_size = 4 * threshold
+    if not min_size > 0:
+        return [((-np.inf, -np.inf), (np.inf, np.inf))]
+    nx = max(1, min(nx, int(extent[0] // min_size)))
+    ny = max(1, min(ny, int(extent[1] // min_size)))
+
+    x_edges = np.linspace(lo[0], hi[0], nx + 1)
+    y_edges = np.linspace(lo[1], hi[1], ny + 1)
+    x_edges[0], x_edges[-1] = -np.inf, np.inf
+    y_edges[0], y_edges[-1] = -np.inf, np.inf
+
+    tiles = []
+    for i in range(nx):
+        for j in range(ny):
+            tiles.append(((x_edges[i], y_edges[j]), (x_edges[i + 1], y_edges[j + 1])))
+    return tiles
+
+def _find_tile_point_pairs(shm_name, shape, tile_lo, tile_hi, threshold):
+    """Find the endpoint pairs owned by one tile (runs in a worker process).
+
+    Points are read from the shared-memory array. The tile is searched together
+    with a halo of width threshold, and a pair is kept only when its
+    lower-indexed point lies inside the tile itself, so every pair is reported
+    by exactly one tile.
+    """
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        points = np.ndarray(shape, dtype=float, buffer=shm.buf)
+        xy = points[:, :2]
+        tile_lo = np.asarray(tile_lo)
+        tile_hi = np.asarray(tile_hi)
+
+        in_halo = np.all((xy >= tile_lo - threshold) & (xy < tile_hi + threshold), axis=1)
+        indices = np.flatnonzero(in_halo)
+        if len(indices) < 2:
+            return np.empty((0, 2), dtype=np.int64)
+
+        local_pairs = cKDTree(points[indices]).query_pairs(threshold, output_type='ndarray')
+        pairs = indices[local_pairs]
+
+        # query_pairs returns i < j locally, and indices is sorted, so column 0 is the owner
+        owner_xy = xy[pairs[:, 0]]
+        owned = np.all((owner_xy >= tile_lo) & (owner_xy < tile_hi), axis=1)
+        return pairs[owned].copy()
+    finally:
+        shm.close()
+
+def _find_point_pairs_parallel(points, threshold, workers):
+    """Find all endpoint pairs closer than threshold using tiles in worker processes."""
+    tiles = _make_tiles(points, threshold, workers * TILES_PER_WORKER)
+    if len(tiles) < 2:
+        return cKDTree(points).query_pairs(threshold, output_type='ndarray')
+
+    # Share one copy of the coordinates with every worker instead of pickling them per tile
+    shm = shared_memory.SharedMemory(create=True, size=points.nbytes)
+    try:
+        shared_points = np.ndarray(points.shape, dtype=float, buffer=shm.buf)
+        shared_points[:] = points
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(_find_tile_point_pairs, shm.name, points.shape, lo, hi, threshold)
+                for lo, hi in tiles
+            ]
+            results = [future.result() for future in futures]
+    finally:
+        shm.close()
+        shm.unlink()
+
+    return np.concatenate(results)
+
+def find_close_pairs(starts, ends, threshold=DEFAULT_THRESHOLD, workers=None, tree=None):
+    """Find all edge pairs whose closest endpoints are less than threshold apart.
+
+    This uses the same endpoint-to-endpoint distance as ``find_closest_edges``
+    but queries a KD-tree instead of comparing every pair of rows. Large
+    datasets are split into overlapping X/Y tiles that are searched in
+    parallel worker processes.
+
+    Args:
+        starts: (N, 3) array of edge start coordinates
+        ends: (N, 3) array of edge end coordinates
+        threshold: Distance threshold for considering edges "close"
+        workers: Number of worker processes. None picks one per CPU core for
+            large datasets and runs in-process otherwise; 1 always runs in-process.
+        tree: Optional prebuilt ``cKDTree`` over the starts followed by the
+            ends; it is queried in-process instead of building a new tree.
+
+    Returns:
+        Tuple of (first, second, distance) arrays where first < second are
+        row positions into the edge arrays, sorted by (first, second).
+    """
+    num_edges = len(starts)
+    if num_edges < 2 or not threshold > 0:
+        # Distances are compared strictly, so no pair is closer than a zero threshold
+        return _empty_pairs()
+
+    points = np.ascontiguousarray(np.concatenate([starts, ends]), dtype=float)
+
+    if workers is None:
+        workers = (os.cpu_count() or 1) if len(points) >= PARALLEL_MIN_POINTS else 1
+
+    if tree is not None:
+        point_pairs = tree.query_pairs(threshold, output_type='ndarray')
+    elif workers > 1:
+        point_pairs = _find_point_pairs_parallel(points, threshold, workers)
+    else:
+        point_pairs = cKDTree(points).query_pairs(threshold, output_type='ndarray')
+
+    return _edge_pairs_from_point_pairs(points, point_pairs, num_edges, threshold)
+
+def pairs_to_records(names, first, second, distances, limit=None):
+    """Build the proximity record list used by the visualizations.
+
+    Records are sorted by distance and use the same keys as ``find_closest_edges``.
+    Only the ``limit`` closest pairs are converted when a limit is given.
+    """
+    if limit is not None and limit < len(distances):
+        order = np.argpartition(distances, limit)[:limit]
+        order = order[np.argsort(distances[order], kind='stable')]
+    else:
+        order = np.argsort(distances, kind='stable')
+
+    names = np.asarray(names)
+    return [
+        {
+            'capacitor1': names[first[i]],
+            'capacitor2': names[second[i]],
+            'min_distance': float(distances[i])
+        }
+        for i in order
+    ]
+
+class ProximityCache:
+    """Cache of proximity results for a single dataset.
+
+    Pairs are computed once over the whole dataset for the largest threshold
+    requested so far. Value filters only remove edges, so a filtered result is
+    the cached pair list masked by the edges that are still visible. A smaller
+    threshold is answered by filtering the cached distances. When a larger
+    threshold is requested for the same dataset, a KD-tree of its endpoints is
+    built once and kept, so further growth (e.g. from a slider) only
+    re-queries it. Datasets with at least ``PARALLEL_MIN_POINTS`` endpoints
+    keep no tree and are searched again in parallel tiles, since one kept tree
+    is only queried on one core.
+    """
+
+    def __init__(self):
+        """Initialize an empty cache."""
+        self.clear()
+
+    def clear(self):
+        """Drop the cached dataset and pairs."""
+        self.df = None
+        self.threshold = None
+        self.tree = None
+        self.first, self.second, self.distances = _empty_pairs()
+
+    def is_valid_for(self, df, threshold):
+        """Check whether the cached pairs can answer a query on df at threshold."""
+        return self.df is df and self.threshold is not None and threshold <= self.threshold
+
+    def snapshot(self):
+        """Return the (dataset, KD-tree) state ``compute`` reuses, to hand to a worker thread."""
+        return self.df, self.tree
+
+    @staticmethod
+    def compute(df, threshold, snapshot):
+        """Find the pairs of df closer than threshold without touching the cache.
+
+        Safe to run on a worker thread; pass the returned entry to ``install``
+        on the thread that owns the cache.
+
+        Args:
+            df: Full (unfiltered) DataFrame the pairs are computed on
+            threshold: Distance threshold for considering edges "close"
+            snapshot: Cache state from ``snapshot``; its KD-tree is reused, or
+                built, when it belongs to the same dataset and the dataset is
+                too small for the parallel search
+
+        Returns:
+            Tuple (df, threshold, tree, first, second, distances).
+        """
+        cached_df, tree = snapshot
+        starts, ends = edge_endpoints(df)
+        if cached_df is not df or 2 * len(df) >= PARALLEL_MIN_POINTS:
+            tree = None
+        elif tree is None:
+            tree = cKDTree(np.concatenate([starts, ends]))
+        first, second, distances = find_close_pairs(starts, ends, threshold, tree=tree)
+        return df, threshold, tree, first, second, distances
+
+    def install(self, entry):
+        """Store an entry from ``compute`` unless the cache already covers its dataset and threshold."""
+        if not self.is_valid_for(entry[0], entry[1]):
+            self.df, self.threshold, self.tree, self.first, self.second, self.distances = entry
+
+    def get_pairs(self, df, threshold=DEFAULT_THRESHOLD, mask=None):
+        """Return the (first, second, distance) pairs of df closer than threshold.
+
+        Args:
+            df: Full (unfiltered) DataFrame the pairs are computed on
+            threshold: Distance threshold for considering edges "close"
+            mask: Optional boolean array over the rows of df; pairs that involve
+                a row where the mask is False are dropped
+        """
+        if not self.is_valid_for(df, threshold):
+            self.install(self.compute(df, threshold, self.snapshot()))
+
+        keep = self.distances < threshold
+        if mask is not None:
+            mask = np.asarray(mask, dtype=bool)
+            keep &= mask[self.first] & mask[self.second]
+
+        return self.first[keep], self.second[keep], self.distances[keep]
+
+    def get_records(self, df, name_col, threshold=DEFAULT_THRESHOLD, mask=None, limit=None):
+        """Return proximity records for df sorted by distance (see ``pairs_to_records``)."""
+        first, second, distances = self.get_pairs(df, threshold, mask)
+        return pairs_to_records(df[name_col].values, first, second, distances, limit)
@@ -0,0 +1,179 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from dataset_cache import DEFAULT_CHUNK_ROWS, read_csv_chunked
+
+# Sketch size parameter; the rank error is roughly 1.7 / k
+DEFAULT_SKETCH_SIZE = 256
+
+# Each lower compactor level holds this fraction of the capacity of the level above
+CAPACITY_DECAY = 2.0 / 3.0
+
+# Files at least this large are sketched while loading; smaller ones are binned exactly
+STREAMING_MIN_BYTES = 256 * 1024 ** 2
+
+class QuantileSketch:
+    """Streaming quantile sketch (KLL) built on NumPy arrays.
+
+    Values are added chunk by chunk with ``update``. Level h holds items that
+    each stand for 2**h original values; when a level grows past its capacity
+    it is sorted and every other item (from a random offset) is promoted to
+    the next level. Memory stays at a few times k items regardless of how many
+    values are added, and any quantile is answered from the retained items
+    without a second pass over the data. Count, sum, minimum and maximum are
+    tracked exactly.
+    """
+
+    def __init__(self, k=DEFAULT_SKETCH_SIZE, seed=None):
+        """Initialize an empty sketch.
+
+        Args:
+            k: Capacity of the top level; larger values are more accurate
+            seed: Optional seed for the compaction offsets
+        """
+        self.k = k
+        self.levels = [np.empty(0)]
+        self.count = 0
+        self.total = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level):
+        """Number of items a level may hold before it is compacted."""
+        depth = len(self.levels) - level - 1
+        return max(2, int(np.ceil(self.k * CAPACITY_DECAY ** depth)))
+
+    def update(self, values):
+        """Add a chunk of values to the sketch (NaNs are ignored)."""
+        values = np.asarray(values, dtype=float).ravel()
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+
+        self.count += len(values)
+        self.total += float(values.sum())
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+
+    def merge(self, other):
+        """Fold another sketch (e.g. of a different file or chunk range) into this one."""
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+
+    def _compress(self):
+        """Compact every level that is over capacity, promoting half its items upward."""
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+
+                items = np.sort(items)
+
+                # An odd item out stays behind so the total weight is preserved
+                leftover = items[-1:] if len(items) % 2 else items[:0]
+                paired = items[:len(items) - len(leftover)]
+
+                promoted = paired[self._rng.integers(2)::2]
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+                self.levels[level] = leftover
+            level += 1
+
+    def _weighted_items(self):
+        """Return the retained items sorted, with their cumulative weights."""
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(values), 2.0 ** level) for level, values in enumerate(self.levels)])
+        order = np.argsort(items, kind='stable')
+        return items[order], np.cumsum(weights[order])
+
+    @property
+    def mean(self):
+        """Exact mean of all values added."""
+        return self.total / self.count if self.count else np.nan
+
+    def quantiles(self, qs):
+        """Approximate quantiles for the fractions in qs (0 and 1 give the exact min and max)."""
+        qs = np.atleast_1d(np.asarray(qs, dtype=float))
+        if self.count == 0:
+            return np.full(len(qs), np.nan)
+
+        items, cumulative = self._weighted_items()
+        positions = np.searchsorted(cumulative, qs * cumulative[-1], side='left')
+        result = items[np.clip(positions, 0, len(items) - 1)]
+        result[qs <= 0] = self.min
+        result[qs >= 1] = self.max
+        return result
+
+    def quantile(self, q):
+        """Approximate quantile for a single fraction q."""
+        return float(self.quantiles([q])[0])
+
+    @property
+    def median(self):
+        """Approximate median of all values added."""
+        return self.quantile(0.5)
+
+    def ranks(self, values):
+        """Approximate fraction of the added values that are <= each of values."""
+        values = np.atleast_1d(np.asarray(values, dtype=float))
+        if self.count == 0:
+            return np.full(len(values), np.nan)
+
+        items, cumulative = self._weighted_items()
+        positions = np.searchsorted(items, values, side='right')
+        below = np.where(positions > 0, cumulative[np.maximum(positions, 1) - 1], 0.0)
+        ranks = below / cumulative[-1]
+        ranks[values >= self.max] = 1.0
+        return ranks
+
+def read_csv_with_sketch(file_path, column='Value', min_bytes=None, chunksize=DEFAULT_CHUNK_ROWS, 
+                         progress=None, k=DEFAULT_SKETCH_SIZE):
+    """Read a CSV in chunks, sketching one column on the way when the file is large.
+
+    Files of at least min_bytes are too large to re-sort on every binning
+    change; their column is fed to a sketch chunk by chunk in the same pass
+    that reads the file, and binning then reads the median and quantile
+    edges from the sketch (values=None in ``binning.analyze_distribution``).
+
+    Args:
+        file_path: CSV file to read
+        column: Column to sketch
+        min_bytes: Smallest file size that is sketched; defaults to
+            STREAMING_MIN_BYTES
+        chunksize: Rows parsed per chunk
+        progress: Optional callback passed to ``read_csv_chunked``
+        k: Sketch size parameter
+
+    Returns:
+        Tuple of (DataFrame, QuantileSketch or None); there is no sketch for
+        smaller files or when the file has no such column.
+    """
+    if min_bytes is None:
+        min_bytes = STREAMING_MIN_BYTES
+    if os.path.getsize(file_path) < min_bytes:
+        return read_csv_chunked(file_path, chunksize, progress), None
+
+    sketch = QuantileSketch(k)
+
+    def update(chunk):
+        if column in chunk.columns:
+            # Non-numeric entries are skipped, leaving sketch.count short of the row count
+            sketch.update(pd.to_numeric(chunk[column], errors='coerce').values)
+
+    df = read_csv_chunked(file_path, chunksize, progress, on_chunk=update)
+    return df, sketch if sketch.count else None
@@ -0,0 +1,185 @@
+import numpy as np
+from matplotlib.image import BboxImage
+from matplotlib.transforms import Bbox
+
+from density import clip_segments
+
+
+# Segment samples splatted per chunk, bounding the temporary arrays for any number of segments
+DEFAULT_CHUNK_SAMPLES = 4000000
+
+# Samples per pixel of segment length; two keeps anti-aliased lines free of gaps
+SAMPLES_PER_PIXEL = 2.0
+
+def _box_sum(image, radius):
+    """Sum of each pixel's (2 * radius + 1)^2 neighbourhood, per channel, using cumulative sums."""
+    if radius <= 0:
+        return image
+    size = 2 * radius + 1
+    for axis in (0, 1):
+        padded = np.concatenate([np.zeros_like(image.take([0], axis=axis)).repeat(radius + 1, axis=axis),
+                                 image, np.zeros_like(image.take([0], axis=axis)).repeat(radius, axis=axis)],
+                                axis=axis)
+        summed = np.cumsum(padded, axis=axis)
+        image = summed.take(np.arange(size, summed.shape[axis]), axis=axis) - \
+            summed.take(np.arange(0, summed.shape[axis] - size), axis=axis)
+    return image
+
+def rasterize_segments(starts, ends, colors, shape, linewidth=1.0, additive=False,
+                       chunk_samples=DEFAULT_CHUNK_SAMPLES):
+    """Draw 2D segments into an RGBA image with NumPy only.
+
+    Segments are sampled along their length and every sample is splatted
+    bilinearly into its four neighbouring pixels, which gives anti-aliased
+    lines; wider lines are made by a box filter over the accumulated
+    buffers. Pixels covered by several segments show the coverage-weighted
+    mean of their colors or, with additive blending, the sum, so dense
+    areas glow. Segments are clipped to the image plus a one pixel margin
+    (``density.clip_segments``) before sampling, so a segment costs at most
+    about the image diagonal in samples however far the view is zoomed in,
+    and samples are processed in chunks, so memory does not grow with the
+    number of segments.
+
+    Args:
+        starts: (N, 2) segment starts in pixel coordinates, origin at the
+            bottom left of the image
+        ends: (N, 2) segment ends in pixel coordinates
+        colors: (N, 4) RGBA colors, or one RGBA color for all segments
+        shape: (rows, columns) of the image
+        linewidth: Line width in pixels
+        additive: Add overlapping colors instead of averaging them
+        chunk_samples: Samples processed per chunk
+
+    Returns:
+        (rows, columns, 4) float RGBA array, row 0 at the bottom, transparent
+        where no segment was drawn.
+    """
+    rows, columns = shape
+    starts = np.asarray(starts, dtype=float)
+    ends = np.asarray(ends, dtype=float)
+    colors = np.broadcast_to(np.asarray(colors, dtype=float), (len(starts), 4))
+
+    # Keep only the part of each segment near the image (this also drops NaN projections)
+    t0, t1, inside = clip_segments(starts, ends, (-1, columns, -1, rows))
+    t0, t1 = t0[inside, None], t1[inside, None]
+    delta = ends[inside] - starts[inside]
+    # The whole segment's weight, of which the kept part gets its share
+    weights = np.maximum(np.hypot(*delta.T), 1.0) * (t1 - t0)[:, 0]
+    starts, ends, colors = starts[inside] + t0 * delta, starts[inside] + t1 * delta, colors[inside]
+
+    lengths = np.hypot(*(ends - starts).T)
+    samples = np.ceil(lengths * SAMPLES_PER_PIXEL).astype(np.int64) + 1
+
+    # Coverage and coverage-weighted R, G, B (and alpha) per pixel
+    buffers = np.zeros((5, rows * columns))
+    boundaries = np.searchsorted(np.cumsum(samples), np.arange(chunk_samples, samples.sum(), chunk_samples))
+    for chunk in np.split(np.arange(len(samples)), boundaries):
+        if len(chunk) == 0:
+            continue
+        counts = samples[chunk]
+        segment = np.repeat(chunk, counts)
+        first = np.cumsum(counts) - counts
+        t = (np.arange(len(segment)) - np.repeat(first, counts) + 0.5) / np.repeat(counts, counts)
+        points = starts[segment] + t[:, None] * (ends[segment] - starts[segment]) - 0.5
+
+        # Each sample covers its share of the segment's length, at least a point
+        weight = weights[segment] / np.repeat(counts, counts)
+
+        base = np.floor(points).astype(np.int64)
+        fraction = points - base
+        for dx, dy in ((0, 0), (1, 0), (0, 1), (1, 1)):
+            column = base[:, 0] + dx
+            row = base[:, 1] + dy
+            corner = weight * np.abs(1 - dx - fraction[:, 0]) * np.abs(1 - dy - fraction[:, 1])
+            valid = (column >= 0) & (column < columns) & (row >= 0) & (row < rows) & (corner > 0)
+            pixel = row[valid] * columns + column[valid]
+            corner = corner[valid]
+            buffers[0] += np.bincount(pixel, weights=corner, minlength=rows * columns)
+            for channel in range(4):
+                buffers[channel + 1] += np.bincount(pixel, weights=corner * colors[segment[valid], channel],
+                                                    minlength=rows * columns)
+
+    buffers = buffers.reshape(5, rows, columns).transpose(1, 2, 0)
+    buffers = _box_sum(buffers, int(round((linewidth - 1) / 2)))
+    coverage = buffers[:, :, 0]
+
+    image = np.zeros((rows, columns, 4))
+    if additive:
+        image[:, :, :3] = np.clip(buffers[:, :, 1:4], 0.0, 1.0)
+    else:
+        np.divide(buffers[:, :, 1:4], coverage[:, :, None], out=image[:, :, :3], where=coverage[:, :, None] > 0)
+    mean_alpha = np.divide(buffers[:, :, 4], coverage, out=np.zeros_like(coverage), where=coverage > 0)
+    image[:, :, 3] = np.clip(coverage, 0.0, 1.0) * mean_alpha
+    return image
+
+class RasterLayer(BboxImage):
+    """Image layer of a 3D axes that draws many segments without an artist per segment.
+
+    Whenever the layer is drawn after the view changed (rotation, zoom,
+    resize), the segment endpoints are taken from the axes'
+    ``ProjectionCache`` and rasterized with ``rasterize_segments`` at the
+    pixel size of the part of the axes inside the figure, so a tile of a
+    tiled export only rasterizes the tile. The layer sits above the panes
+    and below all collections, so overlays stay visible on top of it.
+    """
+
+    def __init__(self, ax, projection, frames, colors, linewidth=1.0, additive=False):
+        """Create the layer; add it to the axes with ``ax.add_artist``.
+
+        Args:
+            ax: 3D axes the segments belong to
+            projection: ``ProjectionCache`` of ax
+            frames: DataFrames whose edges are drawn, in order
+            colors: (N, 4) RGBA colors of all their edges
+            linewidth: Line width in points, so it scales with the figure's dpi
+            additive: Add overlapping colors instead of averaging them
+        """
+        super().__init__(ax.bbox, origin='lower', interpolation='nearest')
+        self.ax = ax
+        self.projection = projection
+        self.start_points, self.end_points = projection.edge_indices(frames)
+        self.colors = np.asarray(colors, dtype=float)
+        self.linewidth = linewidth
+        self.additive = additive
+        self.segment_mask = None
+        self._rendered_version = None
+        self._segment_image = None
+
+        # Above the axis panes, below the collections mplot3d stacks over the axes
+        axes = [ax.xaxis, ax.yaxis, ax.zaxis] if ax.name == '3d' else [ax.xaxis, ax.yaxis]
+        self.set_zorder(max(axis.get_zorder() for axis in axes) + 0.5)
+
+    def set_segment_mask(self, mask):
+        """Draw only the segments flagged in mask (None for all of them)."""
+        self.segment_mask = mask
+        self._rendered_version = None
+        self.stale = True
+
+    def render(self):
+        """Rasterize the segments for the current view, or return None if the axes are outside the figure."""
+        region = Bbox.intersection(self.ax.bbox, self.figure.bbox)
+        if region is None or region.width < 1 or region.height < 1:
+            return None
+
+        # Whole canvas pixels, so the image lines up with the pixel grid wherever the axes sit
+        region = Bbox.from_extents(*np.floor(region.p0), *np.ceil(region.p1))
+        self.bbox = region
+        width, height = int(region.width), int(region.height)
+        screen, _ = self.projection.project()
+        starts, ends, colors = self.start_points, self.end_points, self.colors
+        if self.segment_mask is not None:
+            starts, ends, colors = starts[self.segment_mask], ends[self.segment_mask], colors[self.segment_mask]
+
+        origin = np.asarray(region.p0)
+        return rasterize_segments(screen[starts] - origin, screen[ends] - origin, colors, (height, width),
+                                  self.linewidth * self.figure.dpi / 72, self.additive)
+
+    def draw(self, renderer):
+        self.projection.project()
+        if self.projection.version != self._rendered_version:
+            self._rendered_version = self.projection.version
+            self._segment_image = self.render()
+            if self._segment_image is not None:
+                self.set_data(self._segment_image)
+        if self._segment_image is not None:
+            super().draw(renderer)
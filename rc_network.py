@@ -0,0 +1,434 @@
+import re
+
+import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import breadth_first_order, connected_components
+from scipy.sparse.linalg import splu
+from scipy.spatial import cKDTree
+
+from proximity import edge_endpoints
+
+# Endpoints closer than this (in layout units) are treated as the same electrical node
+DEFAULT_NODE_TOLERANCE = 1e-5
+
+# Resistances are clamped to this minimum so every conductance stays finite
+MIN_RESISTANCE = 1e-9
+
+# Number of right-hand sides solved at once, bounding the dense solution block
+SOLVE_BLOCK_SIZE = 64
+
+def _hash_cells(cells):
+    """Hash (M, 3) integer cell coordinates into one int64 key per row."""
+    with np.errstate(over='ignore'):
+        return (cells[:, 0] * np.int64(73856093)) ^ (cells[:, 1] * np.int64(19349663)) ^ (cells[:, 2] * np.int64(83492791))
+
+def _group_by_cell(points, tolerance):
+    """Group points falling in the same tolerance-sized grid cell.
+
+    Returns (point_to_group, group_points) where group_points holds one
+    representative point per group.
+    """
+    if tolerance <= 0:
+        group_points, point_to_group = np.unique(points, axis=0, return_inverse=True)
+        return point_to_group.ravel(), group_points
+
+    # One sort of a 1-D key is far cheaper than a row-wise unique over 3 columns
+    cells = np.floor(points / tolerance).astype(np.int64)
+    keys = _hash_cells(cells)
+    _, first_index, point_to_group = np.unique(keys, return_index=True, return_inverse=True)
+    point_to_group = point_to_group.ravel()
+
+    # Fall back to an exact row-wise unique in the unlikely case of a hash collision
+    if not np.all(cells == cells[first_index][point_to_group]):
+        _, first_index, point_to_group = np.unique(cells, axis=0, return_index=True, return_inverse=True)
+        point_to_group = point_to_group.ravel()
+
+    return point_to_group, points[first_index]
+
+def _unique_rows(points):
+    """Collapse exactly repeated (M, 3) rows.
+
+    Returns (point_to_unique, unique_points). As in ``_group_by_cell``, the
+    rows are hashed to one int64 key, here from the bits of the coordinates.
+    """
+    points = np.ascontiguousarray(points, dtype=float)
+    bits = points.view(np.int64)
+    _, first_index, point_to_unique = np.unique(_hash_cells(bits), return_index=True, return_inverse=True)
+    point_to_unique = point_to_unique.ravel()
+
+    if not np.all(bits == bits[first_index][point_to_unique]):
+        _, first_index, point_to_unique = np.unique(bits, axis=0, return_index=True, return_inverse=True)
+        point_to_unique = point_to_unique.ravel()
+
+    return point_to_unique, points[first_index]
+
+def merge_points(points, tolerance=DEFAULT_NODE_TOLERANCE):
+    """Merge coincident points into nodes.
+
+    Exact duplicates (endpoints shared by several edges) are collapsed first,
+    so a node shared by many edges does not produce a pair for every two of them.
+    The remaining coordinates are quantized to a grid of the tolerance and
+    hashed, so points in the same cell collapse in a single sort. Every pair
+    of distinct points within tolerance is then found with a KD-tree, and the
+    cells holding them are joined with a union-find pass (connected
+    components over the close pairs), so noise that straddles a cell boundary
+    is still merged.
+
+    Args:
+        points: (M, 3) array of coordinates
+        tolerance: Points about this close are merged; 0 merges exact duplicates only
+
+    Returns:
+        Tuple of (labels, node_xyz) where labels[i] is the node id of points[i]
+        and node_xyz holds the mean coordinate of each node.
+    """
+    points = np.asarray(points, dtype=float)
+    if len(points) == 0:
+        return np.empty(0, dtype=np.int64), np.empty((0, 3))
+
+    point_to_unique, unique_points = _unique_rows(points)
+    unique_to_group, group_points = _group_by_cell(unique_points, tolerance)
+    num_groups = len(group_points)
+
+    if tolerance > 0 and num_groups > 1:
+        # Pairs of the real points, not of cell representatives: two close points
+        # in neighbouring cells can sit far from their cells' first points
+        pairs = cKDTree(unique_points).query_pairs(tolerance, output_type='ndarray')
+        pairs = unique_to_group[pairs]
+        pairs = pairs[pairs[:, 0] != pairs[:, 1]]
+        graph = coo_matrix(
+            (np.ones(len(pairs), dtype=np.int8), (pairs[:, 0], pairs[:, 1])),
+            shape=(num_groups, num_groups)
+        )
+        num_nodes, group_to_node = connected_components(graph, directed=False)
+    else:
+        num_nodes, group_to_node = num_groups, np.arange(num_groups)
+
+    labels = group_to_node[unique_to_group[point_to_unique]].astype(np.int64)
+
+    # Place each node at the mean of the points merged into it
+    counts = np.bincount(labels, minlength=num_nodes)
+    node_xyz = np.column_stack([
+        np.bincount(labels, weights=points[:, axis], minlength=num_nodes) / counts
+        for axis in range(3)
+    ])
+
+    return labels, node_xyz
+
+def conductance_laplacian(num_nodes, edges, resistances):
+    """Build the sparse conductance Laplacian of a resistor network.
+
+    Args:
+        num_nodes: Number of nodes in the network
+        edges: (E, 2) array of node pairs
+        resistances: (E,) array of resistor values
+
+    Returns:
+        (num_nodes, num_nodes) CSC matrix with the summed conductances of each
+        node on the diagonal and minus the conductance between nodes off it.
+    """
+    edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+    conductance = 1.0 / np.maximum(np.asarray(resistances, dtype=float), MIN_RESISTANCE)
+
+    # A resistor shorted onto a single node carries no current
+    real = edges[:, 0] != edges[:, 1]
+    a, b, g = edges[real, 0], edges[real, 1], conductance[real]
+
+    rows = np.concatenate([a, b, a, b])
+    cols = np.concatenate([b, a, a, b])
+    data = np.concatenate([-g, -g, g, g])
+    return coo_matrix((data, (rows, cols)), shape=(num_nodes, num_nodes)).tocsc()
+
+class NodeGraph:
+    """Electrical nodes shared by the capacitor and resistor edges of a layout.
+
+    The endpoints of both component types are merged with a common tolerance,
+    so ``capacitor_nodes`` and ``resistor_nodes`` index the same node table.
+    """
+
+    def __init__(self, capacitor_df=None, resistor_df=None, tolerance=DEFAULT_NODE_TOLERANCE):
+        """Merge the endpoints of the given capacitor and resistor DataFrames.
+
+        Args:
+            capacitor_df: Capacitor DataFrame, or None
+            resistor_df: Resistor DataFrame, or None
+            tolerance: Endpoints closer than this are merged into one node
+        """
+        self.tolerance = tolerance
+        self.capacitor_df = capacitor_df
+        self.resistor_df = resistor_df
+
+        num_caps = len(capacitor_df) if capacitor_df is not None else 0
+        num_res = len(resistor_df) if resistor_df is not None else 0
+
+        # Stack endpoints as cap starts, cap ends, res starts, res ends
+        endpoint_arrays = []
+        for df in (capacitor_df, resistor_df):
+            if df is not None:
+                endpoint_arrays.extend(edge_endpoints(df))
+        points = np.concatenate(endpoint_arrays) if endpoint_arrays else np.empty((0, 3))
+
+        labels, self.node_xyz = merge_points(points, tolerance)
+        self.num_nodes = len(self.node_xyz)
+
+        self.capacitor_nodes = np.column_stack([labels[:num_caps], labels[num_caps:2 * num_caps]])
+        offset = 2 * num_caps
+        self.resistor_nodes = np.column_stack([
+            labels[offset:offset + num_res],
+            labels[offset + num_res:offset + 2 * num_res]
+        ])
+
+        self._components = {}
+        self._node_capacitance = None
+        self._node_tree = None
+        self._name_lookup = None
+
+    def edges(self, include_capacitors=True, include_resistors=True):
+        """Return the (E, 2) node pairs of the selected edge types."""
+        selected = []
+        if include_capacitors:
+            selected.append(self.capacitor_nodes)
+        if include_resistors:
+            selected.append(self.resistor_nodes)
+        if not selected:
+            return np.empty((0, 2), dtype=np.int64)
+        return np.concatenate(selected)
+
+    def components(self, include_capacitors=True, include_resistors=True):
+        """Label the connected components of the node graph.
+
+        Returns:
+            Tuple of (num_components, labels) where labels[i] is the component
+            of node i. Results are cached per edge selection.
+        """
+        key = (include_capacitors, include_resistors)
+        if key not in self._components:
+            edges = self.edges(include_capacitors, include_resistors)
+            graph = coo_matrix(
+                (np.ones(len(edges), dtype=np.int8), (edges[:, 0], edges[:, 1])),
+                shape=(self.num_nodes, self.num_nodes)
+            )
+            self._components[key] = connected_components(graph, directed=False)
+        return self._components[key]
+
+    def node_capacitance(self):
+        """Total capacitance attached to each node.
+
+        Every capacitor loads both of its terminal nodes with its full value
+        (a capacitor shorted onto a single node counts once). The sums are
+        computed in one ``np.bincount`` pass and cached.
+        """
+        if self._node_capacitance is None:
+            if self.capacitor_df is None or len(self.capacitor_nodes) == 0:
+                self._node_capacitance = np.zeros(self.num_nodes)
+            else:
+                values = self.capacitor_df['Value'].to_numpy(dtype=float)
+                end_values = np.where(self.capacitor_nodes[:, 0] != self.capacitor_nodes[:, 1], values, 0.0)
+                self._node_capacitance = np.bincount(
+                    self.capacitor_nodes.T.ravel(),
+                    weights=np.concatenate([values, end_values]),
+                    minlength=self.num_nodes
+                )
+        return self._node_capacitance
+
+    def top_loaded_nodes(self, count=10):
+        """Return the ids of the count nodes with the most capacitance, heaviest first."""
+        load = self.node_capacitance()
+        count = min(count, self.num_nodes)
+        if count <= 0:
+            return np.empty(0, dtype=np.int64)
+        top = np.argpartition(-load, count - 1)[:count]
+        return top[np.argsort(-load[top], kind='stable')]
+
+    def nearest_node(self, point):
+        """Return the id of the node closest to a 3D point."""
+        if self._node_tree is None:
+            self._node_tree = cKDTree(self.node_xyz)
+        _, node = self._node_tree.query(np.asarray(point, dtype=float))
+        return int(node)
+
+    def component_node(self, name, end="start"):
+        """Return the node at the start or end of the capacitor or resistor with the given name.
+
+        Raises:
+            KeyError: If no component has that name
+        """
+        if self._name_lookup is None:
+            self._name_lookup = {}
+            if self.resistor_df is not None:
+                self._name_lookup.update(zip(self.resistor_df['Resistor_Name'], zip(self.resistor_nodes[:, 0], self.resistor_nodes[:, 1])))
+            if self.capacitor_df is not None:
+                self._name_lookup.update(zip(self.capacitor_df['Capacitor_Name'], zip(self.capacitor_nodes[:, 0], self.capacitor_nodes[:, 1])))
+
+        start_node, end_node = self._name_lookup[name]
+        return int(end_node if end == "end" else start_node)
+
+    def find_node(self, spec):
+        """Return the node given as a component name (optionally ':start'/':end') or 'x, y, z' coordinates.
+
+        Coordinates select the nearest node.
+
+        Raises:
+            ValueError: If the text is neither a known component name nor three coordinates
+        """
+        spec = spec.strip()
+        parts = [part for part in re.split(r'[,\s]+', spec) if part]
+        if len(parts) == 3:
+            try:
+                return self.nearest_node([float(part) for part in parts])
+            except ValueError:
+                pass
+
+        name, _, end = spec.partition(':')
+        try:
+            return self.component_node(name.strip(), end.strip().lower() or "start")
+        except KeyError:
+            raise ValueError(f"Unknown component or coordinates: {spec}")
+
+class ResistanceNetwork:
+    """Effective resistance queries over the resistors of a NodeGraph.
+
+    The conductance Laplacian is singular, so one node of every connected
+    resistor component is grounded (its row and column removed). The reduced
+    matrix is factorized once with a sparse LU decomposition, and every query
+    afterwards is only a pair of triangular solves against that factorization.
+    """
+
+    def __init__(self, node_graph):
+        """Build and factorize the grounded Laplacian of the resistor network."""
+        self.node_graph = node_graph
+        num_nodes = node_graph.num_nodes
+
+        self.resistances = node_graph.resistor_df['Value'].to_numpy(dtype=float) if node_graph.resistor_df is not None else np.empty(0)
+        self.laplacian = conductance_laplacian(num_nodes, node_graph.resistor_nodes, self.resistances)
+
+        # Ground the first node of every component
+        _, self.component = node_graph.components(include_capacitors=False, include_resistors=True)
+        _, ground_nodes = np.unique(self.component, return_index=True)
+        kept = np.ones(num_nodes, dtype=bool)
+        kept[ground_nodes] = False
+
+        # Position of each node in the reduced system, -1 for grounded nodes
+        self.reduced_index = np.full(num_nodes, -1, dtype=np.int64)
+        self.reduced_index[kept] = np.arange(kept.sum())
+        self.num_reduced = int(kept.sum())
+
+        self.lu = splu(self.laplacian[kept][:, kept].tocsc()) if self.num_reduced > 0 else None
+
+    def effective_resistance(self, node_a, node_b):
+        """Effective resistance between pairs of nodes.
+
+        Args:
+            node_a: Node id or array of node ids
+            node_b: Node id or array of node ids, same shape as node_a
+
+        Returns:
+            Resistance for each pair (a float for scalar input). Pairs in
+            different resistor components are infinitely far apart.
+        """
+        scalar = np.ndim(node_a) == 0
+        node_a = np.atleast_1d(np.asarray(node_a, dtype=np.int64))
+        node_b = np.atleast_1d(np.asarray(node_b, dtype=np.int64))
+
+        result = np.full(len(node_a), np.inf)
+        connected = self.component[node_a] == self.component[node_b]
+        result[connected & (node_a == node_b)] = 0.0
+
+        pending = np.flatnonzero(connected & (node_a != node_b))
+        for start in range(0, len(pending), SOLVE_BLOCK_SIZE):
+            block = pending[start:start + SOLVE_BLOCK_SIZE]
+            ra = self.reduced_index[node_a[block]]
+            rb = self.reduced_index[node_b[block]]
+
+            # Inject +1 at a and -1 at b; grounded nodes have no row
+            rhs = np.zeros((self.num_reduced, len(block)))
+            columns = np.arange(len(block))
+            rhs[ra[ra >= 0], columns[ra >= 0]] = 1.0
+            rhs[rb[rb >= 0], columns[rb >= 0]] = -1.0
+            potentials = self.lu.solve(rhs)
+
+            va = np.where(ra >= 0, potentials[np.maximum(ra, 0), columns], 0.0)
+            vb = np.where(rb >= 0, potentials[np.maximum(rb, 0), columns], 0.0)
+            result[block] = va - vb
+
+        return float(result[0]) if scalar else result
+
+    def elmore_delays(self, driver):
+        """Elmore delay from a driver node to every node of the RC network.
+
+        Node capacitances come from ``NodeGraph.node_capacitance``, i.e. every
+        capacitor is treated as a grounded load on both of its terminals.
+        When the driver's resistor component is a tree the delays are computed
+        with two linear-time passes over a breadth-first ordering: downstream
+        capacitance is accumulated from the leaves up, then delays are summed
+        from the driver down. Otherwise the general RC-mesh form is used:
+        solving the conductance matrix grounded at the driver against the node
+        capacitances.
+
+        Returns:
+            (num_nodes,) array of delays in resistance x capacitance units;
+            nodes not connected to the driver through resistors are infinite.
+        """
+        node_graph = self.node_graph
+        capacitance = node_graph.node_capacitance()
+        delays = np.full(node_graph.num_nodes, np.inf)
+
+        # Work only on the resistors and nodes connected to the driver
+        members = np.flatnonzero(self.component == self.component[driver])
+        local_index = np.full(node_graph.num_nodes, -1, dtype=np.int64)
+        local_index[members] = np.arange(len(members))
+
+        edges = node_graph.resistor_nodes
+        in_component = (self.component[edges[:, 0]] == self.component[driver]) & (edges[:, 0] != edges[:, 1])
+        local_edges = local_index[edges[in_component]]
+        local_resistances = np.maximum(self.resistances[in_component], MIN_RESISTANCE)
+        local_driver = local_index[driver]
+
+        if len(members) == 1:
+            delays[driver] = 0.0
+            return delays
+
+        if len(local_edges) == len(members) - 1:
+            local_delays = self._tree_elmore(local_edges, local_resistances, capacitance[members], local_driver)
+        else:
+            local_laplacian = conductance_laplacian(len(members), local_edges, local_resistances)
+            kept = np.ones(len(members), dtype=bool)
+            kept[local_driver] = False
+            local_delays = np.zeros(len(members))
+            local_delays[kept] = splu(local_laplacian[kept][:, kept].tocsc()).solve(capacitance[members][kept])
+
+        delays[members] = local_delays
+        return delays
+
+    @staticmethod
+    def _tree_elmore(edges, resistances, capacitance, driver):
+        """Elmore delays on a resistor tree with two passes over a breadth-first order."""
+        num_nodes = len(capacitance)
+        adjacency = coo_matrix(
+            (np.ones(len(edges)), (edges[:, 0], edges[:, 1])),
+            shape=(num_nodes, num_nodes)
+        ).tocsr()
+        order, parent = breadth_first_order(adjacency, driver, directed=False, return_predecessors=True)
+
+        # Resistance of the edge joining each node to its parent
+        keys = np.minimum(edges[:, 0], edges[:, 1]) * num_nodes + np.maximum(edges[:, 0], edges[:, 1])
+        key_order = np.argsort(keys)
+        children = order[1:]
+        parents = parent[children]
+        child_keys = np.minimum(children, parents) * num_nodes + np.maximum(children, parents)
+        parent_resistance = np.zeros(num_nodes)
+        parent_resistance[children] = resistances[key_order[np.searchsorted(keys[key_order], child_keys)]]
+
+        # Leaves up: capacitance downstream of each node
+        downstream = capacitance.astype(float).copy()
+        parent_list = parent.tolist()
+        for node in reversed(children.tolist()):
+            downstream[parent_list[node]] += downstream[node]
+
+        # Driver down: each node adds its parent edge resistance times its downstream load
+        step = parent_resistance * downstream
+        delays = np.zeros(num_nodes)
+        for node in children.tolist():
+            delays[node] = delays[parent_list[node]] + step[node]
+
+        return delays
@@ -0,0 +1,294 @@
+import numpy as np
+
+from proximity import edge_endpoints
+
+def point_segment_distances(point, starts, ends):
+    """Distance from one point to each of the (N, 3) segments starts-ends."""
+    direction = ends - starts
+    length_sq = np.einsum('ij,ij->i', direction, direction)
+    t = np.einsum('ij,ij->i', point - starts, direction) / np.where(length_sq > 0, length_sq, 1.0)
+    t = np.clip(t, 0.0, 1.0)
+    closest = starts + t[:, None] * direction
+    return np.linalg.norm(closest - point, axis=1)
+
+def segment_segment_distances(seg_start, seg_end, starts, ends):
+    """Distance from one segment to each of the (N, 3) segments starts-ends.
+
+    Vectorized form of the closest-points-between-segments algorithm from
+    Ericson, "Real-Time Collision Detection" (section 5.1.9).
+    """
+    eps = 1e-30
+    d1 = seg_end - seg_start
+    d2 = ends - starts
+    r = seg_start - starts
+    a = np.dot(d1, d1)
+    e = np.einsum('ij,ij->i', d2, d2)
+    f = np.einsum('ij,ij->i', d2, r)
+    c = r @ d1
+    b = d2 @ d1
+
+    if a <= eps:
+        # The query segment is a point
+        return point_segment_distances(seg_start, starts, ends)
+
+    denom = a * e - b * b
+    s = np.where(denom > eps, np.clip((b * f - c * e) / np.where(denom > eps, denom, 1.0), 0.0, 1.0), 0.0)
+    t = np.where(e > eps, (b * s + f) / np.where(e > eps, e, 1.0), 0.0)
+
+    # Clamp t to the edge and recompute s for the clamped value
+    below = t < 0.0
+    above = t > 1.0
+    t = np.clip(t, 0.0, 1.0)
+    s = np.where(below, np.clip(-c / a, 0.0, 1.0), s)
+    s = np.where(above, np.clip((b - c) / a, 0.0, 1.0), s)
+
+    closest1 = seg_start + s[:, None] * d1
+    closest2 = starts + t[:, None] * d2
+    return np.linalg.norm(closest1 - closest2, axis=1)
+
+def segments_intersect_box(starts, ends, box_lo, box_hi):
+    """Boolean mask of the (N, 3) segments that intersect the axis-aligned box."""
+    direction = ends - starts
+    t_enter = np.zeros(len(starts))
+    t_exit = np.ones(len(starts))
+    inside = np.ones(len(starts), dtype=bool)
+
+    # Slab test on each axis
+    for axis in range(3):
+        d = direction[:, axis]
+        o = starts[:, axis]
+        parallel = np.abs(d) < 1e-30
+        inside &= ~parallel | ((o >= box_lo[axis]) & (o <= box_hi[axis]))
+
+        safe_d = np.where(parallel, 1.0, d)
+        t1 = (box_lo[axis] - o) / safe_d
+        t2 = (box_hi[axis] - o) / safe_d
+        t_near = np.where(parallel, -np.inf, np.minimum(t1, t2))
+        t_far = np.where(parallel, np.inf, np.maximum(t1, t2))
+        t_enter = np.maximum(t_enter, t_near)
+        t_exit = np.minimum(t_exit, t_far)
+
+    return inside & (t_enter <= t_exit)
+
+class SpatialIndex:
+    """Uniform grid over edge bounding boxes.
+
+    Every edge is registered in each grid cell its bounding box overlaps. The
+    cell contents are stored in CSR form (``cell_start`` offsets into
+    ``cell_edges``), so building and querying are vectorized NumPy operations.
+    Queries first gather candidate edges from the covered cells and then run an
+    exact distance or intersection test on the candidates.
+
+    Results are row positions into the arrays (or DataFrame) the index was
+    built from. Edges with a non-finite endpoint are left out of the grid and
+    never returned.
+    """
+
+    def __init__(self, starts, ends, cell_size=None):
+        """Build the grid.
+
+        Args:
+            starts: (N, 3) array of edge start coordinates
+            ends: (N, 3) array of edge end coordinates
+            cell_size: Grid cell size; picked from the data extent when None
+        """
+        self.starts = np.asarray(starts, dtype=float)
+        self.ends = np.asarray(ends, dtype=float)
+        self.num_edges = len(self.starts)
+        self.finite = np.isfinite(self.starts).all(axis=1) & np.isfinite(self.ends).all(axis=1)
+
+        if not self.finite.any():
+            self.bounds_lo = np.zeros(3)
+            self.bounds_hi = np.zeros(3)
+        else:
+            starts, ends = self.starts[self.finite], self.ends[self.finite]
+            self.bounds_lo = np.minimum(starts.min(axis=0), ends.min(axis=0))
+            self.bounds_hi = np.maximum(starts.max(axis=0), ends.max(axis=0))
+
+        self.cell_size = cell_size if cell_size is not None else self._choose_cell_size()
+        self.shape = np.floor((self.bounds_hi - self.bounds_lo) / self.cell_size).astype(np.int64) + 1
+        self.num_cells = int(np.prod(self.shape))
+
+        self._build()
+
+    @classmethod
+    def from_dataframe(cls, df, cell_size=None):
+        """Build an index over the edges of a capacitor or resistor DataFrame."""
+        starts, ends = edge_endpoints(df)
+        return cls(starts, ends, cell_size)
+
+    def _choose_cell_size(self):
+        """Pick a cell size giving roughly one edge per cell over the non-flat axes."""
+        extent = self.bounds_hi - self.bounds_lo
+        num_finite = int(self.finite.sum())
+        largest = extent.max() if num_finite else 0.0
+        if largest <= 0:
+            return 1.0
+
+        # Axes with a negligible extent (e.g. a single metal layer) get a single cell
+        active = extent[extent > largest * 1e-3]
+        cell_size = (np.prod(active) / num_finite) ** (1.0 / len(active))
+
+        # Cells smaller than a typical edge just register each edge many times
+        edge_extent = np.abs(self.ends[self.finite] - self.starts[self.finite]).max(axis=1)
+        cell_size = max(cell_size, float(np.median(edge_extent)))
+
+        # Cap the number of cells so the offset table stays proportional to the data
+        max_cells = 8 * num_finite + 64
+        while np.prod(np.floor(extent / cell_size) + 1) > max_cells:
+            cell_size *= 1.5
+
+        return cell_size
+
+    def _cell_coords(self, points):
+        """Integer cell coordinates of points, clipped to the grid."""
+        coords = np.floor((np.asarray(points, dtype=float) - self.bounds_lo) / self.cell_size)
+        coords = np.nan_to_num(coords, nan=0.0, posinf=self.shape.max(), neginf=-1).astype(np.int64)
+        return np.clip(coords, 0, self.shape - 1)
+
+    def _ravel(self, coords):
+        """Linear cell ids of (M, 3) integer cell coordinates."""
+        return (coords[:, 0] * self.shape[1] + coords[:, 1]) * self.shape[2] + coords[:, 2]
+
+    def _build(self):
+        """Register every edge in the cells overlapped by its bounding box."""
+        box_lo = self._cell_coords(np.minimum(self.starts, self.ends))
+        box_hi = self._cell_coords(np.maximum(self.starts, self.ends))
+        span = box_hi - box_lo + 1
+        counts = np.where(self.finite, span.prod(axis=1), 0)
+
+        # Expand every edge into one entry per covered cell
+        edge_ids = np.repeat(np.arange(self.num_edges), counts)
+        offsets = np.arange(len(edge_ids)) - np.repeat(np.cumsum(counts) - counts, counts)
+        edge_span = span[edge_ids]
+        dz = offsets % edge_span[:, 2]
+        rest = offsets // edge_span[:, 2]
+        dy = rest % edge_span[:, 1]
+        dx = rest // edge_span[:, 1]
+        cells = self._ravel(box_lo[edge_ids] + np.column_stack([dx, dy, dz]))
+
+        order = np.argsort(cells, kind='stable')
+        self.cell_edges = edge_ids[order]
+        self.cell_start = np.searchsorted(cells[order], np.arange(self.num_cells + 1))
+
+    def _edges_in_cells(self, cells):
+        """Unique edge ids registered in any of the given linear cell ids."""
+        if len(cells) == 0 or self.num_edges == 0:
+            return np.empty(0, dtype=np.int64)
+
+        first = self.cell_start[cells]
+        counts = self.cell_start[cells + 1] - first
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        edges = self.cell_edges[np.repeat(first, counts) + offsets]
+
+        # Marking is linear where sorting many candidates is not
+        if len(edges) > self.num_edges // 8:
+            seen = np.zeros(self.num_edges, dtype=bool)
+            seen[edges] = True
+            return np.flatnonzero(seen)
+        return np.unique(edges)
+
+    def _edges_in_cell_box(self, box_lo, box_hi):
+        """Candidate edges from all cells overlapping the coordinate box."""
+        lo = self._cell_coords(box_lo)
+        hi = self._cell_coords(box_hi)
+        axes = [np.arange(lo[axis], hi[axis] + 1) for axis in range(3)]
+        grid = np.stack(np.meshgrid(*axes, indexing='ij'), axis=-1).reshape(-1, 3)
+        return self._edges_in_cells(self._ravel(grid))
+
+    def _outside_bounds(self, box_lo, box_hi):
+        """Check whether a coordinate box misses the indexed bounds entirely."""
+        return self.num_edges == 0 or np.any(box_hi < self.bounds_lo) or np.any(box_lo > self.bounds_hi)
+
+    def query_box(self, box_lo, box_hi):
+        """Return the edges that intersect the axis-aligned box, in index order."""
+        box_lo = np.asarray(box_lo, dtype=float)
+        box_hi = np.asarray(box_hi, dtype=float)
+        if self._outside_bounds(box_lo, box_hi):
+            return np.empty(0, dtype=np.int64)
+        if np.all(box_lo <= self.bounds_lo) and np.all(box_hi >= self.bounds_hi):
+            return np.flatnonzero(self.finite)
+
+        candidates = self._edges_in_cell_box(box_lo, box_hi)
+        hit = segments_intersect_box(self.starts[candidates], self.ends[candidates], box_lo, box_hi)
+        return candidates[hit]
+
+    def query_radius(self, point, radius):
+        """Return (edges, distances) of the edges within radius of point, nearest first."""
+        point = np.asarray(point, dtype=float)
+        if self._outside_bounds(point - radius, point + radius):
+            return np.empty(0, dtype=np.int64), np.empty(0)
+
+        candidates = self._edges_in_cell_box(point - radius, point + radius)
+        distances = point_segment_distances(point, self.starts[candidates], self.ends[candidates])
+        keep = distances <= radius
+        candidates, distances = candidates[keep], distances[keep]
+
+        order = np.argsort(distances, kind='stable')
+        return candidates[order], distances[order]
+
+    def query_knn(self, point, k=1):
+        """Return (edges, distances) of the k edges nearest to point, nearest first."""
+        point = np.asarray(point, dtype=float)
+        k = min(k, int(self.finite.sum()))
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+
+        # Grow the search radius until it holds k edges; anything outside it is farther
+        gap = np.maximum(np.maximum(self.bounds_lo - point, point - self.bounds_hi), 0.0)
+        max_radius = np.linalg.norm(gap) + np.linalg.norm(self.bounds_hi - self.bounds_lo) + self.cell_size
+        radius = np.linalg.norm(gap) + self.cell_size
+        while True:
+            edges, distances = self.query_radius(point, radius)
+            if len(edges) >= k or radius >= max_radius:
+                return edges[:k], distances[:k]
+            radius *= 2
+
+    def query_ray(self, origin, direction, radius):
+        """Return (edges, distances) of the edges within radius of a ray, nearest first.
+
+        Useful for picking: the ray is the line of sight through the cursor and
+        radius is the pick tolerance in data units.
+        """
+        origin = np.asarray(origin, dtype=float)
+        direction = np.asarray(direction, dtype=float)
+        norm = np.linalg.norm(direction)
+        if norm == 0 or self.num_edges == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        direction = direction / norm
+
+        # Clip the ray to the grid bounds grown by the radius
+        lo = self.bounds_lo - radius
+        hi = self.bounds_hi + radius
+        t_enter, t_exit = 0.0, np.inf
+        for axis in range(3):
+            if abs(direction[axis]) < 1e-30:
+                if origin[axis] < lo[axis] or origin[axis] > hi[axis]:
+                    return np.empty(0, dtype=np.int64), np.empty(0)
+                continue
+            t1 = (lo[axis] - origin[axis]) / direction[axis]
+            t2 = (hi[axis] - origin[axis]) / direction[axis]
+            t_enter = max(t_enter, min(t1, t2))
+            t_exit = min(t_exit, max(t1, t2))
+        if t_enter > t_exit:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+
+        seg_start = origin + t_enter * direction
+        seg_end = origin + t_exit * direction
+
+        # Sample the clipped ray at half-cell steps and collect the cells around each sample
+        step = self.cell_size / 2
+        samples = seg_start + np.append(np.arange(0.0, t_exit - t_enter, step), t_exit - t_enter)[:, None] * direction
+        reach = int(np.ceil((radius + step) / self.cell_size))
+        offsets = np.arange(-reach, reach + 1)
+        neighbourhood = np.stack(np.meshgrid(offsets, offsets, offsets, indexing='ij'), axis=-1).reshape(-1, 3)
+        coords = (self._cell_coords(samples)[:, None, :] + neighbourhood[None, :, :]).reshape(-1, 3)
+        coords = coords[np.all((coords >= 0) & (coords < self.shape), axis=1)]
+        candidates = self._edges_in_cells(np.unique(self._ravel(coords)))
+
+        distances = segment_segment_distances(seg_start, seg_end, self.starts[candidates], self.ends[candidates])
+        keep = distances <= radius
+        candidates, distances = candidates[keep], distances[keep]
+
+        order = np.argsort(distances, kind='stable')
+        return candidates[order], distances[order]
@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from binning import BinningCache, analyze_distribution, compute_bin_edges, resolve_strategy
+from quantile_sketch import QuantileSketch
+
+def test_resolve_strategy():
+    assert resolve_strategy("auto", False, 1.0, 50.0) == "linear"
+    assert resolve_strategy("auto", False, 1.0, 500.0) == "log"
+    assert resolve_strategy("auto", True, 1.0, 2.0) == "log"
+    assert resolve_strategy("quantile", False, 1.0, 500.0) == "quantile"
+    with pytest.raises(ValueError):
+        resolve_strategy("cubic", False, 1.0, 2.0)
+
+def test_bin_edges_per_strategy():
+    values = np.random.default_rng(0).lognormal(0, 2, 1000)
+    low, high = values.min(), values.max()
+    np.testing.assert_allclose(compute_bin_edges(values, 4, "linear"), np.linspace(low, high, 5))
+    np.testing.assert_allclose(compute_bin_edges(values, 4, "log"), np.geomspace(low, high, 5))
+    np.testing.assert_allclose(compute_bin_edges(values, 4, "quantile"), np.quantile(values, np.linspace(0, 1, 5)))
+
+def test_quantile_bins_have_equal_population():
+    values = np.random.default_rng(1).exponential(1.0, 10000)
+    result = analyze_distribution(values, 5, "quantile")
+    assert np.all(np.abs(result['hist'] - 2000) <= 1)
+
+def test_quantile_bins_merge_repeated_edges():
+    values = np.concatenate([np.zeros(900), np.arange(1, 101)])
+    edges = compute_bin_edges(values, 5, "quantile")
+    assert np.all(np.diff(edges) > 0)
+    assert len(edges) < 6
+
+def test_analyze_distribution_matches_numpy():
+    values = np.random.default_rng(2).normal(5, 1, 3000)
+    result = analyze_distribution(values, 6, "linear")
+    hist, edges = np.histogram(values, bins=6)
+    np.testing.assert_array_equal(result['hist'], hist)
+    np.testing.assert_allclose(result['bin_edges'], edges)
+    assert result['median'] == np.median(values) and result['mean'] == np.mean(values)
+    assert sum(r['count'] for r in result['color_ranges']) == len(values)
+    assert np.isclose(sum(r['percentage'] for r in result['color_ranges']), 100)
+
+def test_binning_cache_reuses_results_per_dataset():
+    cache = BinningCache()
+    df = pd.DataFrame({'Value': np.arange(1.0, 101.0)})
+    first = cache.get(df, 5, "linear")
+    assert cache.get(df, 5, "linear") is first
+    assert cache.get(df, 4, "linear") is not first
+
+    other = pd.DataFrame({'Value': np.arange(1.0, 11.0)})
+    assert cache.get(other, 5, "linear")['max'] == 10.0
+
+def test_binning_cache_stores_results_computed_elsewhere():
+    cache = BinningCache()
+    df = pd.DataFrame({'Value': np.arange(1.0, 21.0)})
+    assert cache.lookup(df, 4, "quantile") is None
+    result = analyze_distribution(df['Value'].values, 4, "quantile")
+    cache.store(df, 4, "quantile", False, result)
+    assert cache.lookup(df, 4, "quantile") is result
+    assert cache.get(df, 4, "quantile") is result
+
+def test_binning_cache_bins_a_sketch_instead_of_the_values():
+    df = pd.DataFrame({'Value': np.random.default_rng(3).exponential(1.0, 5001)})
+    sketch = QuantileSketch(k=8, seed=0)
+    sketch.update(df['Value'].values)
+    result = BinningCache().get(df, 4, "quantile", sketch=sketch)
+    assert result['median'] == sketch.median != np.median(df['Value'])
+    np.testing.assert_array_equal(result['bin_edges'], np.unique(sketch.quantiles(np.linspace(0, 1, 5))))
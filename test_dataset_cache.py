@@ -0,0 +1,64 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from dataset_cache import DatasetCache, dataframe_bytes, read_csv_chunked
+
+def write_csv(path, rows, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({'Capacitor_Name': [f"C{i}" for i in range(rows)], 'Value': rng.random(rows)})
+    df.to_csv(path, index=False)
+    return pd.read_csv(path)
+
+def counting_loader(calls):
+    def load(path):
+        calls.append(path)
+        return pd.read_csv(path)
+    return load
+
+def test_files_are_parsed_once(tmp_path):
+    path = tmp_path / "a.csv"
+    write_csv(path, 100)
+    cache, calls = DatasetCache(), []
+    first = cache.get(path, counting_loader(calls))
+    assert cache.get(path, counting_loader(calls)) is first
+    assert len(calls) == 1 and path in cache and len(cache) == 1
+
+def test_edited_file_is_parsed_again(tmp_path):
+    path = tmp_path / "a.csv"
+    write_csv(path, 100)
+    cache, calls = DatasetCache(), []
+    cache.get(path, counting_loader(calls))
+    write_csv(path, 150, seed=1)
+    os.utime(path, ns=(os.stat(path).st_atime_ns, os.stat(path).st_mtime_ns + 10 ** 9))
+    assert len(cache.get(path, counting_loader(calls))) == 150
+    assert len(calls) == 2
+
+def test_least_recently_used_files_are_evicted(tmp_path):
+    paths = [tmp_path / f"{name}.csv" for name in "abc"]
+    size = dataframe_bytes(write_csv(paths[0], 1000))
+    for path in paths[1:]:
+        write_csv(path, 1000)
+    cache, calls = DatasetCache(max_bytes=int(2.5 * size)), []
+    cache.get(paths[0], counting_loader(calls))
+    cache.get(paths[1], counting_loader(calls))
+    cache.get(paths[0], counting_loader(calls))  # b is now the least recently used
+    cache.get(paths[2], counting_loader(calls))
+    assert paths[0] in cache and paths[2] in cache and paths[1] not in cache
+    assert cache.total_bytes <= cache.max_bytes
+
+def test_newest_file_is_kept_over_budget(tmp_path):
+    path = tmp_path / "a.csv"
+    write_csv(path, 1000)
+    cache = DatasetCache(max_bytes=1)
+    cache.get(path, pd.read_csv)
+    assert path in cache and len(cache) == 1
+
+def test_chunked_read_matches_read_csv(tmp_path):
+    path = tmp_path / "a.csv"
+    expected = write_csv(path, 1234)
+    reported = []
+    df = read_csv_chunked(path, chunksize=100, progress=reported.append)
+    pd.testing.assert_frame_equal(df, expected)
+    assert len(reported) == 13 and reported == sorted(reported) and reported[-1] == 1.0
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from dataset_diff import diff_datasets, endpoint_moves, relative_changes
+
+def make_edges(names, seed=0):
+    rng = np.random.default_rng(seed)
+    n = len(names)
+    return pd.DataFrame({
+        'Capacitor_Name': names,
+        'Start_X': rng.random(n), 'Start_Y': rng.random(n), 'Start_Z': rng.random(n),
+        'End_X': rng.random(n), 'End_Y': rng.random(n), 'End_Z': rng.random(n),
+        'Value': rng.lognormal(-7, 1, n)
+    })
+
+def brute_force_diff(old_df, new_df, value_tolerance=1e-6, move_tolerance=1e-9):
+    """Name -> (old row, new row) of the last occurrences, and the set of changed names."""
+    old_last = {name: i for i, name in enumerate(old_df['Capacitor_Name'])}
+    new_last = {name: i for i, name in enumerate(new_df['Capacitor_Name'])}
+    coordinates = ['Start_X', 'Start_Y', 'Start_Z', 'End_X', 'End_Y', 'End_Z']
+    changed = set()
+    for name in old_last.keys() & new_last.keys():
+        old, new = old_df.iloc[old_last[name]], new_df.iloc[new_last[name]]
+        a, b = old[coordinates].to_numpy(dtype=float), new[coordinates].to_numpy(dtype=float)
+        move = min(max(np.linalg.norm(b[:3] - a[:3]), np.linalg.norm(b[3:] - a[3:])),
+                   max(np.linalg.norm(b[:3] - a[3:]), np.linalg.norm(b[3:] - a[:3])))
+        if abs(new['Value'] - old['Value']) > value_tolerance * abs(old['Value']) or move > move_tolerance:
+            changed.add(name)
+    return old_last, new_last, changed
+
+def test_diff_matches_brute_force():
+    rng = np.random.default_rng(1)
+    old_df = make_edges([f"C{i}" for i in rng.integers(0, 300, 400)], seed=2)
+    new_df = old_df.sample(frac=0.8, random_state=3).reset_index(drop=True)
+    new_df = pd.concat([new_df, make_edges([f"C{i}" for i in range(300, 340)], seed=4)], ignore_index=True)
+    bumped = rng.random(len(new_df)) < 0.1
+    new_df.loc[bumped, 'Value'] *= 1.5
+    shifted = rng.random(len(new_df)) < 0.1
+    new_df.loc[shifted, 'End_Z'] += 0.01
+
+    diff = diff_datasets(old_df, new_df)
+    old_last, new_last, changed = brute_force_diff(old_df, new_df)
+    names_old, names_new = old_df['Capacitor_Name'].to_numpy(), new_df['Capacitor_Name'].to_numpy()
+
+    assert sorted(diff['added']) == sorted(new_last[name] for name in new_last.keys() - old_last.keys())
+    assert sorted(diff['removed']) == sorted(old_last[name] for name in old_last.keys() - new_last.keys())
+    assert [old_last[name] for name in names_new[diff['new_rows']]] == diff['old_rows'].tolist()
+    assert [new_last[name] for name in names_old[diff['old_rows']]] == diff['new_rows'].tolist()
+    assert set(names_new[diff['new_rows'][diff['changed']]]) == changed
+    assert diff['duplicates'] == (len(old_df) - len(old_last)) + (len(new_df) - len(new_last))
+
+def test_swapped_endpoints_are_not_a_move():
+    old_df = make_edges(['A', 'B'])
+    new_df = old_df.copy()
+    new_df[['Start_X', 'Start_Y', 'Start_Z', 'End_X', 'End_Y', 'End_Z']] = \
+        old_df[['End_X', 'End_Y', 'End_Z', 'Start_X', 'Start_Y', 'Start_Z']].to_numpy()
+    np.testing.assert_array_equal(endpoint_moves(old_df, new_df), [0.0, 0.0])
+    assert not diff_datasets(old_df, new_df)['changed'].any()
+
+def test_relative_changes_from_zero():
+    changes = relative_changes(np.array([0.0, 0.0, 0.0, 2.0, -2.0]), np.array([0.0, 1.0, -1.0, 3.0, -3.0]))
+    np.testing.assert_array_equal(changes, [0.0, np.inf, -np.inf, 0.5, -0.5])
+
+def test_capacitors_are_not_compared_with_resistors():
+    resistors = make_edges(['R1']).rename(columns={'Capacitor_Name': 'Resistor_Name'})
+    with pytest.raises(ValueError):
+        diff_datasets(make_edges(['C1']), resistors)
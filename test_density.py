@@ -0,0 +1,82 @@
+import time
+
+import numpy as np
+
+from density import clip_segments, grid_shape, midpoint_density, segment_density
+
+def make_segments(n=300, seed=0, scale=0.3):
+    rng = np.random.default_rng(seed)
+    starts = rng.random((n, 2))
+    ends = starts + rng.normal(0, scale, (n, 2))
+    return starts, ends, rng.random(n)
+
+def dense_reference(starts, ends, extent, shape, weights, samples=4000):
+    """Spread each weight over many evenly spaced samples and bin those that fall inside."""
+    rows, columns = shape
+    x0, x1, y0, y1 = extent
+    t = (np.arange(samples) + 0.5) / samples
+    points = starts[:, None, :] + t[None, :, None] * (ends - starts)[:, None, :]
+    grid, _, _ = np.histogram2d(points[..., 1].ravel(), points[..., 0].ravel(), bins=shape,
+                                range=[[y0, y1], [x0, x1]], weights=np.repeat(weights / samples, samples))
+    return grid
+
+def test_grid_shape_keeps_cells_square():
+    assert grid_shape((0, 2, 0, 1), 100) == (50, 100)
+    assert grid_shape((0, 1, 0, 4), 100) == (100, 25)
+    assert grid_shape((0, 0, 0, 1), 100) == (100, 100)
+
+def test_midpoints_match_histogram():
+    starts, ends, weights = make_segments()
+    extent, shape = (0.0, 1.0, 0.0, 1.0), (20, 30)
+    midpoints = (starts + ends) / 2
+    expected, _, _ = np.histogram2d(midpoints[:, 1], midpoints[:, 0], bins=shape,
+                                    range=[[0, 1], [0, 1]], weights=weights)
+    np.testing.assert_array_equal(midpoint_density(starts, ends, extent, shape, weights), expected)
+
+def test_clip_segments_matches_sampling():
+    starts, ends, _ = make_segments(500, seed=1, scale=0.6)
+    x0, x1, y0, y1 = extent = (0.2, 0.7, 0.3, 0.9)
+    t0, t1, inside = clip_segments(starts, ends, extent)
+    t = np.linspace(0, 1, 20001)
+    points = starts[:, None, :] + t[None, :, None] * (ends - starts)[:, None, :]
+    within = (points[..., 0] >= x0) & (points[..., 0] <= x1) & (points[..., 1] >= y0) & (points[..., 1] <= y1)
+    np.testing.assert_array_equal(inside, within.any(axis=1))
+    np.testing.assert_allclose(t1[inside] - t0[inside], within[inside].mean(axis=1), atol=1e-3)
+
+def test_clip_segments_edge_cases():
+    starts = np.array([[0.5, 0.5], [0.5, 2.0], [0.0, 0.5], [np.nan, 0.5], [2.0, 2.0]])
+    ends = np.array([[0.5, 0.5], [0.7, 2.0], [1.0, 0.5], [0.5, 0.5], [3.0, 3.0]])
+    t0, t1, inside = clip_segments(starts, ends, (0.0, 1.0, 0.0, 1.0))
+    np.testing.assert_array_equal(inside, [True, False, True, False, False])
+    assert (t0[0], t1[0]) == (0.0, 1.0) and (t0[2], t1[2]) == (0.0, 1.0)
+
+def block_sums(grid, size=4):
+    return grid.reshape(grid.shape[0] // size, size, grid.shape[1] // size, size).sum(axis=(1, 3))
+
+def test_segments_match_dense_reference():
+    # About one sample per crossed cell is exact in total but only approximate per cell,
+    # so cells are compared in 4 x 4 blocks
+    starts, ends, weights = make_segments(seed=2)
+    for extent in [(0.0, 1.0, 0.0, 1.0), (0.3, 0.5, 0.4, 0.6)]:
+        shape = grid_shape(extent, 32)
+        grid = segment_density(starts, ends, extent, shape, weights)
+        reference = dense_reference(starts, ends, extent, shape, weights)
+        assert np.isclose(grid.sum(), reference.sum(), rtol=1e-3)
+        assert np.abs(block_sums(grid) - block_sums(reference)).sum() < 0.1 * reference.sum()
+
+def test_small_chunks_give_the_same_grid():
+    starts, ends, weights = make_segments(seed=3)
+    extent, shape = (0.0, 1.0, 0.0, 1.0), (16, 16)
+    np.testing.assert_allclose(segment_density(starts, ends, extent, shape, weights, chunk_samples=50),
+                               segment_density(starts, ends, extent, shape, weights))
+
+def test_zoomed_in_cost_does_not_grow_with_segment_length():
+    # Long wires through a window 1e-5 wide; sampled unclipped, they would need about 1e9 samples
+    rng = np.random.default_rng(4)
+    starts = np.column_stack([np.zeros(1000), rng.uniform(0.5, 0.5 + 1e-5, 1000)])
+    ends = starts + [1.0, 0.0]
+    extent = (0.5, 0.5 + 1e-5, 0.5, 0.5 + 1e-5)
+    began = time.perf_counter()
+    grid = segment_density(starts, ends, extent, (64, 64))
+    assert time.perf_counter() - began < 2.0
+    assert np.isclose(grid.sum(), 1000 * 1e-5)
@@ -0,0 +1,193 @@
+import io
+import os
+
+import matplotlib
+matplotlib.use('Agg')
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pytest
+from PIL import Image
+
+import exporter
+from exporter import (PngWriter, TiffTileWriter, TiledRenderer, export_snapshot, export_tiled, restore_figure,
+                      crop_region, snapshot_figure, tight_region, write_png)
+from jobs import JobCancelled
+
+def random_image(height, width, seed=0):
+    return np.random.default_rng(seed).integers(0, 256, (height, width, 4), dtype=np.uint8)
+
+def read_image(source):
+    with Image.open(source) as image:
+        return np.asarray(image.convert('RGBA'))
+
+def make_figure(n=200, seed=0):
+    rng = np.random.default_rng(seed)
+    fig = plt.figure(figsize=(4, 3), dpi=100)
+    ax = fig.add_subplot(111, projection='3d')
+    for start, end in zip(rng.random((n, 3)), rng.random((n, 3))):
+        ax.plot(*zip(start, end), color=plt.cm.viridis(rng.random()), linewidth=0.8)
+    fig.text(0.02, 0.02, "200 capacitors", fontsize='x-small')
+    return fig
+
+def make_plan_figure(n=200, seed=0):
+    """2D figure whose axes adjust their box: equal aspect and a colorbar with a box aspect."""
+    rng = np.random.default_rng(seed)
+    fig = plt.figure(figsize=(4, 3), dpi=100)
+    ax = fig.add_subplot(111)
+    for start, end in zip(rng.random((n, 2)), rng.random((n, 2)) * [2, 1]):
+        ax.plot(*zip(start, end), color=plt.cm.viridis(rng.random()), linewidth=0.8)
+    ax.set_aspect('equal', adjustable='box')
+    fig.colorbar(plt.cm.ScalarMappable(cmap='viridis'), ax=ax, shrink=0.7)
+    fig.text(0.02, 0.02, "200 capacitors", fontsize='x-small')
+    return fig
+
+def test_png_round_trip_in_bands():
+    rgba = random_image(700, 123)
+    buffer = io.BytesIO()
+    writer = PngWriter(buffer, 123, 700)
+    for top in range(0, 700, 256):
+        writer.write_rows(rgba[top:top + 256])
+    writer.close()
+    buffer.seek(0)
+    np.testing.assert_array_equal(read_image(buffer), rgba)
+
+def test_png_writer_checks_rows():
+    writer = PngWriter(io.BytesIO(), 10, 4)
+    with pytest.raises(ValueError):
+        writer.write_rows(random_image(2, 9))
+    writer.write_rows(random_image(2, 10))
+    with pytest.raises(ValueError):
+        writer.close()
+
+def test_write_png_reports_progress(tmp_path):
+    rgba = random_image(600, 50, seed=1)
+    fractions = []
+    write_png(tmp_path / "a.png", rgba, fractions.append, 0.5, 1.0)
+    np.testing.assert_array_equal(read_image(tmp_path / "a.png"), rgba)
+    assert fractions == sorted(fractions) and fractions[-1] == 1.0 and fractions[0] > 0.5
+
+def test_png_export_is_the_full_render_cropped(tmp_path):
+    fig = make_figure()
+    fig.savefig(tmp_path / "full.png", dpi=150)
+    export_snapshot(snapshot_figure(fig), str(tmp_path / "export.png"), dpi=150)
+    fig.set_dpi(150)
+    fig.canvas.draw()
+    left, top, width, height = tight_region(fig, fig.canvas.get_renderer())
+    plt.close(fig)
+
+    # The padding below the figure text reaches past the figure, which is white there
+    assert top + height > fig.bbox.height
+    expected = crop_region(read_image(tmp_path / "full.png"), (left, top, width, height), 255)
+    np.testing.assert_array_equal(read_image(tmp_path / "export.png"), expected)
+
+def test_crop_region_fills_outside_the_image():
+    rgba = random_image(30, 40, seed=5)
+    np.testing.assert_array_equal(crop_region(rgba, (5, 6, 20, 10), 0), rgba[6:16, 5:25])
+    cropped = crop_region(rgba, (-3, 25, 50, 8), [1, 2, 3, 4])
+    np.testing.assert_array_equal(cropped[:5, 3:43], rgba[25:, :])
+    assert (cropped[5:] == [1, 2, 3, 4]).all() and (cropped[:, :3] == [1, 2, 3, 4]).all()
+    assert (cropped[:, 43:] == [1, 2, 3, 4]).all()
+    assert (crop_region(rgba, (50, 50, 4, 4), 7) == 7).all()
+
+def test_png_export_is_framed_like_a_tight_savefig(tmp_path):
+    fig = plt.figure(figsize=(4, 3), dpi=100)
+    ax = fig.add_axes([0.3, 0.3, 0.4, 0.4])
+    ax.plot([0, 1], [0, 1])
+    ax.set_title("Plan view")
+    # A filled corner, which a trim guessing the background from the corner pixel would keep as content
+    fig.add_artist(plt.Rectangle((0.9, 0.9), 0.1, 0.1, transform=fig.transFigure, color='black'))
+    fig.savefig(tmp_path / "tight.png", dpi=150, bbox_inches='tight')
+    export_snapshot(snapshot_figure(fig), str(tmp_path / "export.png"), dpi=150)
+    plt.close(fig)
+
+    tight, export = read_image(tmp_path / "tight.png"), read_image(tmp_path / "export.png")
+    assert np.abs(np.subtract(tight.shape, export.shape)).max() <= 1
+    # The corner keeps its padding of figure background beyond the figure edge
+    pad = int(round(exporter.TIGHT_PAD_INCHES * 150))
+    assert (export[:pad - 1, -pad + 1:, :3] == 255).all() and (export[pad + 1, -pad - 1, :3] == 0).all()
+
+def test_export_leaves_the_figure_alone(tmp_path):
+    fig = make_figure(20)
+    size, dpi = fig.get_size_inches().copy(), fig.dpi
+    export_snapshot(snapshot_figure(fig), str(tmp_path / "a.png"), dpi=300)
+    np.testing.assert_array_equal(fig.get_size_inches(), size)
+    assert fig.dpi == dpi
+    plt.close(fig)
+
+def test_cancelled_export_leaves_no_file(tmp_path):
+    fig = make_figure(50)
+    snapshot = snapshot_figure(fig)
+    plt.close(fig)
+
+    def report(fraction, message):
+        if fraction > 0.3:
+            raise JobCancelled("Saving a.png")
+
+    with pytest.raises(JobCancelled):
+        export_snapshot(snapshot, str(tmp_path / "a.png"), report=report)
+    assert os.listdir(tmp_path) == []
+
+def test_vector_export_rasterizes_edges(tmp_path):
+    fig = make_figure(500)
+    snapshot = snapshot_figure(fig)
+    fig.savefig(tmp_path / "vector.svg", bbox_inches='tight')
+    plt.close(fig)
+    export_snapshot(snapshot, str(tmp_path / "export.svg"), dpi=100)
+    svg = (tmp_path / "export.svg").read_text()
+    assert '<image' in svg
+    assert os.path.getsize(tmp_path / "export.svg") < os.path.getsize(tmp_path / "vector.svg")
+
+def write_tiff(file, rgba, tile_size, order):
+    writer = TiffTileWriter(file, rgba.shape[1], rgba.shape[0], tile_size)
+    for tile_row, tile_column in order:
+        top, left = tile_row * tile_size, tile_column * tile_size
+        writer.write_tile(tile_row, tile_column, rgba[top:top + tile_size, left:left + tile_size])
+    writer.close()
+
+@pytest.mark.parametrize('big', [False, True])
+def test_tiff_round_trip_with_tiles_in_any_order(monkeypatch, big):
+    if big:
+        monkeypatch.setattr(exporter, 'CLASSIC_TIFF_MAX_BYTES', 0)
+    rgba = random_image(100, 150, seed=2)
+    tiles = [(row, column) for row in range(4) for column in range(5)]
+    order = [tiles[i] for i in np.random.default_rng(3).permutation(len(tiles))]
+    buffer = io.BytesIO()
+    write_tiff(buffer, rgba, 32, order)
+    assert buffer.getvalue()[2:4] == (b'\x2b\x00' if big else b'\x2a\x00')
+    buffer.seek(0)
+    np.testing.assert_array_equal(read_image(buffer), rgba)
+
+def test_tiff_tiles_must_be_multiples_of_16():
+    with pytest.raises(ValueError):
+        TiffTileWriter(io.BytesIO(), 10, 10, tile_size=40)
+
+# The colorbar's gradient image is resampled per tile, which can shift its edge pixels
+@pytest.mark.parametrize('make, resampled_pixels', [(make_figure, 0), (make_plan_figure, 8)])
+def test_tiled_render_matches_a_single_tile(tmp_path, make, resampled_pixels):
+    fig = make(60, seed=4)
+    snapshot = snapshot_figure(fig)
+    fig.savefig(tmp_path / "full.png", dpi=100)
+    plt.close(fig)
+
+    _, width, height = export_tiled(snapshot, str(tmp_path / "single.png"), 100, tile_size=4096)
+    assert export_tiled(snapshot, str(tmp_path / "tiled.tif"), 100, tile_size=128) == \
+        (str(tmp_path / "tiled.tif"), width, height)
+    export_tiled(snapshot, str(tmp_path / "banded.png"), 100, tile_size=128, band_bytes=width * 4 * 50)
+
+    single = read_image(tmp_path / "single.png")
+    assert single.shape == (height, width, 4)
+
+    # The fixed layout is the one savefig draws at the full size
+    region = TiledRenderer(restore_figure(snapshot), 100).region
+    np.testing.assert_array_equal(single, crop_region(read_image(tmp_path / "full.png"), region, 255))
+    for name in ("tiled.tif", "banded.png"):
+        tiled = read_image(tmp_path / name)
+        assert tiled.shape == single.shape
+        # Antialiased pixels along tile seams may differ by a few levels
+        difference = np.abs(tiled.astype(int) - single)
+        assert (difference.max(axis=2) > 16).sum() <= resampled_pixels and (difference > 0).mean() < 0.05
+
+def test_tiled_render_rejects_other_formats(tmp_path):
+    with pytest.raises(ValueError):
+        export_tiled(b"", str(tmp_path / "a.jpg"), 150)
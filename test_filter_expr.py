@@ -0,0 +1,82 @@
+import fnmatch
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from filter_expr import FilterExpression, load_presets, save_presets
+from layers import layer_bounds
+
+def make_edges(n=500, seed=0):
+    """Random edges on three Z layers, some of them vias."""
+    rng = np.random.default_rng(seed)
+    start_z = rng.choice([0.0, 1.0, 2.0], n) + rng.normal(0, 1e-4, n)
+    end_z = np.where(rng.random(n) < 0.2, np.minimum(start_z + 1, 2.0), start_z)
+    return pd.DataFrame({
+        'Capacitor_Name': [f"{rng.choice(['A26GateLine', 'BGateLine', 'Net'])}_{i % 17}" for i in range(n)],
+        'Start_X': rng.random(n), 'Start_Y': rng.random(n), 'Start_Z': start_z,
+        'End_X': rng.random(n), 'End_Y': rng.random(n), 'End_Z': end_z,
+        'Value': rng.lognormal(-7, 2, n)
+    })
+
+def reference_fields(df):
+    lengths = np.sqrt((df['End_X'] - df['Start_X']) ** 2 + (df['End_Y'] - df['Start_Y']) ** 2 +
+                      (df['End_Z'] - df['Start_Z']) ** 2)
+    return {
+        'value': df['Value'], 'length': lengths,
+        'x': (df['Start_X'] + df['End_X']) / 2, 'y': (df['Start_Y'] + df['End_Y']) / 2,
+        'z': (df['Start_Z'] + df['End_Z']) / 2, 'x0': df['Start_X'], 'z1': df['End_Z'],
+        'name': df['Capacitor_Name']
+    }
+
+def test_expressions_match_pandas():
+    df = make_edges()
+    f = reference_fields(df)
+    layers = layer_bounds(df)
+    # '~' finds the pattern anywhere in the name
+    matches = lambda pattern: f['name'].map(lambda name: fnmatch.fnmatchcase(name, f"*{pattern}*"))
+    cases = {
+        "value > 1e-3": f['value'] > 1e-3,
+        "value <= 5e-4 or length >= 0.8": (f['value'] <= 5e-4) | (f['length'] >= 0.8),
+        "not (x < 0.5 and y < 0.5)": ~((f['x'] < 0.5) & (f['y'] < 0.5)),
+        "x0 in range(0.2, 0.4)": (f['x0'] >= 0.2) & (f['x0'] <= 0.4),
+        "z in layer(1)": (f['z'] >= layers[1, 0]) & (f['z'] <= layers[1, 1]),
+        "z1 in layer(1, 2) and value != 0": (f['z1'] >= layers[1, 0]) & (f['z1'] <= layers[2, 1]),
+        "z1 in layer(2, 1)": (f['z1'] >= layers[1, 0]) & (f['z1'] <= layers[2, 1]),
+        "name ~ '*GateLine_1[34]'": matches('*GateLine_1[34]'),
+        "name ~ 'GateLine*'": f['name'].str.contains('GateLine'),
+        "name ~ 'Net_1'": f['name'].str.startswith('Net_1'),
+        "name == 'Net_3' or NAME != 'Net_3' and value < -1": (f['name'] == 'Net_3'),
+        "x > -0.5 and value > 1e-3 and z in layer(2) and length < 0.9 and name ~ 'GateLine*'":
+            (f['value'] > 1e-3) & (f['z'] >= layers[2, 0]) & (f['z'] <= layers[2, 1]) &
+            (f['length'] < 0.9) & matches('GateLine*'),
+    }
+    for text, expected in cases.items():
+        np.testing.assert_array_equal(FilterExpression(text).evaluate(df), expected.to_numpy(dtype=bool), text)
+
+def test_constant_expression_broadcasts():
+    df = make_edges(20)
+    assert FilterExpression("1 < 2").evaluate(df).tolist() == [True] * 20
+
+@pytest.mark.parametrize("text", [
+    "value >", "value > 'a'", "name < 'a'", "size > 1", "value in range(1)", "z in layer(1.5)",
+    "(value > 1", "value > 1 value", "name ~ pattern", "value @ 1", "length in layer(1) or",
+])
+def test_invalid_expressions_raise(text):
+    with pytest.raises(ValueError):
+        FilterExpression(text)
+
+def test_missing_layer_is_reported_on_evaluation():
+    expression = FilterExpression("z in layer(7)")
+    with pytest.raises(ValueError, match="Layer 7 does not exist"):
+        expression.evaluate(make_edges(50))
+    with pytest.raises(ValueError, match="Layer -1 does not exist"):
+        FilterExpression("z in layer(1, -1)").evaluate(make_edges(50))
+
+def test_presets_round_trip(tmp_path):
+    path = tmp_path / "filters.json"
+    assert load_presets(path) == {}
+    save_presets({'big': "value > 1e-3", 'gates': "name ~ '*Gate*'"}, path)
+    assert load_presets(path) == {'big': "value > 1e-3", 'gates': "name ~ '*Gate*'"}
+    path.write_text("not json")
+    assert load_presets(path) == {}
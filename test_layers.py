@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+
+from layers import LayerIndex, find_layers, layer_bounds, layer_key_range, plan_polylines
+
+def make_edges(n=2000, seed=0, heights=(0.0, 1.0, 2.5, 4.0)):
+    """Edges on a few metal layers with small Z scatter; about a fifth are vias to the next layer up."""
+    rng = np.random.default_rng(seed)
+    layer = rng.integers(0, len(heights), n)
+    via = (rng.random(n) < 0.2) & (layer < len(heights) - 1)
+    heights = np.asarray(heights)
+    start_z = heights[layer] + rng.uniform(0, 1e-3, n)
+    end_z = heights[layer + via] + rng.uniform(0, 1e-3, n)
+    flip = rng.random(n) < 0.5
+    start_z, end_z = np.where(flip, end_z, start_z), np.where(flip, start_z, end_z)
+    df = pd.DataFrame({'Start_X': rng.random(n), 'Start_Y': rng.random(n), 'Start_Z': start_z,
+                       'End_X': rng.random(n), 'End_Y': rng.random(n), 'End_Z': end_z})
+    return df, layer, via
+
+def test_find_layers_splits_at_gaps():
+    z = [0.0, 0.001, 0.0005, 1.0, 1.002, 2.5, 2.5]
+    np.testing.assert_array_equal(find_layers(z), [[0.0, 0.001], [1.0, 1.002], [2.5, 2.5]])
+    assert find_layers([]).shape == (0, 2)
+
+def test_keys_match_layers_and_vias():
+    df, layer, via = make_edges()
+    index = LayerIndex(df, layer_bounds(df))
+    assert index.num_layers == 4
+    np.testing.assert_array_equal(index.keys, 2 * layer + via)
+
+def test_rows_match_brute_force_selection():
+    df, layer, via = make_edges(seed=1)
+    index = LayerIndex(df, layer_bounds(df))
+    keys = 2 * layer + via
+    for first, last, is_via in [(0, None, False), (2, None, False), (1, 2, False), (3, 0, False), (0, 3, False),
+                                (1, None, True), (3, None, True)]:
+        low, high = layer_key_range(first, last, via=is_via)
+        expected = np.flatnonzero((keys >= low) & (keys <= high))
+        np.testing.assert_array_equal(np.sort(index.rows(low, high)), expected)
+
+def test_layer_range_includes_inner_vias_only():
+    assert layer_key_range(1, 2) == (2, 4)
+    assert layer_key_range(2, 1) == (2, 4)
+    assert layer_key_range(1, via=True) == (3, 3)
+
+def test_values_between_layers_belong_to_the_one_below():
+    index = LayerIndex(pd.DataFrame({'Start_Z': [0.0], 'End_Z': [0.0]}), [[0.0, 0.1], [1.0, 1.1]])
+    np.testing.assert_array_equal(index.layer_of(np.array([-1.0, 0.05, 0.5, 1.05, 9.0])), [0, 0, 0, 1, 1])
+
+def split_at_nan_rows(polyline):
+    """Pieces of a polyline between its all-NaN rows."""
+    gaps = np.isnan(polyline).all(axis=1)
+    pieces = np.split(polyline, np.flatnonzero(gaps))
+    return [piece[~np.isnan(piece).all(axis=1)] for piece in pieces if not np.isnan(piece).all()]
+
+def test_plan_polylines_group_edges_per_layer_and_color():
+    rng = np.random.default_rng(5)
+    n = 500
+    starts, ends = rng.random((n, 3)), rng.random((n, 3))
+    keys = rng.integers(0, 4, n)
+    color_ids = rng.integers(-1, 7, n)  # Out-of-range ids are clipped to the 5 colors
+
+    polylines = plan_polylines(starts, ends, keys, color_ids, 5, max_edges=30)
+    groups = [(key, color_id) for key, color_id, _ in polylines]
+    assert groups == sorted(groups)
+
+    # Every edge appears once, in its group, in the original order, split into chunks of 30
+    for key in range(4):
+        for color_id in range(5):
+            edges = np.flatnonzero((keys == key) & (np.clip(color_ids, 0, 4) == color_id))
+            pieces = [split_at_nan_rows(polyline) for k, c, polyline in polylines if (k, c) == (key, color_id)]
+            assert [len(chunk) for chunk in pieces] == [min(30, len(edges) - i) for i in range(0, len(edges), 30)]
+            segments = [segment for chunk in pieces for segment in chunk]
+            np.testing.assert_array_equal(np.array(segments).reshape(-1, 4),
+                                          np.hstack([starts[edges, :2], ends[edges, :2]]))
+
+def test_plan_polylines_break_between_every_segment():
+    starts = np.array([[0.0, 0.0], [1.0, 1.0], [2.0, 2.0]])
+    ends = starts + 0.5
+    (key, color_id, polyline), = plan_polylines(starts, ends, [2, 2, 2], [1, 1, 1], 3, max_edges=10)
+    assert (key, color_id) == (2, 1) and polyline.shape == (9, 2)
+    np.testing.assert_array_equal(polyline[0::3], starts)
+    np.testing.assert_array_equal(polyline[1::3], ends)
+    assert np.isnan(polyline[2::3]).all()
+    assert plan_polylines(np.empty((0, 2)), np.empty((0, 2)), [], [], 3, max_edges=10) == []
@@ -0,0 +1,33 @@
+import fnmatch
+
+import numpy as np
+
+from name_index import NameIndex
+
+NAMES = ['A26GateLine_0', 'A26GateLine_13', 'A26GateLine_1', 'A2Gate', 'BGateLine_3', 'A26GateLine_4',
+         'a26gateline_1', 'Res1', 'A26', 'A27GateLine_1', 'BGateLine_14']
+
+def test_prefix_matches_startswith():
+    index = NameIndex(NAMES)
+    for prefix in ('', 'A', 'A26', 'A26GateLine_1', 'BGate', 'Z', 'a26'):
+        expected = sorted(i for i, name in enumerate(NAMES) if name.startswith(prefix))
+        assert sorted(index.prefix(prefix).tolist()) == expected, prefix
+
+def test_wildcards_match_fnmatch():
+    index = NameIndex(NAMES)
+    for pattern in ('*GateLine_1', 'A26GateLine_[34]', 'A2?GateLine_1', '*', 'B*_1?', '*gate*'):
+        expected = sorted(i for i, name in enumerate(NAMES) if fnmatch.fnmatchcase(name, pattern))
+        assert sorted(index.search(pattern).tolist()) == expected, pattern
+
+def test_search_without_wildcards_is_a_prefix_query():
+    index = NameIndex(NAMES)
+    np.testing.assert_array_equal(index.search('  A26Gate '), index.prefix('A26Gate'))
+
+def test_random_names_against_brute_force():
+    rng = np.random.default_rng(0)
+    names = [''.join(rng.choice(list('ABab01_'), rng.integers(1, 8))) for _ in range(3000)]
+    index = NameIndex(names)
+    for query in ('A', 'Ab', 'a_0', '*_1', 'A?b*', '[ab]1*'):
+        expected = sorted(i for i, name in enumerate(names)
+                          if (fnmatch.fnmatchcase(name, query) if any(c in query for c in '*?[') else name.startswith(query)))
+        assert sorted(index.search(query).tolist()) == expected, query
@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+from outliers import MAD_SCALE, edge_lengths, find_outliers, robust_scores
+
+def make_edges(values, lengths):
+    lengths = np.asarray(lengths, dtype=float)
+    return pd.DataFrame({
+        'Start_X': 0.0, 'Start_Y': 0.0, 'Start_Z': 0.0,
+        'End_X': lengths * 0.6, 'End_Y': lengths * 0.8, 'End_Z': 0.0,
+        'Value': values
+    })
+
+def test_edge_lengths():
+    np.testing.assert_allclose(edge_lengths(make_edges([1, 1, 1], [0.5, 2, 0])), [0.5, 2, 0])
+
+def test_robust_scores_match_median_and_mad():
+    rng = np.random.default_rng(0)
+    column = rng.normal(10, 2, 1001)
+    scores, log_space = robust_scores(column[:, None])
+    median = np.median(column)
+    mad = np.median(np.abs(column - median))
+    np.testing.assert_allclose(scores[:, 0], np.abs(column - median) / (MAD_SCALE * mad))
+    assert not log_space[0]
+
+def test_find_outliers_flags_planted_values_and_lengths():
+    rng = np.random.default_rng(1)
+    values = rng.uniform(1, 2, 500)
+    lengths = rng.uniform(0.9, 1.1, 500)
+    values[10] = 50.0
+    lengths[20] = 10.0
+    result = find_outliers(make_edges(values, lengths))
+    assert np.flatnonzero(result['value']).tolist() == [10]
+    assert np.flatnonzero(result['length']).tolist() == [20]
+    assert np.flatnonzero(result['any']).tolist() == [10, 20]
+
+def test_wide_ranges_use_log_space():
+    values = np.logspace(-3, 3, 200)
+    values[5] = 1e9
+    result = find_outliers(make_edges(values, np.ones(200)))
+    assert result['log_space'][0]
+    assert np.flatnonzero(result['value']).tolist() == [5]
+
+def test_constant_columns_have_no_outliers():
+    result = find_outliers(make_edges(np.ones(50), np.ones(50)))
+    assert not result['any'].any()
@@ -0,0 +1,215 @@
+import matplotlib
+matplotlib.use('Agg')
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import pytest
+from mpl_toolkits.mplot3d import proj3d
+
+from picking import ScreenPicker
+
+def make_axes(projection='3d'):
+    fig = plt.figure(figsize=(4, 3), dpi=100)
+    ax = fig.add_subplot(111, projection=projection)
+    ax.set_xlim(0, 1)
+    ax.set_ylim(0, 1)
+    if projection == '3d':
+        ax.set_zlim(0, 1)
+        ax.view_init(elev=25, azim=40)
+    fig.canvas.draw()
+    return fig, ax
+
+def make_frame(n, prefix, unit, seed):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(rng.random((n, 6)), columns=['Start_X', 'Start_Y', 'Start_Z', 'End_X', 'End_Y', 'End_Z'])
+    df[f'{prefix}_Name'] = [f"{prefix[0]}{i}" for i in range(n)]
+    df['Value'] = rng.random(n)
+    df['Unit'] = unit
+    # A filtered frame: the index no longer matches the row positions
+    df.index = np.arange(n) * 3 + 7
+    return df
+
+def make_picker(projection='3d'):
+    fig, ax = make_axes(projection)
+    capacitors = make_frame(40, 'Capacitor', 'F', 0)
+    resistors = make_frame(25, 'Resistor', 'Ohm', 1)
+    picker = ScreenPicker(ax, [('Capacitor', capacitors, 'Capacitor_Name'), ('Empty', None, 'Name'),
+                               ('Resistor', resistors, 'Resistor_Name')])
+    return fig, ax, picker, [('Capacitor', capacitors, 'Capacitor_Name'), ('Resistor', resistors, 'Resistor_Name')]
+
+def reference_screen(ax, points):
+    """Screen pixels from matplotlib's own projection (plan views ignore Z)."""
+    if ax.name == '3d':
+        xs, ys, _ = proj3d.proj_transform(points[:, 0], points[:, 1], points[:, 2], ax.get_proj())
+        points = np.column_stack([xs, ys])
+    return ax.transData.transform(points[:, :2])
+
+def reference_edges(ax, sources):
+    """(kind, df, name column, row, screen start, screen end) of every edge, source by source."""
+    edges = []
+    for kind, df, name_column in sources:
+        starts = reference_screen(ax, df[['Start_X', 'Start_Y', 'Start_Z']].values)
+        ends = reference_screen(ax, df[['End_X', 'End_Y', 'End_Z']].values)
+        edges.extend((kind, df, name_column, row, starts[row], ends[row]) for row in range(len(df)))
+    return edges
+
+def brute_force_pick(edges, x, y, radius, visible=None):
+    """Nearest edge within radius of (x, y) by testing every screen segment."""
+    best, best_distance = None, np.inf
+    point = np.array([x, y])
+    for edge, (_, _, _, _, start, end) in enumerate(edges):
+        if visible is not None and not visible[edge]:
+            continue
+        direction = end - start
+        t = np.clip(np.dot(point - start, direction) / max(np.dot(direction, direction), 1e-300), 0, 1)
+        distance = np.linalg.norm(start + t * direction - point)
+        if distance <= radius and distance < best_distance:
+            best, best_distance = edge, distance
+    return best, best_distance
+
+def check_pick(picked, edges, expected, distance):
+    if expected is None:
+        assert picked is None
+        return
+    kind, df, name_column, row, _, _ = edges[expected]
+    assert picked['kind'] == kind and picked['row'] == row
+    assert picked['name'] == df[name_column].iloc[row]
+    assert picked['value'] == df['Value'].iloc[row] and picked['unit'] == df['Unit'].iloc[row]
+    assert np.isclose(picked['distance'], distance, atol=1e-6)
+
+@pytest.mark.parametrize('projection', ['3d', None])
+def test_pick_matches_brute_force_on_the_projected_edges(projection):
+    fig, ax, picker, sources = make_picker(projection)
+    edges = reference_edges(ax, sources)
+    rng = np.random.default_rng(2)
+
+    # The midpoints of projected edges, and random points over the axes
+    queries = [(start + end) / 2 for _, _, _, _, start, end in edges[::5]]
+    queries += list(ax.bbox.min + rng.random((100, 2)) * ax.bbox.size)
+    picked_any = False
+    for x, y in queries:
+        expected, distance = brute_force_pick(edges, x, y, 6.0)
+        check_pick(picker.pick(x, y), edges, expected, distance)
+        picked_any |= expected is not None
+    assert picked_any
+    plt.close(fig)
+
+def test_pick_honours_the_radius():
+    fig, ax, picker, sources = make_picker()
+    edges = reference_edges(ax, sources)
+
+    # A point off the lines, at a known distance from the nearest edge
+    x, y = ax.bbox.min + ax.bbox.size * [0.3, 0.6]
+    expected, distance = brute_force_pick(edges, x, y, np.inf)
+    assert distance > 0
+    assert picker.pick(x, y, radius=distance * 0.99) is None
+    check_pick(picker.pick(x, y, radius=distance * 1.01), edges, expected, distance)
+    plt.close(fig)
+
+def test_hidden_edges_are_never_picked():
+    fig, ax, picker, sources = make_picker()
+    edges = reference_edges(ax, sources)
+    x, y = (edges[3][4] + edges[3][5]) / 2
+
+    visible = np.ones(len(edges), dtype=bool)
+    for _ in range(4):
+        expected, distance = brute_force_pick(edges, x, y, 20.0, visible)
+        picker.set_visible(visible)
+        check_pick(picker.pick(x, y, radius=20.0), edges, expected, distance)
+        if expected is None:
+            break
+        visible[expected] = False
+
+    picker.set_visible(None)
+    expected, distance = brute_force_pick(edges, x, y, 20.0)
+    check_pick(picker.pick(x, y, radius=20.0), edges, expected, distance)
+    plt.close(fig)
+
+def test_pick_follows_the_view():
+    fig, ax, picker, sources = make_picker()
+    picker.pick(0, 0)
+    ax.view_init(elev=70, azim=-60)
+    fig.canvas.draw()
+
+    edges = reference_edges(ax, sources)
+    x, y = (edges[50][4] + edges[50][5]) / 2
+    expected, distance = brute_force_pick(edges, x, y, 6.0)
+    check_pick(picker.pick(x, y), edges, expected, distance)
+    plt.close(fig)
+
+def test_nothing_to_pick():
+    fig, ax = make_axes()
+    picker = ScreenPicker(ax, [('Capacitor', None, 'Capacitor_Name')])
+    assert picker.pick(100, 100) is None
+    plt.close(fig)
+
+def brute_force_inside(edges, inside):
+    """Mask of the edges with both projected endpoints passing inside(point)."""
+    return np.array([inside(start) and inside(end) for _, _, _, _, start, end in edges])
+
+def point_in_polygon(point, vertices):
+    """Even-odd ray casting test."""
+    x, y = point
+    inside = False
+    for (x0, y0), (x1, y1) in zip(vertices, np.roll(vertices, -1, axis=0)):
+        if (y0 > y) != (y1 > y) and x < x0 + (y - y0) * (x1 - x0) / (y1 - y0):
+            inside = not inside
+    return inside
+
+def test_box_selection_matches_brute_force_with_any_corner_order():
+    fig, ax, picker, sources = make_picker()
+    edges = reference_edges(ax, sources)
+    (left, bottom), (right, top) = ax.bbox.min + ax.bbox.size * [0.2, 0.15], ax.bbox.min + ax.bbox.size * [0.85, 0.9]
+
+    expected = brute_force_inside(edges, lambda p: left <= p[0] <= right and bottom <= p[1] <= top)
+    assert 0 < expected.sum() < len(edges)
+    for x0, y0, x1, y1 in [(left, bottom, right, top), (right, top, left, bottom), (left, top, right, bottom)]:
+        np.testing.assert_array_equal(picker.select_box(x0, y0, x1, y1), expected)
+    plt.close(fig)
+
+def test_lasso_selection_matches_brute_force():
+    fig, ax, picker, sources = make_picker()
+    edges = reference_edges(ax, sources)
+
+    # A concave polygon, so a bounding box test alone would disagree
+    vertices = ax.bbox.min + ax.bbox.size * np.array([[0.1, 0.1], [0.9, 0.1], [0.9, 0.9], [0.5, 0.3], [0.1, 0.9]])
+    expected = brute_force_inside(edges, lambda p: point_in_polygon(p, vertices))
+    assert 0 < expected.sum() < len(edges)
+    np.testing.assert_array_equal(picker.select_lasso(vertices), expected)
+
+    # Fewer than three vertices enclose nothing
+    for short in (vertices[:0], vertices[:1], vertices[:2]):
+        mask = picker.select_lasso(short)
+        assert mask.shape == (len(edges),) and not mask.any()
+    plt.close(fig)
+
+def test_selection_keeps_only_visible_edges():
+    fig, ax, picker, sources = make_picker()
+    edges = reference_edges(ax, sources)
+    visible = np.random.default_rng(3).random(len(edges)) < 0.5
+    picker.set_visible(visible)
+
+    everything = picker.select_box(*ax.bbox.min - 1000, *ax.bbox.max + 1000)
+    np.testing.assert_array_equal(everything, visible)
+    vertices = ax.bbox.min + ax.bbox.size * np.array([[0.0, 0.0], [1.0, 0.0], [0.5, 1.0]])
+    expected = brute_force_inside(edges, lambda p: point_in_polygon(p, vertices)) & visible
+    np.testing.assert_array_equal(picker.select_lasso(vertices), expected)
+    plt.close(fig)
+
+def test_selected_frames_map_back_to_the_sources():
+    fig, ax, picker, sources = make_picker()
+    edges = reference_edges(ax, sources)
+    mask = np.zeros(len(edges), dtype=bool)
+    mask[[1, 4, 39, 45, 64]] = True
+
+    frames = picker.selected_frames(mask)
+    assert [kind for kind, _ in frames] == ['Capacitor', 'Resistor']
+    pd.testing.assert_frame_equal(frames[0][1], sources[0][1].iloc[[1, 4, 39]])
+    pd.testing.assert_frame_equal(frames[1][1], sources[1][1].iloc[[5, 24]])
+
+    # Sources without selected edges are left out
+    mask[40:] = False
+    assert [kind for kind, _ in picker.selected_frames(mask)] == ['Capacitor']
+    assert picker.selected_frames(np.zeros(len(edges), dtype=bool)) == []
+    plt.close(fig)
@@ -0,0 +1,93 @@
+import matplotlib
+matplotlib.use('Agg')
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+from mpl_toolkits.mplot3d import proj3d
+
+from projection import ProjectionCache, ValueLabels, project_points
+
+def make_axes(projection='3d'):
+    fig = plt.figure(figsize=(4, 3), dpi=100)
+    ax = fig.add_subplot(111, projection=projection)
+    ax.set_xlim(0, 1)
+    ax.set_ylim(0, 1)
+    if projection == '3d':
+        ax.set_zlim(0, 1)
+        ax.view_init(elev=25, azim=40)
+    fig.canvas.draw()
+    return fig, ax
+
+def reference_screen(ax, points):
+    """Screen pixels from matplotlib's own projection, one coordinate array at a time."""
+    xs, ys, _ = proj3d.proj_transform(points[:, 0], points[:, 1], points[:, 2], ax.get_proj())
+    return ax.transData.transform(np.column_stack([xs, ys]))
+
+def make_edges(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(rng.random((n, 6)), columns=['Start_X', 'Start_Y', 'Start_Z', 'End_X', 'End_Y', 'End_Z'])
+
+def test_project_points_matches_proj3d():
+    fig, ax = make_axes()
+    points = np.random.default_rng(0).random((500, 3))
+    screen, depth = project_points(ax, points)
+    np.testing.assert_allclose(screen, reference_screen(ax, points), atol=1e-6)
+    assert np.isfinite(depth).all()
+    plt.close(fig)
+
+def test_plan_view_uses_x_and_y():
+    fig, ax = make_axes(projection=None)
+    points = np.random.default_rng(1).random((50, 3))
+    screen, depth = project_points(ax, points)
+    np.testing.assert_allclose(screen, ax.transData.transform(points[:, :2]))
+    np.testing.assert_array_equal(depth, points[:, 2])
+    plt.close(fig)
+
+def test_cache_projects_again_only_when_the_view_changes():
+    fig, ax = make_axes()
+    cache = ProjectionCache(ax)
+    df = make_edges(100)
+    assert cache.add_edges(df) == cache.add_edges(df)  # Registered once per DataFrame
+    labels = cache.add_points(np.random.default_rng(2).random((10, 3)))
+
+    screen, _ = cache.project()
+    version = cache.version
+    assert cache.project()[0] is screen and cache.version == version
+
+    ax.view_init(elev=60, azim=-30)
+    fig.canvas.draw()
+    screen, _ = cache.project()
+    assert cache.version == version + 1
+    start, end = cache.edge_indices([df])
+    np.testing.assert_allclose(screen[start], reference_screen(ax, df[['Start_X', 'Start_Y', 'Start_Z']].to_numpy()),
+                               atol=1e-6)
+    np.testing.assert_allclose(screen[labels], reference_screen(ax, cache._points[labels]), atol=1e-6)
+    plt.close(fig)
+
+def test_resize_only_moves_the_projected_points():
+    fig, ax = make_axes()
+    cache = ProjectionCache(ax)
+    points = np.random.default_rng(3).random((20, 3))
+    cache.add_points(points)
+    cache.project()
+    xy = cache._xy
+
+    fig.set_size_inches(6, 5)
+    fig.canvas.draw()
+    screen, _ = cache.project()
+    assert cache._xy is xy
+    np.testing.assert_allclose(screen, reference_screen(ax, points), atol=1e-6)
+    plt.close(fig)
+
+def test_value_labels_skip_overlaps_and_points_outside():
+    fig, ax = make_axes()
+    cache = ProjectionCache(ax)
+    points = np.array([[0.5, 0.5, 0.5], [0.5, 0.5, 0.5], [1.0, 0.0, 0.0], [4.0, 0.5, 0.5]])
+    labels = ValueLabels(ax, cache, points, ["1.0e-3", "2.0e-3", "3.0e-3", "4.0e-3"])
+    ax.add_artist(labels)
+    fig.canvas.draw()
+    placed = labels.place(fig.canvas.get_renderer())
+    assert len(placed) == 2 and 2 in placed and 3 not in placed
+    assert labels._placed_version == cache.version
+    plt.close(fig)
@@ -0,0 +1,130 @@
+import numpy as np
+import pandas as pd
+
+import proximity
+from proximity import ProximityCache, _make_tiles, edge_endpoints, find_close_pairs
+
+def make_edges(n, seed=0, length=0.05):
+    """Random short edges in the unit cube."""
+    rng = np.random.default_rng(seed)
+    starts = rng.random((n, 3))
+    ends = starts + rng.normal(0, length, (n, 3))
+    return pd.DataFrame({
+        'Capacitor_Name': [f"C{i}" for i in range(n)],
+        'Start_X': starts[:, 0], 'Start_Y': starts[:, 1], 'Start_Z': starts[:, 2],
+        'End_X': ends[:, 0], 'End_Y': ends[:, 1], 'End_Z': ends[:, 2],
+        'Value': rng.random(n)
+    })
+
+def brute_force_pairs(starts, ends, threshold):
+    """Edge pairs whose closest endpoints are less than threshold apart, by comparing every pair."""
+    pairs = {}
+    for i in range(len(starts)):
+        for j in range(i + 1, len(starts)):
+            distance = min(np.linalg.norm(a - b) for a in (starts[i], ends[i]) for b in (starts[j], ends[j]))
+            if distance < threshold:
+                pairs[(i, j)] = distance
+    return pairs
+
+def as_dict(first, second, distances):
+    return {(int(a), int(b)): float(d) for a, b, d in zip(first, second, distances)}
+
+def assert_same_pairs(result, expected):
+    result = as_dict(*result)
+    assert result.keys() == expected.keys()
+    for key, distance in expected.items():
+        assert np.isclose(result[key], distance)
+
+def test_find_close_pairs_matches_brute_force():
+    starts, ends = edge_endpoints(make_edges(300))
+    for threshold in (0.01, 0.05, 0.1):
+        assert_same_pairs(find_close_pairs(starts, ends, threshold, workers=1),
+                          brute_force_pairs(starts, ends, threshold))
+
+def test_find_close_pairs_sorted_and_ordered():
+    starts, ends = edge_endpoints(make_edges(200))
+    first, second, _ = find_close_pairs(starts, ends, 0.1, workers=1)
+    assert np.all(first < second)
+    keys = first * len(starts) + second
+    assert np.all(np.diff(keys) > 0)
+
+def test_cache_masks_and_shrinks_threshold():
+    df = make_edges(250, seed=1)
+    starts, ends = edge_endpoints(df)
+    cache = ProximityCache()
+    cache.get_pairs(df, 0.1)
+
+    mask = np.random.default_rng(2).random(len(df)) < 0.6
+    expected = {key: distance for key, distance in brute_force_pairs(starts, ends, 0.05).items()
+                if mask[key[0]] and mask[key[1]]}
+    assert_same_pairs(cache.get_pairs(df, 0.05, mask), expected)
+    assert cache.threshold == 0.1
+
+def test_cache_grows_threshold_with_kept_tree():
+    df = make_edges(250, seed=3)
+    starts, ends = edge_endpoints(df)
+    cache = ProximityCache()
+    cache.get_pairs(df, 0.02)
+    assert cache.tree is None
+
+    assert_same_pairs(cache.get_pairs(df, 0.08), brute_force_pairs(starts, ends, 0.08))
+    tree = cache.tree
+    assert tree is not None
+    cache.get_pairs(df, 0.12)
+    assert cache.tree is tree
+
+def test_large_dataset_grows_threshold_in_parallel(monkeypatch):
+    monkeypatch.setattr(proximity, 'PARALLEL_MIN_POINTS', 200)
+    monkeypatch.setattr(proximity.os, 'cpu_count', lambda: 2)
+    searched = []
+    parallel = proximity._find_point_pairs_parallel
+    monkeypatch.setattr(proximity, '_find_point_pairs_parallel',
+                        lambda points, threshold, workers: searched.append(workers) or
+                        parallel(points, threshold, workers))
+    df = make_edges(250, seed=3)
+    starts, ends = edge_endpoints(df)
+    cache = ProximityCache()
+    cache.get_pairs(df, 0.02)
+    assert_same_pairs(cache.get_pairs(df, 0.08), brute_force_pairs(starts, ends, 0.08))
+    assert cache.tree is None and searched == [2, 2]
+
+def test_cache_recomputes_for_new_dataset():
+    cache = ProximityCache()
+    cache.get_pairs(make_edges(100, seed=4), 0.1)
+    df = make_edges(120, seed=5)
+    starts, ends = edge_endpoints(df)
+    assert_same_pairs(cache.get_pairs(df, 0.1), brute_force_pairs(starts, ends, 0.1))
+
+def test_computed_entry_is_installed_only_when_it_adds_coverage():
+    df = make_edges(200, seed=9)
+    starts, ends = edge_endpoints(df)
+    cache = ProximityCache()
+    entry = ProximityCache.compute(df, 0.05, cache.snapshot())
+    assert cache.df is None
+    cache.install(entry)
+    assert_same_pairs(cache.get_pairs(df, 0.05), brute_force_pairs(starts, ends, 0.05))
+
+    cache.get_pairs(df, 0.1)
+    cache.install(entry)
+    assert cache.threshold == 0.1
+
+def test_records_sorted_by_distance():
+    df = make_edges(150, seed=6)
+    records = ProximityCache().get_records(df, 'Capacitor_Name', 0.1, limit=5)
+    distances = [record['min_distance'] for record in records]
+    assert len(records) == 5
+    assert distances == sorted(distances)
+
+def test_parallel_tiles_match_single_tree():
+    starts, ends = edge_endpoints(make_edges(3000, seed=7, length=0.01))
+    single = find_close_pairs(starts, ends, 0.02, workers=1)
+    parallel = find_close_pairs(starts, ends, 0.02, workers=2)
+    for a, b in zip(single, parallel):
+        np.testing.assert_array_equal(a, b)
+
+def test_zero_threshold_finds_no_pairs():
+    starts, ends = edge_endpoints(make_edges(100, seed=8))
+    for workers in (1, 2):
+        first, second, distances = find_close_pairs(starts, ends, 0.0, workers=workers)
+        assert len(first) == len(second) == len(distances) == 0
+    assert len(_make_tiles(np.concatenate([starts, ends]), 0.0, 8)) == 1
@@ -0,0 +1,83 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from binning import analyze_distribution
+from quantile_sketch import QuantileSketch, read_csv_with_sketch
+
+# Allowed rank error of the default sketch; about 1.7 / k with some margin
+RANK_TOLERANCE = 0.015
+
+def rank_errors(sketch, values, qs):
+    """Distance between the requested fractions and the true ranks of the sketch's answers."""
+    values = np.sort(values)
+    answers = sketch.quantiles(qs)
+    low = np.searchsorted(values, answers, side='left') / len(values)
+    high = np.searchsorted(values, answers, side='right') / len(values)
+    return np.maximum(np.maximum(low - qs, qs - high), 0.0)
+
+def test_quantiles_within_rank_error():
+    values = np.random.default_rng(0).lognormal(0, 3, 200000)
+    sketch = QuantileSketch(seed=1)
+    for chunk in np.array_split(values, 37):
+        sketch.update(chunk)
+
+    qs = np.linspace(0, 1, 101)
+    assert rank_errors(sketch, values, qs).max() < RANK_TOLERANCE
+    assert sketch.count == len(values)
+    assert sketch.min == values.min() and sketch.max == values.max()
+    assert np.isclose(sketch.mean, values.mean())
+    assert sum(len(level) for level in sketch.levels) < 10 * sketch.k
+
+def test_ranks_within_rank_error():
+    values = np.random.default_rng(2).normal(0, 1, 100000)
+    sketch = QuantileSketch(seed=3)
+    sketch.update(values)
+    probes = np.linspace(-3, 3, 25)
+    exact = np.searchsorted(np.sort(values), probes, side='right') / len(values)
+    assert np.abs(sketch.ranks(probes) - exact).max() < RANK_TOLERANCE
+
+def test_merge_matches_one_sketch_of_both():
+    rng = np.random.default_rng(4)
+    first, second = rng.uniform(0, 1, 50000), rng.uniform(0.5, 2, 80000)
+    sketch, other = QuantileSketch(seed=5), QuantileSketch(seed=6)
+    sketch.update(first)
+    other.update(second)
+    sketch.merge(other)
+
+    values = np.concatenate([first, second])
+    assert sketch.count == len(values)
+    assert rank_errors(sketch, values, np.linspace(0, 1, 41)).max() < RANK_TOLERANCE
+
+def test_nan_values_are_skipped_and_empty_sketch_is_nan():
+    sketch = QuantileSketch()
+    assert np.isnan(sketch.median) and np.isnan(sketch.mean)
+    sketch.update([1.0, np.nan, 3.0])
+    assert sketch.count == 2 and sketch.median in (1.0, 3.0)
+
+def test_streamed_column_bins_like_the_loaded_values(tmp_path):
+    rng = np.random.default_rng(7)
+    df = pd.DataFrame({'Capacitor_Name': [f"C{i}" for i in range(60000)], 'Value': rng.exponential(2.0, 60000)})
+    path = tmp_path / "caps.csv"
+    df.to_csv(path, index=False)
+
+    loaded, sketch = read_csv_with_sketch(path, min_bytes=0, chunksize=7000)
+    df = pd.read_csv(path)
+    pd.testing.assert_frame_equal(loaded, df)
+    assert read_csv_with_sketch(path, min_bytes=os.path.getsize(path) + 1)[1] is None
+    streamed = analyze_distribution(None, 5, "quantile", sketch=sketch)
+    exact = analyze_distribution(df['Value'].values, 5, "quantile")
+
+    assert streamed['min'] == exact['min'] and streamed['max'] == exact['max']
+    assert np.isclose(streamed['mean'], exact['mean'])
+    assert abs(np.mean(df['Value'] <= streamed['median']) - 0.5) < RANK_TOLERANCE
+    assert np.abs(streamed['hist'] - exact['hist']).max() < RANK_TOLERANCE * len(df)
+
+def test_values_in_memory_give_exact_statistics():
+    values = np.random.default_rng(8).exponential(1.0, 5001)
+    sketch = QuantileSketch(k=8)
+    sketch.update(values)
+    result = analyze_distribution(values, 4, "quantile", sketch=sketch)
+    assert result['median'] == np.median(values)
+    np.testing.assert_allclose(result['bin_edges'], np.quantile(values, np.linspace(0, 1, 5)))
@@ -0,0 +1,79 @@
+import time
+
+import matplotlib
+matplotlib.use('Agg')
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+from projection import ProjectionCache
+from rasterizer import RasterLayer, rasterize_segments
+
+RED, BLUE = (1.0, 0.0, 0.0, 1.0), (0.0, 0.0, 1.0, 1.0)
+
+def test_horizontal_line_covers_its_pixels():
+    image = rasterize_segments([[2.0, 5.5]], [[12.0, 5.5]], RED, (10, 16))
+    np.testing.assert_allclose(image[5, 3:11, 3], 1.0, atol=0.01)
+    np.testing.assert_allclose(image[5, 3:11, :3], [[1.0, 0.0, 0.0]] * 8, atol=1e-12)
+    assert image[[4, 6], :, 3].max() == 0.0
+    assert image[:, 13:, 3].max() == 0.0
+
+def test_coverage_adds_up_to_segment_length():
+    rng = np.random.default_rng(0)
+    starts = rng.uniform(5, 95, (40, 2))
+    ends = starts + rng.uniform(-4, 4, (40, 2))
+    for start, end in zip(starts, ends):
+        image = rasterize_segments([start], [end], BLUE, (100, 100))
+        assert np.isclose(image[:, :, 3].sum(), max(np.hypot(*(end - start)), 1.0), rtol=0.02)
+
+def test_overlapping_colors_average_or_add():
+    starts, ends = [[0.0, 3.5], [0.0, 3.5]], [[8.0, 3.5], [8.0, 3.5]]
+    colors = np.array([RED, BLUE]) * [0.5, 1.0, 0.5, 1.0]
+    mean = rasterize_segments(starts, ends, colors, (8, 8))
+    added = rasterize_segments(starts, ends, colors, (8, 8), additive=True)
+    np.testing.assert_allclose(mean[3, 2:6, :3], [[0.25, 0.0, 0.25]] * 4, atol=1e-12)
+    np.testing.assert_allclose(added[3, 2:6, :3], [[0.5, 0.0, 0.5]] * 4, atol=0.01)
+
+def test_wide_lines_cover_more_rows():
+    image = rasterize_segments([[0.0, 10.5]], [[20.0, 10.5]], RED, (20, 20), linewidth=5)
+    assert np.all(image[8:13, 5:15, 3] > 0.99)
+    assert image[[7, 13], 5:15, 3].max() == 0.0
+
+def test_segments_outside_or_invalid_are_dropped():
+    image = rasterize_segments([[-50.0, 5.0], [np.nan, 1.0]], [[-40.0, 5.0], [5.0, 5.0]], RED, (10, 10))
+    assert image.max() == 0.0
+
+def test_clipped_segment_draws_like_a_short_one():
+    # A segment running far outside the image matches one that ends just past the border
+    shape = (60, 80)
+    start, direction = np.array([40.0, 30.0]), np.array([0.8, 0.6])
+    far = rasterize_segments([start - 1e6 * direction], [start + 1e6 * direction], RED, shape)
+    near = rasterize_segments([start - 100 * direction], [start + 100 * direction], RED, shape)
+    assert np.abs(far[:, :, 3] - near[:, :, 3]).max() < 0.02
+    assert np.isclose(far[:, :, 3].sum(), near[:, :, 3].sum(), rtol=1e-3)
+
+def test_zoomed_in_cost_does_not_grow_with_segment_length():
+    # Seen from a deep zoom these segments span 1e9 pixels; sampled unclipped they would never finish
+    rng = np.random.default_rng(1)
+    starts = np.column_stack([np.full(500, -1e9), rng.uniform(0, 100, 500)])
+    ends = starts + [2e9, 0.0]
+    began = time.perf_counter()
+    image = rasterize_segments(starts, ends, BLUE, (100, 100))
+    assert time.perf_counter() - began < 2.0
+    assert image[:, :, 3].max() > 0.5
+
+def test_layer_sits_between_the_axis_panes_and_the_collections():
+    fig = plt.figure(figsize=(3, 3), dpi=100)
+    ax = fig.add_subplot(111, projection='3d')
+    df = pd.DataFrame(np.random.default_rng(1).random((20, 6)),
+                      columns=['Start_X', 'Start_Y', 'Start_Z', 'End_X', 'End_Y', 'End_Z'])
+    layer = RasterLayer(ax, ProjectionCache(ax), [df], np.tile(RED, (20, 1)))
+    ax.add_artist(layer)
+
+    # mplot3d draws collections at the highest axis zorder plus one
+    axis_zorder = max(axis.get_zorder() for axis in (ax.xaxis, ax.yaxis, ax.zaxis))
+    assert axis_zorder < layer.get_zorder() < axis_zorder + 1
+    fig.canvas.draw()
+    assert (np.asarray(fig.canvas.buffer_rgba())[:, :, :3] == [255, 0, 0]).all(axis=2).any()
+    plt.close(fig)
@@ -0,0 +1,207 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from rc_network import NodeGraph, ResistanceNetwork, conductance_laplacian, merge_points
+
+def edge_frame(kind, nodes, node_xyz, values):
+    """Capacitor or resistor DataFrame with one edge per (start, end) node pair."""
+    nodes = np.asarray(nodes)
+    starts, ends = node_xyz[nodes[:, 0]], node_xyz[nodes[:, 1]]
+    return pd.DataFrame({
+        f"{kind}_Name": [f"{kind[0]}{i}" for i in range(len(nodes))],
+        'Start_X': starts[:, 0], 'Start_Y': starts[:, 1], 'Start_Z': starts[:, 2],
+        'End_X': ends[:, 0], 'End_Y': ends[:, 1], 'End_Z': ends[:, 2],
+        'Value': values
+    })
+
+def random_network(num_nodes, num_resistors, num_capacitors, seed=0):
+    """Node coordinates on a coarse grid plus random resistor and capacitor node pairs."""
+    rng = np.random.default_rng(seed)
+    node_xyz = np.unique(rng.integers(0, 1000, (num_nodes * 2, 3)), axis=0)[:num_nodes] * 1e-3
+    rng.shuffle(node_xyz)
+    resistors = rng.integers(0, num_nodes, (num_resistors, 2))
+    capacitors = rng.integers(0, num_nodes, (num_capacitors, 2))
+    return (node_xyz, edge_frame('Resistor', resistors, node_xyz, rng.uniform(1, 100, num_resistors)),
+            edge_frame('Capacitor', capacitors, node_xyz, rng.uniform(0.1, 2, num_capacitors)))
+
+def same_partition(labels, expected):
+    """Check that two labelings group the points the same way, whatever the ids."""
+    labels, expected = np.asarray(labels), np.asarray(expected)
+    pairs = set(zip(labels.tolist(), expected.tolist()))
+    return len(pairs) == len(set(labels.tolist())) == len(set(expected.tolist()))
+
+def test_merge_points_across_cell_boundary():
+    # Points 1 and 3 are 0.02e-5 apart on either side of the boundary at 1e-5,
+    # far from the first points of their cells
+    points = [[0.01e-5, 0, 0], [0.99e-5, 0, 0], [1.99e-5, 0, 0], [1.01e-5, 0, 0]]
+    labels, node_xyz = merge_points(points, 1e-5)
+    assert len(set(labels.tolist())) == 1
+    np.testing.assert_allclose(node_xyz[0], np.mean(points, axis=0))
+
+def test_merge_points_matches_clusters():
+    rng = np.random.default_rng(0)
+    tolerance = 1e-3
+
+    # Cluster centers far apart, with noise well inside the tolerance that often straddles a cell boundary
+    centers = np.round(rng.random((400, 3)) * 100, 0) * 10 * tolerance
+    centers = np.unique(centers, axis=0)
+    cluster = rng.integers(0, len(centers), 5000)
+    points = centers[cluster] + rng.uniform(-0.2, 0.2, (len(cluster), 3)) * tolerance
+
+    labels, node_xyz = merge_points(points, tolerance)
+    assert same_partition(labels, cluster)
+    for node in range(len(node_xyz)):
+        np.testing.assert_allclose(node_xyz[node], points[labels == node].mean(axis=0))
+
+def test_merge_points_chains_and_separates():
+    tolerance = 1e-3
+    chain = np.column_stack([np.arange(20) * 0.9 * tolerance, np.zeros(20), np.zeros(20)])
+    labels, _ = merge_points(chain, tolerance)
+    assert len(set(labels.tolist())) == 1
+
+    apart = np.column_stack([np.arange(20) * 3 * tolerance, np.zeros(20), np.zeros(20)])
+    labels, _ = merge_points(apart, tolerance)
+    assert len(set(labels.tolist())) == 20
+
+def test_merge_points_exact_duplicates_only():
+    points = np.array([[0, 0, 0], [0, 0, 0], [1e-9, 0, 0], [1, 2, 3], [1, 2, 3]], dtype=float)
+    labels, _ = merge_points(points, 0)
+    assert same_partition(labels, [0, 0, 1, 2, 2])
+
+def test_node_capacitance_matches_loop():
+    node_xyz, resistor_df, capacitor_df = random_network(60, 80, 200, seed=1)
+    graph = NodeGraph(capacitor_df, resistor_df)
+    assert graph.num_nodes == 60
+
+    expected = np.zeros(graph.num_nodes)
+    for (a, b), value in zip(graph.capacitor_nodes, capacitor_df['Value']):
+        expected[a] += value
+        if b != a:
+            expected[b] += value
+    np.testing.assert_allclose(graph.node_capacitance(), expected)
+
+    top = graph.top_loaded_nodes(5)
+    np.testing.assert_allclose(expected[top], np.sort(expected)[::-1][:5])
+
+def test_components_match_breadth_first_search():
+    node_xyz, resistor_df, capacitor_df = random_network(80, 50, 0, seed=2)
+    graph = NodeGraph(None, resistor_df)
+    num_components, labels = graph.components()
+
+    neighbours = {node: set() for node in range(graph.num_nodes)}
+    for a, b in graph.resistor_nodes:
+        neighbours[a].add(b)
+        neighbours[b].add(a)
+    seen, count = set(), 0
+    for node in range(graph.num_nodes):
+        if node in seen:
+            continue
+        count += 1
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            if current not in seen:
+                seen.add(current)
+                assert labels[current] == labels[node]
+                stack.extend(neighbours[current])
+    assert num_components == count
+
+def dense_effective_resistance(graph, resistances, a, b):
+    """Effective resistance from the pseudo-inverse of the dense Laplacian."""
+    laplacian = conductance_laplacian(graph.num_nodes, graph.resistor_nodes, resistances).toarray()
+    injection = np.zeros(graph.num_nodes)
+    injection[a] += 1.0
+    injection[b] -= 1.0
+    return injection @ np.linalg.pinv(laplacian) @ injection
+
+def test_find_node_by_name_or_coordinates():
+    node_xyz, resistor_df, capacitor_df = random_network(50, 80, 30, seed=6)
+    graph = NodeGraph(capacitor_df, resistor_df)
+    start, end = graph.resistor_nodes[3]
+    assert graph.find_node("R3") == graph.find_node(" R3:start ") == start
+    assert graph.find_node("R3:End") == end
+    assert graph.find_node("C0") == graph.capacitor_nodes[0, 0]
+    x, y, z = graph.node_xyz[end] + 1e-6
+    assert graph.find_node(f"{x}, {y} {z}") == end
+    for spec in ("R999", "1, 2", "a, b, c"):
+        with pytest.raises(ValueError):
+            graph.find_node(spec)
+
+def test_effective_resistance_series_and_parallel():
+    node_xyz = np.array([[0, 0, 0], [1, 0, 0], [2, 0, 0]], dtype=float)
+    resistor_df = edge_frame('Resistor', [[0, 1], [1, 2], [0, 2]], node_xyz, [10.0, 20.0, 30.0])
+    network = ResistanceNetwork(NodeGraph(None, resistor_df))
+    assert np.isclose(network.effective_resistance(0, 2), 1 / (1 / 30 + 1 / 30))
+    assert network.effective_resistance(1, 1) == 0.0
+
+def test_effective_resistance_matches_pseudo_inverse():
+    # Sparse enough to leave several resistor components
+    node_xyz, resistor_df, _ = random_network(50, 45, 0, seed=3)
+    graph = NodeGraph(None, resistor_df)
+    network = ResistanceNetwork(graph)
+    _, component = graph.components(include_capacitors=False)
+
+    rng = np.random.default_rng(4)
+    a, b = rng.integers(0, graph.num_nodes, (2, 200))
+    result = network.effective_resistance(a, b)
+    for i in range(len(a)):
+        if component[a[i]] != component[b[i]]:
+            assert result[i] == np.inf
+        else:
+            assert np.isclose(result[i], dense_effective_resistance(graph, network.resistances, a[i], b[i])), i
+    assert np.isinf(result).any() and np.isfinite(result).any()
+
+def random_tree(num_nodes, seed=0):
+    """Resistor tree where every node hangs off a lower-numbered parent, plus node capacitors."""
+    rng = np.random.default_rng(seed)
+    node_xyz = np.column_stack([np.arange(num_nodes), rng.integers(0, 5, num_nodes), np.zeros(num_nodes)]) * 1e-2
+    parents = np.array([rng.integers(0, node) for node in range(1, num_nodes)])
+    resistors = np.column_stack([parents, np.arange(1, num_nodes)])
+    capacitors = np.column_stack([np.arange(num_nodes), rng.integers(0, num_nodes, num_nodes)])
+    return (parents, edge_frame('Resistor', resistors, node_xyz, rng.uniform(1, 100, num_nodes - 1)),
+            edge_frame('Capacitor', capacitors, node_xyz, rng.uniform(0.1, 2, num_nodes)))
+
+def test_tree_elmore_matches_shared_path_resistance():
+    parents, resistor_df, capacitor_df = random_tree(40, seed=5)
+    graph = NodeGraph(capacitor_df, resistor_df)
+    network = ResistanceNetwork(graph)
+    driver = graph.component_node('R0', 'start')
+    delays = network.elmore_delays(driver)
+
+    # Delay of i: sum over nodes k of C_k times the resistance shared by the paths driver->i and driver->k
+    node_parent, edge_resistance = {}, {}
+    for (a, b), value in zip(graph.resistor_nodes, resistor_df['Value']):
+        node_parent[b] = a
+        edge_resistance[b] = value
+
+    def path(node):
+        nodes = set()
+        while node != driver:
+            nodes.add(node)
+            node = node_parent[node]
+        return nodes
+
+    capacitance = graph.node_capacitance()
+    paths = {node: path(node) for node in range(graph.num_nodes)}
+    for i in range(graph.num_nodes):
+        expected = sum(capacitance[k] * sum(edge_resistance[n] for n in paths[i] & paths[k])
+                       for k in range(graph.num_nodes))
+        assert np.isclose(delays[i], expected)
+
+def test_mesh_elmore_matches_dense_solve():
+    node_xyz, resistor_df, capacitor_df = random_network(40, 120, 60, seed=6)
+    graph = NodeGraph(capacitor_df, resistor_df)
+    network = ResistanceNetwork(graph)
+    driver = graph.component_node('R0', 'start')
+    delays = network.elmore_delays(driver)
+
+    _, component = graph.components(include_capacitors=False)
+    members = np.flatnonzero(component == component[driver])
+    kept = members[members != driver]
+    laplacian = conductance_laplacian(graph.num_nodes, graph.resistor_nodes, network.resistances).toarray()
+    expected = np.linalg.solve(laplacian[np.ix_(kept, kept)], graph.node_capacitance()[kept])
+
+    np.testing.assert_allclose(delays[kept], expected)
+    assert delays[driver] == 0.0
+    assert np.all(np.isinf(np.delete(delays, members)))
@@ -0,0 +1,91 @@
+import numpy as np
+
+from spatial_index import (SpatialIndex, point_segment_distances, segment_segment_distances,
+                           segments_intersect_box)
+
+def make_segments(n, seed=0, length=0.05):
+    rng = np.random.default_rng(seed)
+    starts = rng.random((n, 3))
+    ends = starts + rng.normal(0, length, (n, 3))
+    return starts, ends
+
+def sample_segments(starts, ends, count=2001):
+    """Dense samples along each segment, shaped (N, count, 3)."""
+    t = np.linspace(0.0, 1.0, count)[None, :, None]
+    return starts[:, None, :] + t * (ends - starts)[:, None, :]
+
+def test_point_segment_distances_match_sampling():
+    starts, ends = make_segments(50, seed=1, length=0.3)
+    point = np.array([0.4, 0.5, 0.6])
+    sampled = np.linalg.norm(sample_segments(starts, ends) - point, axis=2).min(axis=1)
+    np.testing.assert_allclose(point_segment_distances(point, starts, ends), sampled, atol=1e-3)
+
+def test_segment_segment_distances_match_sampling():
+    starts, ends = make_segments(30, seed=2, length=0.3)
+    seg_start, seg_end = np.array([0.1, 0.2, 0.3]), np.array([0.9, 0.7, 0.4])
+    query = sample_segments(seg_start[None], seg_end[None], 801)[0]
+    samples = sample_segments(starts, ends, 801)
+    sampled = np.linalg.norm(samples[:, :, None, :] - query[None, None, :, :], axis=3).min(axis=(1, 2))
+    np.testing.assert_allclose(segment_segment_distances(seg_start, seg_end, starts, ends), sampled, atol=2e-3)
+
+def test_query_radius_matches_brute_force():
+    starts, ends = make_segments(2000, seed=3)
+    index = SpatialIndex(starts, ends)
+    rng = np.random.default_rng(4)
+    for point in rng.random((20, 3)):
+        for radius in (0.01, 0.05, 0.2):
+            distances = point_segment_distances(point, starts, ends)
+            expected = np.flatnonzero(distances <= radius)
+            edges, found = index.query_radius(point, radius)
+            np.testing.assert_array_equal(np.sort(edges), expected)
+            assert np.all(np.diff(found) >= 0)
+
+def test_query_knn_matches_brute_force():
+    starts, ends = make_segments(1000, seed=5)
+    index = SpatialIndex(starts, ends)
+    for point in (np.array([0.5, 0.5, 0.5]), np.array([3.0, -2.0, 0.5])):
+        distances = point_segment_distances(point, starts, ends)
+        edges, found = index.query_knn(point, 7)
+        np.testing.assert_allclose(found, np.sort(distances)[:7])
+
+def test_query_box_matches_brute_force():
+    starts, ends = make_segments(2000, seed=6)
+    index = SpatialIndex(starts, ends)
+    for lo, hi in (([0.2, 0.2, 0.2], [0.4, 0.5, 0.6]), ([0.0, 0.9, -1.0], [1.0, 1.0, 2.0])):
+        expected = np.flatnonzero(segments_intersect_box(starts, ends, np.array(lo), np.array(hi)))
+        np.testing.assert_array_equal(np.sort(index.query_box(lo, hi)), expected)
+
+def test_query_ray_matches_brute_force():
+    starts, ends = make_segments(2000, seed=7)
+    index = SpatialIndex(starts, ends)
+    origin, direction = np.array([-1.0, 0.3, 0.4]), np.array([1.0, 0.2, 0.1])
+    # A segment far longer than the data stands in for the ray
+    distances = segment_segment_distances(origin, origin + 100 * direction, starts, ends)
+    expected = np.flatnonzero(distances <= 0.03)
+    edges, _ = index.query_ray(origin, direction, 0.03)
+    np.testing.assert_array_equal(np.sort(edges), expected)
+
+def test_flat_layer_and_empty_index():
+    starts, ends = make_segments(500, seed=8)
+    starts[:, 2] = ends[:, 2] = 0.25
+    index = SpatialIndex(starts, ends)
+    assert index.shape[2] == 1
+    edges, _ = index.query_radius([0.5, 0.5, 0.25], 0.1)
+    expected = np.flatnonzero(point_segment_distances(np.array([0.5, 0.5, 0.25]), starts, ends) <= 0.1)
+    np.testing.assert_array_equal(np.sort(edges), expected)
+
+    empty = SpatialIndex(np.empty((0, 3)), np.empty((0, 3)))
+    assert len(empty.query_box([0, 0, 0], [1, 1, 1])) == 0
+    assert len(empty.query_knn([0, 0, 0], 3)[0]) == 0
+
+def test_non_finite_edges_are_skipped():
+    starts, ends = make_segments(500, seed=9)
+    starts[[3, 40]] = np.nan
+    ends[7, 1] = np.inf
+    index = SpatialIndex(starts, ends)
+    finite = np.ones(500, dtype=bool)
+    finite[[3, 7, 40]] = False
+    expected = np.flatnonzero(finite & segments_intersect_box(starts, ends, np.zeros(3), np.ones(3)))
+    np.testing.assert_array_equal(np.sort(index.query_box([0, 0, 0], [1, 1, 1])), expected)
+    assert len(index.query_knn([0.5, 0.5, 0.5], 1000)[0]) == 497
+    np.testing.assert_array_equal(index.query_box(index.bounds_lo - 1, index.bounds_hi + 1), np.flatnonzero(finite))
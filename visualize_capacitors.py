@@ -10,56 +10,29 @@ import os
 from matplotlib.cm import ScalarMappable
 from matplotlib.colors import Normalize, LinearSegmentedColormap, BoundaryNorm
 from matplotlib.widgets import Slider, TextBox, CheckButtons
+from binning import analyze_distribution
 
 def read_capacitor_data(file_path):
     """Read capacitor data from CSV file."""
     return pd.read_csv(file_path)
 
-def analyze_capacitance_distribution(df):
+def analyze_capacitance_distribution(df, num_bins=5, strategy="auto"):
     """Analyze the distribution of capacitance values and create suitable ranges."""
-    values = df['Value'].values
-    
-    # Get basic statistics
-    min_val = np.min(values)
-    max_val = np.max(values)
-    mean_val = np.mean(values)
-    median_val = np.median(values)
+    distribution = analyze_distribution(df['Value'].values, num_bins, strategy)
     
     print(f"Capacitance Value Distribution:")
-    print(f"Min: {min_val:.6e}, Max: {max_val:.6e}")
-    print(f"Mean: {mean_val:.6e}, Median: {median_val:.6e}")
-    
-    # Method 1: Equal size bins
-    num_bins = 5  # Default number of bins
+    print(f"Min: {distribution['min']:.6e}, Max: {distribution['max']:.6e}")
+    print(f"Mean: {distribution['mean']:.6e}, Median: {distribution['median']:.6e}")
     
-    # If the range is very large (several orders of magnitude), use logarithmic bins
-    if max_val / (min_val + 1e-10) > 100:
+    if strategy == "auto" and distribution['strategy'] == "log":
         print("Using logarithmic bins due to wide value range")
-        bins = np.logspace(np.log10(max(min_val, 1e-15)), np.log10(max_val), num_bins+1)
-    else:
-        # Otherwise use equal width bins
-        bins = np.linspace(min_val, max_val, num_bins+1)
-    
-    # Count the number of values in each bin
-    hist, bin_edges = np.histogram(values, bins=bins)
     
     # Print histogram
     print("\nValue Distribution by Range:")
-    for i in range(len(hist)):
-        print(f"{bin_edges[i]:.6e} to {bin_edges[i+1]:.6e}: {hist[i]} capacitors ({hist[i]/len(values)*100:.1f}%)")
-    
-    # Create color ranges
-    color_ranges = []
-    for i in range(len(hist)):
-        color_ranges.append({
-            'min': bin_edges[i],
-            'max': bin_edges[i+1],
-            'label': f"{bin_edges[i]:.3e} - {bin_edges[i+1]:.3e}",
-            'count': hist[i],
-            'percentage': hist[i]/len(values)*100
-        })
-    
-    return color_ranges, bin_edges
+    for range_info in distribution['color_ranges']:
+        print(f"{range_info['min']:.6e} to {range_info['max']:.6e}: {range_info['count']} capacitors ({range_info['percentage']:.1f}%)")
+    
+    return distribution['color_ranges'], distribution['bin_edges']
 
 def get_color_for_value(value, norm, cmap):
     """Get a color for a specific capacitance value using the colormap."""
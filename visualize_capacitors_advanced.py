@@ -8,59 +8,17 @@ import random
 from matplotlib.widgets import Button, CheckButtons, Slider, TextBox
 import sys
 import os
+import threading
 from matplotlib.cm import ScalarMappable
 from matplotlib.colors import Normalize, LinearSegmentedColormap, BoundaryNorm
+from exporter import export_snapshot, snapshot_figure
+from proximity import edge_endpoints, find_close_pairs, pairs_to_records
+from visualize_capacitors import analyze_capacitance_distribution
 
 def read_capacitor_data(file_path):
     """Read capacitor data from CSV file."""
     return pd.read_csv(file_path)
 
-def analyze_capacitance_distribution(df):
-    """Analyze the distribution of capacitance values and create suitable ranges."""
-    values = df['Value'].values
-    
-    # Get basic statistics
-    min_val = np.min(values)
-    max_val = np.max(values)
-    mean_val = np.mean(values)
-    median_val = np.median(values)
-    
-    print(f"Capacitance Value Distribution:")
-    print(f"Min: {min_val:.6e}, Max: {max_val:.6e}")
-    print(f"Mean: {mean_val:.6e}, Median: {median_val:.6e}")
-    
-    # Method 1: Equal size bins
-    num_bins = 5  # Default number of bins
-    
-    # If the range is very large (several orders of magnitude), use logarithmic bins
-    if max_val / (min_val + 1e-10) > 100:
-        print("Using logarithmic bins due to wide value range")
-        bins = np.logspace(np.log10(max(min_val, 1e-15)), np.log10(max_val), num_bins+1)
-    else:
-        # Otherwise use equal width bins
-        bins = np.linspace(min_val, max_val, num_bins+1)
-    
-    # Count the number of values in each bin
-    hist, bin_edges = np.histogram(values, bins=bins)
-    
-    # Print histogram
-    print("\nValue Distribution by Range:")
-    for i in range(len(hist)):
-        print(f"{bin_edges[i]:.6e} to {bin_edges[i+1]:.6e}: {hist[i]} capacitors ({hist[i]/len(values)*100:.1f}%)")
-    
-    # Create color ranges
-    color_ranges = []
-    for i in range(len(hist)):
-        color_ranges.append({
-            'min': bin_edges[i],
-            'max': bin_edges[i+1],
-            'label': f"{bin_edges[i]:.3e} - {bin_edges[i+1]:.3e}",
-            'count': hist[i],
-            'percentage': hist[i]/len(values)*100
-        })
-    
-    return color_ranges, bin_edges
-
 def get_color_for_value(value, norm, cmap):
     """Get a color for a specific capacitance value using the colormap."""
     return cmap(norm(value))
@@ -69,37 +27,15 @@ def calculate_distance(p1, p2):
     """Calculate Euclidean distance between two points."""
     return np.sqrt((p2[0] - p1[0])**2 + (p2[1] - p1[1])**2 + (p2[2] - p1[2])**2)
 
-def find_closest_edges(df, threshold=0.05):
-    """Find edges that are close to each other."""
-    proximity = []
-    
-    for i, row1 in df.iterrows():
-        p1_start = np.array([row1['Start_X'], row1['Start_Y'], row1['Start_Z']])
-        p1_end = np.array([row1['End_X'], row1['End_Y'], row1['End_Z']])
-        
-        for j, row2 in df.iloc[i+1:].iterrows():
-            p2_start = np.array([row2['Start_X'], row2['Start_Y'], row2['Start_Z']])
-            p2_end = np.array([row2['End_X'], row2['End_Y'], row2['End_Z']])
-            
-            # Calculate minimum distance between the two edges
-            # This is a simplified approach - you could use a more accurate algorithm
-            distances = [
-                calculate_distance(p1_start, p2_start),
-                calculate_distance(p1_start, p2_end),
-                calculate_distance(p1_end, p2_start),
-                calculate_distance(p1_end, p2_end)
-            ]
-            
-            min_distance = min(distances)
-            
-            if min_distance < threshold:
-                proximity.append({
-                    'capacitor1': row1['Capacitor_Name'],
-                    'capacitor2': row2['Capacitor_Name'],
-                    'min_distance': min_distance
-                })
-    
-    return proximity
+def find_closest_edges(df, threshold=0.05, workers=None):
+    """Find edges that are close to each other.
+    
+    Large datasets are searched in parallel tiles across CPU cores
+    (see ``proximity.find_close_pairs``).
+    """
+    starts, ends = edge_endpoints(df)
+    first, second, distances = find_close_pairs(starts, ends, threshold, workers)
+    return pairs_to_records(df['Capacitor_Name'].values, first, second, distances)
 
 def visualize_capacitors_advanced(data_file):
     """Visualize capacitors as edges with advanced features."""
@@ -311,8 +247,18 @@ def visualize_capacitors_advanced(data_file):
         base_filename = os.path.splitext(os.path.basename(data_file))[0]
         file_name = os.path.join(output_dir, f"{base_filename}_edges.png")
         
-        plt.savefig(file_name, dpi=300, bbox_inches='tight')
-        print(f"Figure saved as {file_name}")
+        # Draw and write a copy of the figure in the background so the window stays responsive
+        snapshot = snapshot_figure(fig)
+        
+        def export():
+            try:
+                export_snapshot(snapshot, file_name, dpi=300)
+                print(f"Figure saved as {file_name}")
+            except Exception as e:
+                print(f"Error saving figure: {e}")
+        
+        print(f"Saving figure to {file_name}...")
+        threading.Thread(target=export).start()
     
     def update_min_slider(val):
         capacitance_filter['min'] = min_slider.val